@@ -0,0 +1,1136 @@
+"""
+Замеры производительности генератора графика отпусков
+
+Запуск:
+    python bench_graf.py styles --employees 20 500 2000
+    python bench_graf.py matrix --employees 1000 50000
+    python bench_graf.py recalc --employees 20 200
+    python bench_graf.py batch --departments 24 --workers 1 2 4
+    python bench_graf.py import --rows 10000 100000
+    python bench_graf.py extract --files 200 --workers 1 2 4
+    python bench_graf.py analytics --employees 1000 50000 --team-size 25
+    python bench_graf.py validate --employees 1000 50000
+    python bench_graf.py summary --employees 1000 50000
+    python bench_graf.py writer --employees 20 500 2000 [--orientation rows] [--conditional]
+    python bench_graf.py save --employees 500 2000 --levels 0 1 6 9
+    python bench_graf.py render --employees 20 200
+    python bench_graf.py startup --repeat 20 [--target-ms 100]
+    python bench_graf.py service --requests 500 --distinct 10 --workers 4
+    python bench_graf.py suite --employees 20 500 5000 --output suite.json [--compare прошлый.json]
+
+Результаты выводятся таблицей, с ключом --json - в формате JSON. Набор suite
+сохраняется с версиями и ревизией (--output) и сравнивается с прошлым запуском
+(--compare): рост времени, памяти, размера файла или числа формул больше
+--threshold - регрессия, код возврата 1. Замер writer завершается с кодом 1,
+если прямая запись XML дала книгу, отличную от openpyxl. Замер service
+завершается с кодом 1, если не все ответы 200 или одинаковые запросы строились
+повторно. Замер startup завершается с кодом 1, если команда календаря
+(production_calendar.py или python -m graf calendar) запускается дольше --target-ms. Замер render завершается с
+кодом 1, если заполненный ГРАФИК расходится с построенной книгой или книга с
+analytics=True заполнена иначе, чем без нее.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import datetime
+import hashlib
+import importlib.util
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import py_compile
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import openpyxl
+from openpyxl import Workbook
+from openpyxl.styles import PatternFill, Border, Side, Alignment
+from openpyxl.utils import get_column_letter
+
+import graf
+
+
+def _timed(func, repeat):
+    """Лучшее время выполнения func за repeat запусков"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _month_spans(year):
+    """Колонки начала и конца каждого месяца на листе ГРАФИК"""
+    spans = []
+    col = 3
+    for month in range(1, 13):
+        days_in_month = graf.calendar.monthrange(year, month)[1]
+        spans.append((col, col + days_in_month - 1))
+        col += days_in_month
+    return spans
+
+
+def _style_grid_per_cell(employees, year):
+    """Оформление области данных ГРАФИК как раньше: новые объекты стиля на каждую ячейку"""
+    wb = Workbook()
+    ws = wb.active
+    month_colors = ['E6E6E6', 'FFFFFF']
+    for month_idx, (start_col, end_col) in enumerate(_month_spans(year)):
+        color = month_colors[month_idx % 2]
+        for col in range(start_col, end_col + 1):
+            for row in range(5, 5 + employees):
+                cell = ws.cell(row=row, column=col)
+                cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+                cell.border = Border(
+                    left=Side(style='thin'),
+                    right=Side(style='thin'),
+                    top=Side(style='thin'),
+                    bottom=Side(style='thin')
+                )
+                cell.alignment = Alignment(vertical="center", horizontal="center")
+
+
+def _style_grid_registry(employees, year):
+    """Оформление области данных ГРАФИК через реестр стилей"""
+    wb = Workbook()
+    ws = wb.active
+    styles = graf.StyleRegistry(wb)
+    for month_idx, (start_col, end_col) in enumerate(_month_spans(year)):
+        styles.apply_range(ws, 5, start_col, 4 + employees, end_col, f'граф_ячейка_{month_idx % 2}')
+
+
+def bench_styles(employee_counts, year=2026, repeat=3):
+    """Стоимость оформления ячеек ГРАФИК до и после перехода на реестр стилей"""
+    results = []
+    for employees in employee_counts:
+        cells = employees * len(graf.ProductionCalendar(year))
+        before = _timed(lambda: _style_grid_per_cell(employees, year), repeat)
+        after = _timed(lambda: _style_grid_registry(employees, year), repeat)
+        results.append({
+            'benchmark': 'styles',
+            'employees': employees,
+            'cells': cells,
+            'per_cell_seconds': round(before, 4),
+            'registry_seconds': round(after, 4),
+            'speedup': round(before / after, 1) if after else None,
+        })
+    return results
+
+
+def _random_periods(employees, year, periods_per_employee=3, seed=1):
+    """Случайные периоды отпуска: массивы (номер сотрудника, начало, конец)"""
+    rnd = random.Random(seed)
+    first_day = datetime.date(year, 1, 1)
+    indexes, starts, ends = [], [], []
+    for emp_idx in range(employees):
+        for _ in range(periods_per_employee):
+            start = first_day + datetime.timedelta(days=rnd.randrange(365))
+            indexes.append(emp_idx)
+            starts.append(start)
+            ends.append(start + datetime.timedelta(days=rnd.randrange(1, 21)))
+    return indexes, starts, ends
+
+
+def _totals_per_day(calendar_days, indexes, starts, ends, employees):
+    """Итоги без праздников обходом по дням, как цикл Do While в макросе"""
+    totals = [0] * employees
+    for emp_idx, start, end in zip(indexes, starts, ends):
+        current = start
+        while current <= end:
+            if current in calendar_days and calendar_days.day_code(current) != graf.DAY_HOLIDAY:
+                totals[emp_idx] += 1
+            current += datetime.timedelta(days=1)
+    return totals
+
+
+def bench_matrix(employee_counts, year=2026, repeat=3):
+    """Подсчет дней отпуска: обход по дням и VacationMatrix на NumPy"""
+    calendar_days = graf.ProductionCalendar(year)
+    results = []
+    for employees in employee_counts:
+        indexes, starts, ends = _random_periods(employees, year)
+        before = _timed(lambda: _totals_per_day(calendar_days, indexes, starts, ends, employees), repeat)
+        after = _timed(lambda: graf.VacationMatrix(calendar_days, indexes, starts, ends, employees).totals(),
+                       repeat)
+        results.append({
+            'benchmark': 'matrix',
+            'employees': employees,
+            'periods': len(indexes),
+            'per_day_seconds': round(before, 4),
+            'numpy_seconds': round(after, 4),
+            'speedup': round(before / after, 1) if after else None,
+        })
+    return results
+
+
+def _countifs_formula(start, end, holidays):
+    """Формула дней отпуска через COUNTIFS по списку праздников holidays"""
+    return (f'=IF(AND({start}<>"",{end}<>""),({end}-{start}+1)-'
+            f'COUNTIFS({holidays},">="&{start},{holidays},"<="&{end}),"")')
+
+
+def _recalc_workbook(path, employees, year, variant):
+    """Книга с заполненными датами всех периодов и формулами дней варианта variant
+    
+    column - COUNTIFS по всей колонке ПРАЗДНИКИ!$A:$A (как было),
+    bounded - COUNTIFS по диапазону списка праздников,
+    cumulative - разность накопленного числа праздников с листа ДАТЫ (текущие формулы).
+    Возвращает адреса ячеек с датами начала и с формулами дней.
+    """
+    generator = graf.VacationScheduleGenerator("ЗАМЕР", max_employees=employees, orientation='rows')
+    with contextlib.redirect_stdout(io.StringIO()):
+        wb = generator._build_workbook()
+    
+    layout = generator.layout
+    ws = wb["СОТРУДНИКИ"]
+    holidays = {
+        'column': 'ПРАЗДНИКИ!$A:$A',
+        'bounded': f'ПРАЗДНИКИ!$A$3:$A${len(generator.calendar.get_all_holidays()) + 2}',
+    }.get(variant)
+    
+    rnd = random.Random(1)
+    first_day = datetime.date(year, 1, 1)
+    start_cells, formula_cells = [], []
+    for emp_idx in range(employees):
+        start_col = layout.start_col(emp_idx)
+        start_letter = get_column_letter(start_col)
+        end_letter = get_column_letter(start_col + 1)
+        days_letter = get_column_letter(start_col - 1)
+        for period_idx in range(layout.vacation_pairs):
+            row = layout.period_row(emp_idx, period_idx)
+            start = first_day + datetime.timedelta(days=rnd.randrange(365))
+            ws.cell(row=row, column=start_col, value=start)
+            ws.cell(row=row, column=start_col + 1, value=start + datetime.timedelta(days=rnd.randrange(1, 21)))
+            if holidays:
+                ws.cell(row=row, column=start_col - 1).value = _countifs_formula(
+                    f'{start_letter}{row}', f'{end_letter}{row}', holidays)
+            start_cells.append(f'СОТРУДНИКИ!{start_letter}{row}')
+            formula_cells.append(f'СОТРУДНИКИ!{days_letter}{row}')
+    wb.save(path)
+    return start_cells, formula_cells
+
+
+def bench_recalc(employee_counts, year=2026, repeat=3):
+    """Пересчет формул дней отпуска: COUNTIFS по колонке, по диапазону и накопленные суммы
+    
+    Формулы вычисляются локальным вычислителем pycel (pip install pycel): после
+    первого вычисления меняются все даты начала и замеряется пересчет всех формул.
+    Вычислитель ограничивает ссылку на всю колонку заполненной частью листа, поэтому
+    дополнительно приводится число ячеек, которые просматривает Excel на одну формулу.
+    """
+    from pycel import ExcelCompiler
+    
+    holidays_count = len(graf.ProductionCalendar(year).get_all_holidays())
+    cells_per_formula = {'column': 2 * 1048576, 'bounded': 2 * holidays_count, 'cumulative': 2}
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for employees in employee_counts:
+            result = {'benchmark': 'recalc', 'employees': employees}
+            values = {}
+            for variant in ('column', 'bounded', 'cumulative'):
+                path = os.path.join(directory, f'{variant}_{employees}.xlsx')
+                start_cells, formula_cells = _recalc_workbook(path, employees, year, variant)
+                compiler = ExcelCompiler(filename=path)
+                values[variant] = [compiler.evaluate(cell) for cell in formula_cells]
+                
+                def recalc():
+                    # Сдвиг всех дат начала на день назад и пересчет зависимых формул
+                    for cell in start_cells:
+                        compiler.set_value(cell, compiler.evaluate(cell) - 1)
+                    for cell in formula_cells:
+                        compiler.evaluate(cell)
+                
+                result['formulas'] = len(formula_cells)
+                result[f'{variant}_seconds'] = round(_timed(recalc, repeat), 4)
+                result[f'{variant}_cells_per_formula'] = cells_per_formula[variant]
+            result['same_values'] = values['column'] == values['bounded'] == values['cumulative']
+            results.append(result)
+    return results
+
+
+def bench_batch(departments, worker_counts, employees=20):
+    """Пакетная генерация графиков отделов: книги в секунду в зависимости от числа процессов
+    
+    Каждый замер выполняется с полным построением книг и со сборкой из заготовок
+    (TemplateCache, каталог кэша временный - заготовка строится в замере).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        manifest_path = os.path.join(directory, 'manifest.json')
+        manifest = {
+            'company': 'ООО Замер',
+            'defaults': {'streaming': True, 'max_employees': employees},
+            'departments': [{'name': f'Отдел {number + 1}'} for number in range(departments)],
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        
+        for workers in worker_counts:
+            for template in (False, True):
+                output_dir = os.path.join(directory, f'out_{workers}_{template}')
+                graf.TemplateCache._shared = graf.TemplateCache(os.path.join(output_dir, 'cache'))
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    jobs = graf.run_batch(manifest_path, output_dir, workers=workers, template=template)
+                elapsed = time.perf_counter() - start
+                results.append({
+                    'benchmark': 'batch',
+                    'departments': departments,
+                    'workers': workers,
+                    'template': template,
+                    'seconds': round(elapsed, 3),
+                    'books_per_second': round(departments / elapsed, 2),
+                    'failed': sum(1 for job in jobs if job['status'] != 'ok'),
+                })
+    return results
+
+
+def _write_roster(path, rows, departments=50, year=2026, seed=1):
+    """Выгрузка HR в CSV: rows строк по три периода отпуска на сотрудника"""
+    rnd = random.Random(seed)
+    first_day = datetime.date(year, 1, 1)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['ФИО', 'Начало', 'Окончание', 'Отдел'])
+        for row in range(rows):
+            employee, period = divmod(row, 3)
+            start = first_day + datetime.timedelta(days=period * 120 + rnd.randrange(90))
+            end = start + datetime.timedelta(days=rnd.randrange(3, 21))
+            writer.writerow([f'Сотрудник {employee + 1}', f'{start:%d.%m.%Y}', f'{end:%d.%m.%Y}',
+                             f'Отдел {employee % departments + 1}'])
+
+
+def bench_import(row_counts, departments=50, year=2026):
+    """Импорт выгрузки HR: время и пик памяти при чтении одного отдела и всей выгрузки
+    
+    Пик памяти измеряется tracemalloc (замедляет чтение в несколько раз, поэтому
+    время замеряется отдельным запуском). При выборе отдела пик не должен расти с
+    размером файла.
+    """
+    calendar_days = graf.ProductionCalendar(year)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in row_counts:
+            path = os.path.join(directory, f'roster_{rows}.csv')
+            _write_roster(path, rows, departments, year)
+            for department in ('Отдел 1', None):
+                def load():
+                    return graf.RosterImporter(path, calendar_days, department=department).employees()
+                
+                seconds = _timed(load, 1)
+                tracemalloc.start()
+                employees = load()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results.append({
+                    'benchmark': 'import',
+                    'rows': rows,
+                    'department': department or 'все',
+                    'employees': len(employees),
+                    'seconds': round(seconds, 3),
+                    'rows_per_second': round(rows / seconds),
+                    'peak_mb': round(peak / 1024 / 1024, 2),
+                })
+    return results
+
+
+def _load_employees(filename):
+    """Чтение сотрудников полной загрузкой книги (load_workbook со стилями)"""
+    return graf.ScheduleRenderer(filename).read_employees()
+
+
+def bench_extract(files, worker_counts, employees=20):
+    """Чтение заполненных графиков: полная загрузка load_workbook и разбор XML листов (ScheduleReader)
+    
+    Каталог из files копий заполненной книги (ГРАФИК отрисован) читается в пуле
+    процессов; оба способа должны вернуть одинаковые ФИО и периоды.
+    """
+    rnd = random.Random(1)
+    roster = []
+    for number in range(employees):
+        start = datetime.date(2026, 1, 1) + datetime.timedelta(days=rnd.randrange(300))
+        roster.append({'name': f'Сотрудник {number + 1}',
+                       'periods': [(start, start + datetime.timedelta(days=rnd.randrange(3, 21)))]})
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'source.xlsx')
+        with contextlib.redirect_stdout(io.StringIO()):
+            graf.VacationScheduleGenerator('ООО Замер', max_employees=employees, employees=roster).create_excel_file(source)
+            graf.ScheduleRenderer(source).render()
+        filenames = []
+        for number in range(files):
+            filenames.append(os.path.join(directory, f'отдел_{number + 1}.xlsx'))
+            shutil.copyfile(source, filenames[-1])
+        
+        for workers in worker_counts:
+            start = time.perf_counter()
+            with multiprocessing.Pool(workers) as pool:
+                loaded = pool.map(_load_employees, filenames, chunksize=8)
+            load_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            extracted = list(graf.extract_schedules(filenames, workers))
+            xml_seconds = time.perf_counter() - start
+            
+            same = all(records is not None and [(record.name, list(record.periods)) for record in records] == expected
+                       for (_, records, _), expected in zip(extracted, loaded))
+            results.append({
+                'benchmark': 'extract',
+                'files': files,
+                'workers': workers,
+                'load_workbook_seconds': round(load_seconds, 3),
+                'xml_seconds': round(xml_seconds, 3),
+                'xml_files_per_second': round(files / xml_seconds, 1),
+                'speedup': round(load_seconds / xml_seconds, 1),
+                'same_records': same,
+            })
+    return results
+
+
+def _naive_overlaps(employees, teams):
+    """Пересечения отпусков перебором всех пар периодов сотрудников команды"""
+    by_team = {}
+    for (name, periods), team in zip(employees, teams):
+        # Свои пересекающиеся и смежные периоды сотрудника - один отпуск
+        merged = []
+        for start, end in sorted(periods):
+            if merged and start <= merged[-1][1] + datetime.timedelta(days=1):
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        by_team.setdefault(team, []).append((name, merged))
+    count = 0
+    for members in by_team.values():
+        for first_idx, (_, first_periods) in enumerate(members):
+            for _, second_periods in members[first_idx + 1:]:
+                count += sum(1 for start, end in first_periods for other_start, other_end in second_periods
+                             if start <= other_end and other_start <= end)
+    return count
+
+
+def bench_analytics(employee_counts, team_size=25, year=2026, repeat=3):
+    """Аналитика отпусков: сотрудники в отпуске по дням, пересечения внутри команд, нехватка сотрудников
+    
+    VacationAnalytics (sweep line) сравнивается с перебором пар периодов внутри
+    команды, число сотрудников в отпуске по дням - с VacationMatrix (NumPy).
+    """
+    calendar_days = graf.ProductionCalendar(year)
+    results = []
+    for employees in employee_counts:
+        indexes, starts, ends = _random_periods(employees, year)
+        roster = [(f'Сотрудник {number + 1}', []) for number in range(employees)]
+        for emp_idx, start, end in zip(indexes, starts, ends):
+            roster[emp_idx][1].append((start, end))
+        teams = [emp_idx // team_size for emp_idx in range(employees)]
+        min_present = team_size - 3
+        
+        def analyze():
+            analytics = graf.VacationAnalytics(calendar_days, roster, teams)
+            return (analytics, analytics.daily_absent(), sum(1 for _ in analytics.overlaps()),
+                    analytics.coverage_gaps(min_present))
+        
+        seconds = _timed(analyze, repeat)
+        analytics, daily, overlaps, gaps = analyze()
+        start = time.perf_counter()
+        naive = _naive_overlaps(roster, teams)
+        naive_seconds = time.perf_counter() - start
+        result = {
+            'benchmark': 'analytics',
+            'employees': employees,
+            'periods': len(indexes),
+            'teams': len(analytics.team_sizes),
+            'seconds': round(seconds, 4),
+            'overlaps': overlaps,
+            'coverage_gaps': len(gaps),
+            'pairwise_seconds': round(naive_seconds, 4),
+            'same_overlaps': overlaps == naive,
+        }
+        if graf._load_numpy() is not None:
+            matrix = graf.VacationMatrix.from_employees(calendar_days, roster)
+            result['same_daily'] = list(matrix.daily_absent()) == list(daily)
+        results.append(result)
+    return results
+
+
+def _naive_vacation_totals(calendar_days, roster):
+    """Дни отпуска сотрудников обходом дней периодов (проверка VacationValidator)"""
+    codes = calendar_days.codes()
+    totals = []
+    for _, periods in roster:
+        total = 0
+        for start, end in periods:
+            day = start
+            while day <= end:
+                index = calendar_days.index(day)
+                total += index is None or codes[index] != graf.DAY_HOLIDAY
+                day += datetime.timedelta(days=1)
+        totals.append(total)
+    return totals
+
+
+def bench_validate(employee_counts, year=2026, repeat=3):
+    """Проверка правил отпусков: один проход по периодам с накопленными суммами календаря
+    
+    Дни отпуска VacationValidator сравниваются с обходом всех дней периодов.
+    """
+    calendar_days = graf.ProductionCalendar(year)
+    results = []
+    for employees in employee_counts:
+        indexes, starts, ends = _random_periods(employees, year)
+        roster = [(f'Сотрудник {number + 1}', []) for number in range(employees)]
+        for emp_idx, start, end in zip(indexes, starts, ends):
+            roster[emp_idx][1].append((start, end))
+        validator = graf.VacationValidator(calendar_days)
+        
+        seconds = _timed(lambda: validator.check(roster), repeat)
+        issues = validator.check(roster)
+        start = time.perf_counter()
+        naive = _naive_vacation_totals(calendar_days, roster)
+        naive_seconds = time.perf_counter() - start
+        totals = [sum(validator.vacation_days(start, end) for start, end in periods) for _, periods in roster]
+        results.append({
+            'benchmark': 'validate',
+            'employees': employees,
+            'periods': len(indexes),
+            'milliseconds': round(seconds * 1000, 2),
+            'errors': sum(1 for issue in issues if issue.severity == 'error'),
+            'warnings': sum(1 for issue in issues if issue.severity == 'warning'),
+            'day_walk_seconds': round(naive_seconds, 4),
+            'same_totals': totals == naive,
+        })
+    return results
+
+
+def _naive_summary_totals(calendar_days, roster):
+    """Дни отпуска сотрудников в пределах графика без праздничных: множество дней (проверка VacationSummary)"""
+    codes = calendar_days.codes()
+    totals = []
+    for _, periods in roster:
+        days = set()
+        for start, end in periods:
+            day = start
+            while day <= end:
+                index = calendar_days.index(day)
+                if index is not None and codes[index] != graf.DAY_HOLIDAY:
+                    days.add(index)
+                day += datetime.timedelta(days=1)
+        totals.append(len(days))
+    return totals
+
+
+def bench_summary(employee_counts, year=2026, repeat=3):
+    """Сводка по месяцам и кварталам: части отрезков по месяцам и накопленные суммы календаря
+    
+    Итоги VacationSummary за период сравниваются с обходом всех дней периодов,
+    values - сколько значений лист СВОДКА хранит вместо формул.
+    """
+    calendar_days = graf.ProductionCalendar(year)
+    results = []
+    for employees in employee_counts:
+        indexes, starts, ends = _random_periods(employees, year)
+        roster = [(f'Сотрудник {number + 1}', []) for number in range(employees)]
+        for emp_idx, start, end in zip(indexes, starts, ends):
+            roster[emp_idx][1].append((start, end))
+        
+        seconds = _timed(lambda: list(graf.VacationSummary(calendar_days, roster).department_rows()), repeat)
+        summary = graf.VacationSummary(calendar_days, roster)
+        start = time.perf_counter()
+        naive = _naive_summary_totals(calendar_days, roster)
+        naive_seconds = time.perf_counter() - start
+        columns = len(summary.months) + len(summary.quarters) + 2
+        results.append({
+            'benchmark': 'summary',
+            'employees': employees,
+            'periods': len(indexes),
+            'milliseconds': round(seconds * 1000, 2),
+            'values': employees * columns,
+            'day_walk_seconds': round(naive_seconds, 4),
+            'same_totals': [row[3] for row in summary.employee_rows()] == naive,
+        })
+    return results
+
+
+def _suite_roster(employees, periods, year, seed=1):
+    """Сотрудники для генератора: periods непересекающихся периодов отпуска в году у каждого"""
+    rnd = random.Random(seed)
+    first_day = datetime.date(year, 1, 1)
+    span = 365 // periods
+    roster = []
+    for number in range(employees):
+        roster.append({'name': f'Сотрудник {number + 1}', 'periods': []})
+        for period in range(periods):
+            length = rnd.randrange(1, min(span, 15))
+            start = first_day + datetime.timedelta(days=period * span + rnd.randrange(span - length + 1))
+            roster[-1]['periods'].append((start, start + datetime.timedelta(days=length - 1)))
+    return roster
+
+
+def _formula_count(path):
+    """Число формул в книге: элементы <f> в XML листов"""
+    with zipfile.ZipFile(path) as archive:
+        return sum(len(re.findall(rb'<f[ >]', archive.read(name)))
+                   for name in archive.namelist() if name.startswith('xl/worksheets/'))
+
+
+def _peak_mb(func):
+    """Пик памяти Python-объектов (tracemalloc) за один запуск func"""
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def _suite_environment():
+    """Версии и ревизия для сравнения результатов между версиями"""
+    directory = os.path.dirname(os.path.abspath(graf.__file__))
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=directory, capture_output=True,
+                                  text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    with open(graf.__file__, 'rb') as f:
+        source_digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'graf_sha256': source_digest,
+        'python': platform.python_version(),
+        'openpyxl': openpyxl.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def bench_suite(employee_counts, period_counts, years, streaming=False, repeat=3, memory=True, lookups=100000):
+    """Набор замеров генератора: построение книги, заполнение ГРАФИК и производственный календарь
+    
+    Для каждой комбинации числа сотрудников, периодов отпуска и года - время
+    create_excel_file и ScheduleRenderer.render, пик памяти (tracemalloc,
+    отдельным запуском), размер файла и число формул. Для каждого года -
+    построение календаря и поиск типа дня и числа рабочих дней.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for year in years:
+            for employees in employee_counts:
+                for periods in period_counts:
+                    roster = _suite_roster(employees, periods, year)
+                    path = os.path.join(directory, f'suite_{year}_{employees}_{periods}.xlsx')
+                    case = {'employees': employees, 'periods': periods, 'year': year, 'streaming': streaming}
+                    
+                    def generate():
+                        generator = graf.VacationScheduleGenerator('ООО Замер', streaming=streaming, year=year,
+                                                                   max_employees=employees, vacation_pairs=periods,
+                                                                   employees=roster)
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            if not generator.create_excel_file(path):
+                                raise RuntimeError(f"книга не построена: {path}")
+                        return generator
+                    
+                    seconds = _timed(generate, repeat)
+                    stats = generate().build_stats
+                    results.append(dict({'benchmark': 'generate'}, **case, **{
+                        'seconds': round(seconds, 3),
+                        'peak_mb': _peak_mb(generate) if memory else None,
+                        'file_kb': round(os.path.getsize(path) / 1024, 1),
+                        'formulas': _formula_count(path),
+                        'cells': sum(stage.get('cells', 0) for stage in stats.stages),
+                        'save_seconds': next((stage['seconds'] for stage in stats.stages
+                                              if stage['stage'] == 'сохранение'), None),
+                    }))
+                    
+                    rendered = os.path.join(directory, 'rendered.xlsx')
+                    
+                    def render():
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            graf.ScheduleRenderer(path).render(rendered)
+                    
+                    seconds = _timed(render, repeat)
+                    results.append(dict({'benchmark': 'render'}, **case, **{
+                        'seconds': round(seconds, 3),
+                        'peak_mb': _peak_mb(render) if memory else None,
+                        'file_kb': round(os.path.getsize(rendered) / 1024, 1),
+                    }))
+            
+            rnd = random.Random(year)
+            calendar_days = graf.ProductionCalendar(year)
+            dates = [calendar_days.date_at(rnd.randrange(len(calendar_days))) for _ in range(lookups)]
+            ranges = [tuple(sorted(pair)) for pair in zip(dates, reversed(dates))]
+            results.append({
+                'benchmark': 'calendar',
+                'year': year,
+                'build_seconds': round(_timed(lambda: graf.ProductionCalendar(year), repeat), 5),
+                'day_code_per_second': round(lookups / _timed(lambda: [calendar_days.day_code(date) for date in dates],
+                                                               repeat)),
+                'working_days_per_second': round(lookups / _timed(
+                    lambda: [calendar_days.count_working_days(start, end) for start, end in ranges], repeat)),
+            })
+    return results
+
+
+def _package_parts(path):
+    """Части книги (кроме docProps/core.xml - в ней время создания)"""
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist() if name != 'docProps/core.xml'}
+
+
+def bench_writer(employee_counts, periods=3, year=2026, orientation='blocks', conditional=False, repeat=3):
+    """Запись листов СОТРУДНИКИ и ГРАФИК: потоковый openpyxl и прямая запись XML (backend='xml')
+    
+    Обе книги должны совпадать байт в байт во всех частях, кроме времени создания.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for employees in employee_counts:
+            roster = _suite_roster(employees, periods, year)
+            seconds, parts, stages = {}, {}, {}
+            for backend in graf.VacationScheduleGenerator.BACKENDS:
+                path = os.path.join(directory, f'writer_{backend}_{employees}.xlsx')
+                
+                def generate():
+                    generator = graf.VacationScheduleGenerator('ООО Замер', streaming=True, backend=backend,
+                                                               year=year, max_employees=employees,
+                                                               vacation_pairs=periods, orientation=orientation,
+                                                               conditional_formatting=conditional, employees=roster)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        if not generator.create_excel_file(path):
+                            raise RuntimeError(f"книга не построена: {path}")
+                    return generator
+                
+                seconds[backend] = _timed(generate, repeat)
+                stages[backend] = {stage['stage']: stage['seconds'] for stage in generate().build_stats.stages}
+                parts[backend] = _package_parts(path)
+            
+            differing = sorted(name for name in parts['openpyxl'].keys() | parts['xml'].keys()
+                               if parts['openpyxl'].get(name) != parts['xml'].get(name))
+            results.append({
+                'benchmark': 'writer',
+                'employees': employees,
+                'orientation': orientation,
+                'conditional': conditional,
+                'openpyxl_seconds': round(seconds['openpyxl'], 3),
+                'xml_seconds': round(seconds['xml'], 3),
+                'schedule_openpyxl_seconds': stages['openpyxl']['ГРАФИК'],
+                'schedule_xml_seconds': stages['xml']['ГРАФИК'],
+                'speedup': round(seconds['openpyxl'] / seconds['xml'], 1),
+                'same_bytes': not differing,
+                'differing_parts': ", ".join(differing) or None,
+            })
+    return results
+
+
+def _schedule_cells(path, employees):
+    """Область данных ГРАФИК: [(значение, заливка, жирный шрифт, рамка) по дням] по строкам сотрудников"""
+    ws = openpyxl.load_workbook(path)['ГРАФИК']
+    layout = graf.ScheduleLayout(employees)
+    return [[(cell.value, cell.fill.fgColor.rgb if cell.fill.fill_type else None, bool(cell.font.b),
+              cell.border.left.style) for cell in row[2:]]
+            for row in ws.iter_rows(min_row=layout.schedule_row(0), max_row=layout.schedule_row(employees - 1),
+                                    max_col=ws.max_column)]
+
+
+def bench_render(employee_counts, start_months=(1, 4), periods=3, year=2026, repeat=3):
+    """Заполнение ГРАФИК (ScheduleRenderer.render) в книгах с условным форматированием и без, с analytics и без
+    
+    Графики на 12 месяцев начинаются с каждого месяца start_months. Дни отпуска
+    заполненной книги должны содержать отметку, остальные ячейки - совпадать с
+    построенной книгой; книга с analytics=True заполняется так же, как без нее.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for employees, start_month, conditional in itertools.product(employee_counts, start_months, (False, True)):
+            start_date = datetime.date(year, start_month, 1)
+            roster = _suite_roster(employees, periods, year)
+            for employee in roster:
+                employee['periods'] = [(start, end) for start, end in employee['periods'] if start >= start_date]
+            plain = None
+            for analytics in (False, True):
+                path = os.path.join(directory, f'render_{employees}_{start_month}_{conditional}_{analytics}.xlsx')
+                rendered = os.path.join(directory, 'rendered.xlsx')
+                
+                def render():
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        graf.ScheduleRenderer(path).render(rendered)
+                
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generator = graf.VacationScheduleGenerator('ООО Замер', start_date=start_date,
+                                                               max_employees=employees, vacation_pairs=periods,
+                                                               employees=roster, conditional_formatting=conditional,
+                                                               analytics=analytics)
+                    generator.create_excel_file(path)
+                seconds = _timed(render, repeat)
+                generated, cells = _schedule_cells(path, employees), _schedule_cells(rendered, employees)
+                
+                dates = [day.date for day in generator.calendar]
+                same_cells = len(cells) == len(generated)
+                for employee, generated_row, row in zip(roster, generated, cells):
+                    for date, generated_cell, cell in zip(dates, generated_row, row):
+                        if any(start <= date <= end for start, end in employee['periods']):
+                            same_cells &= cell[0] == graf.ScheduleRenderer.VACATION_MARK
+                        else:
+                            same_cells &= cell == generated_cell
+                results.append({
+                    'benchmark': 'render',
+                    'employees': employees,
+                    'start_month': start_month,
+                    'conditional': conditional,
+                    'analytics': analytics,
+                    'seconds': round(seconds, 3),
+                    'same_cells': same_cells,
+                    'same_as_plain': cells == plain if analytics else None,
+                })
+                plain = cells
+    return results
+
+
+def bench_save(employee_counts, levels=(0, 1, 6, 9), periods=3, year=2026, backend='xml', repeat=3):
+    """Сохранение книги с разным сжатием: в файл и в память (create_excel_bytes)"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for employees in employee_counts:
+            roster = _suite_roster(employees, periods, year)
+            for level in levels:
+                def generator():
+                    return graf.VacationScheduleGenerator('ООО Замер', backend=backend, year=year,
+                                                          max_employees=employees, vacation_pairs=periods,
+                                                          employees=roster, compresslevel=level)
+                
+                path = os.path.join(directory, f'save_{employees}_{level}.xlsx')
+                with contextlib.redirect_stdout(io.StringIO()):
+                    file_seconds = _timed(lambda: generator().create_excel_file(path), repeat)
+                    memory_seconds = _timed(lambda: generator().create_excel_bytes(), repeat)
+                    data = generator().create_excel_bytes()
+                results.append({
+                    'benchmark': 'save',
+                    'employees': employees,
+                    'compresslevel': level,
+                    'file_seconds': round(file_seconds, 3),
+                    'memory_seconds': round(memory_seconds, 3),
+                    'file_kb': round(len(data) / 1024),
+                    'same_parts': _package_parts(path) == _package_parts(io.BytesIO(data)),
+                })
+    return results
+
+
+def bench_startup(repeat=20, target_ms=100):
+    """Время запуска команд в новом процессе интерпретатора (медиана и лучшее из repeat, мс)
+    
+    Запускаемый скрипт компилируется при каждом запуске - для graf.py это около 0.1 сек,
+    поэтому цель --target-ms проверяется для небольшого production_calendar.py и для
+    python -m graf calendar. Импортируемые модули берут байт-код из __pycache__ (он
+    создается здесь заранее, даже при PYTHONDONTWRITEBYTECODE). Команды calendar,
+    validate и extract не должны импортировать openpyxl.
+    """
+    directory = os.path.dirname(os.path.abspath(graf.__file__))
+    calendar_script = os.path.join(directory, 'production_calendar.py')
+    for module_file in (graf.__file__, calendar_script):
+        py_compile.compile(module_file, cfile=importlib.util.cache_from_source(module_file))
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        schedule = os.path.join(temp_dir, 'отдел.xlsx')
+        with contextlib.redirect_stdout(io.StringIO()):
+            graf.VacationScheduleGenerator('ООО Замер').create_excel_file(schedule)
+        commands = [
+            ('python', ['-c', 'pass'], False),
+            ('import graf', ['-c', 'import graf'], False),
+            ('production_calendar.py', [calendar_script, '2026'], True),
+            ('-m graf calendar', ['-m', 'graf', 'calendar', '2026'], True),
+            ('graf.py calendar', [graf.__file__, 'calendar', '2026'], False),
+            ('-m graf validate', ['-m', 'graf', 'validate', schedule], False),
+            ('-m graf extract', ['-m', 'graf', 'extract', schedule, '--output', os.path.join(temp_dir, 'п.csv')], False),
+        ]
+        for label, arguments, checked in commands:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, *arguments], cwd=directory, stdout=subprocess.DEVNULL, check=False)
+                timings.append((time.perf_counter() - start) * 1000)
+            modules = subprocess.run([sys.executable, '-X', 'importtime', *arguments], cwd=directory,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+            timings.sort()
+            results.append({
+                'benchmark': 'startup',
+                'command': label,
+                'median_ms': round(timings[len(timings) // 2], 1),
+                'best_ms': round(timings[0], 1),
+                'openpyxl': bool(re.search(r'\| +openpyxl$', modules, re.M)),
+                'target_ms': target_ms if checked else None,
+                'ok': timings[len(timings) // 2] < target_ms if checked else None,
+            })
+    return results
+
+
+async def _service_request(port, body):
+    """Один запрос POST /schedule: (статус, размер книги, время ответа)"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"POST /schedule HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), len(payload), time.perf_counter() - start
+
+
+def bench_service(request_counts, distinct=10, employees=20, workers=4, year=2026):
+    """Сервис генерации: request_count одновременных запросов по distinct разным спискам сотрудников
+    
+    Каждый разный запрос должен строиться один раз, остальные ждут его или берут книгу из кэша.
+    """
+    bodies = []
+    for number in range(distinct):
+        roster = [{'name': employee['name'], 'periods': [[start.isoformat(), end.isoformat()]
+                                                         for start, end in employee['periods']]}
+                  for employee in _suite_roster(employees, 3, year, seed=number + 1)]
+        bodies.append(json.dumps({'company': 'ООО Замер', 'department': f'Отдел {number + 1}', 'year': year,
+                                  'vacation_pairs': 3, 'employees': roster}, ensure_ascii=False).encode('utf-8'))
+    
+    async def run(request_count):
+        with tempfile.TemporaryDirectory() as directory:
+            service = graf.ScheduleService(workers=workers, cache_dir=directory)
+            await service.start(port=0)
+            try:
+                start = time.perf_counter()
+                responses = await asyncio.gather(*(_service_request(service.port, bodies[number % distinct])
+                                                   for number in range(request_count)))
+                seconds = time.perf_counter() - start
+            finally:
+                await service.close()
+        latencies = sorted(latency for _, _, latency in responses)
+        return {
+            'benchmark': 'service',
+            'requests': request_count,
+            'distinct': distinct,
+            'workers': workers,
+            'seconds': round(seconds, 3),
+            'requests_per_second': round(request_count / seconds, 1),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+            'builds': service.counters['builds'],
+            'joined': service.counters['joined'],
+            'cache_hits': service.counters['cache_hits'],
+            'all_ok': all(status == 200 and size for status, size, _ in responses),
+        }
+    
+    return [asyncio.run(run(request_count)) for request_count in request_counts]
+
+
+SUITE_KEYS = ('benchmark', 'employees', 'periods', 'year', 'streaming')
+SUITE_METRICS = ('seconds', 'peak_mb', 'file_kb', 'formulas', 'build_seconds')
+
+
+def compare_suite(results, baseline, threshold=0.15):
+    """Сравнение с сохраненным набором: строки (замер, метрика, было, стало, изменение, регрессия)
+    
+    Регрессия - рост метрики больше чем на threshold (время, память, размер,
+    число формул) или падение скорости поиска в календаре.
+    """
+    def key(result):
+        return tuple(result.get(name) for name in SUITE_KEYS)
+    
+    previous = {key(result): result for result in baseline['results']}
+    rows = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        label = " ".join(f"{name}={result[name]}" for name in SUITE_KEYS if result.get(name) is not None)
+        for metric in SUITE_METRICS + ('day_code_per_second', 'working_days_per_second'):
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = after / before - 1
+            higher_is_better = metric.endswith('_per_second')
+            regression = -change > threshold if higher_is_better else change > threshold
+            rows.append({'case': label, 'metric': metric, 'before': before, 'after': after,
+                         'change': f"{change:+.0%}", 'regression': regression})
+    return rows
+
+
+def _print_table(results):
+    # Отдельная таблица на каждый набор колонок (в наборе suite - по виду замера)
+    tables = {}
+    for result in results:
+        tables.setdefault(tuple(result.keys()), []).append(result)
+    for number, (columns, rows) in enumerate(tables.items()):
+        if number:
+            print()
+        print(" | ".join(columns))
+        for result in rows:
+            print(" | ".join(str(result[column]) for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности генератора графика отпусков")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    styles_parser = subparsers.add_parser("styles", help="оформление ячеек: объекты на ячейку и реестр стилей")
+    styles_parser.add_argument("--employees", type=int, nargs="+", default=[20, 500, 2000])
+    styles_parser.add_argument("--repeat", type=int, default=3)
+    
+    matrix_parser = subparsers.add_parser("matrix", help="подсчет дней отпуска: обход по дням и NumPy")
+    matrix_parser.add_argument("--employees", type=int, nargs="+", default=[1000, 50000])
+    matrix_parser.add_argument("--repeat", type=int, default=3)
+    
+    recalc_parser = subparsers.add_parser("recalc", help="пересчет формул дней отпуска (нужен pycel)")
+    recalc_parser.add_argument("--employees", type=int, nargs="+", default=[20, 200])
+    recalc_parser.add_argument("--repeat", type=int, default=3)
+    
+    batch_parser = subparsers.add_parser("batch", help="пакетная генерация по отделам в пуле процессов")
+    batch_parser.add_argument("--departments", type=int, default=24)
+    batch_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    batch_parser.add_argument("--employees", type=int, default=20)
+    
+    import_parser = subparsers.add_parser("import", help="импорт выгрузки HR из CSV: время и пик памяти")
+    import_parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    import_parser.add_argument("--departments", type=int, default=50)
+    
+    extract_parser = subparsers.add_parser("extract", help="чтение заполненных графиков: load_workbook и разбор XML")
+    extract_parser.add_argument("--files", type=int, default=200)
+    extract_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    extract_parser.add_argument("--employees", type=int, default=20)
+    
+    analytics_parser = subparsers.add_parser("analytics", help="аналитика отпусков: пересечения и покрытие")
+    analytics_parser.add_argument("--employees", type=int, nargs="+", default=[1000, 50000])
+    analytics_parser.add_argument("--team-size", type=int, default=25)
+    analytics_parser.add_argument("--repeat", type=int, default=3)
+    
+    validate_parser = subparsers.add_parser("validate", help="проверка правил отпусков по ТК РФ")
+    validate_parser.add_argument("--employees", type=int, nargs="+", default=[1000, 50000])
+    validate_parser.add_argument("--repeat", type=int, default=3)
+    
+    summary_parser = subparsers.add_parser("summary", help="сводка отпусков по месяцам и кварталам")
+    summary_parser.add_argument("--employees", type=int, nargs="+", default=[1000, 50000])
+    summary_parser.add_argument("--repeat", type=int, default=3)
+    
+    suite_parser = subparsers.add_parser("suite", help="набор замеров: построение, заполнение ГРАФИК, календарь")
+    suite_parser.add_argument("--employees", type=int, nargs="+", default=[20, 500, 5000])
+    suite_parser.add_argument("--periods", type=int, nargs="+", default=[10], help="периодов отпуска у сотрудника")
+    suite_parser.add_argument("--years", type=int, nargs="+", default=[2026])
+    suite_parser.add_argument("--streaming", action="store_true", help="потоковая запись книги")
+    suite_parser.add_argument("--repeat", type=int, default=3, help="лучшее время из N запусков")
+    suite_parser.add_argument("--no-memory", action="store_true", help="без замера пика памяти (вдвое быстрее)")
+    suite_parser.add_argument("--output", default=None, help="сохранить результаты с версиями в JSON")
+    suite_parser.add_argument("--compare", default=None, help="JSON прошлого запуска suite для сравнения")
+    suite_parser.add_argument("--threshold", type=float, default=0.15, help="допустимый рост метрики (0.15 - 15%%)")
+    
+    writer_parser = subparsers.add_parser("writer", help="прямая запись XML листов и ее совпадение с openpyxl")
+    writer_parser.add_argument("--employees", type=int, nargs="+", default=[20, 500, 2000])
+    writer_parser.add_argument("--periods", type=int, default=3, help="периодов отпуска у сотрудника")
+    writer_parser.add_argument("--orientation", choices=graf.ScheduleLayout.ORIENTATIONS, default='blocks')
+    writer_parser.add_argument("--conditional", action="store_true", help="цвета ГРАФИК условным форматированием")
+    writer_parser.add_argument("--repeat", type=int, default=3, help="лучшее время из N запусков")
+    
+    save_parser = subparsers.add_parser("save", help="сохранение книги: уровни сжатия, файл и память")
+    save_parser.add_argument("--employees", type=int, nargs="+", default=[500, 2000])
+    save_parser.add_argument("--levels", type=int, nargs="+", default=[0, 1, 6, 9], help="уровни сжатия 0-9")
+    save_parser.add_argument("--backend", choices=graf.VacationScheduleGenerator.BACKENDS, default='xml')
+    save_parser.add_argument("--repeat", type=int, default=3, help="лучшее время из N запусков")
+    
+    render_parser = subparsers.add_parser("render", help="заполнение ГРАФИК: совпадение с построенной книгой")
+    render_parser.add_argument("--employees", type=int, nargs="+", default=[20, 200])
+    render_parser.add_argument("--start-months", type=int, nargs="+", default=[1, 4],
+                               help="месяцы начала графика (12 месяцев)")
+    render_parser.add_argument("--periods", type=int, default=3, help="периодов отпуска у сотрудника")
+    render_parser.add_argument("--repeat", type=int, default=3, help="лучшее время из N запусков")
+    
+    startup_parser = subparsers.add_parser("startup", help="время запуска команд и импорт openpyxl")
+    startup_parser.add_argument("--repeat", type=int, default=20, help="запусков каждой команды")
+    startup_parser.add_argument("--target-ms", type=float, default=100, help="цель для calendar, мс")
+    
+    service_parser = subparsers.add_parser("service", help="HTTP сервис: одновременные запросы и склейка одинаковых")
+    service_parser.add_argument("--requests", type=int, nargs="+", default=[100, 500])
+    service_parser.add_argument("--distinct", type=int, default=10, help="разных списков сотрудников среди запросов")
+    service_parser.add_argument("--employees", type=int, default=20)
+    service_parser.add_argument("--workers", type=int, default=4)
+    
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--json", action="store_true", help="вывести результаты в формате JSON")
+    
+    args = parser.parse_args()
+    
+    if args.command == "styles":
+        results = bench_styles(args.employees, repeat=args.repeat)
+    elif args.command == "matrix":
+        results = bench_matrix(args.employees, repeat=args.repeat)
+    elif args.command == "recalc":
+        results = bench_recalc(args.employees, repeat=args.repeat)
+    elif args.command == "batch":
+        results = bench_batch(args.departments, args.workers, employees=args.employees)
+    elif args.command == "import":
+        results = bench_import(args.rows, departments=args.departments)
+    elif args.command == "extract":
+        results = bench_extract(args.files, args.workers, employees=args.employees)
+    elif args.command == "analytics":
+        results = bench_analytics(args.employees, team_size=args.team_size, repeat=args.repeat)
+    elif args.command == "validate":
+        results = bench_validate(args.employees, repeat=args.repeat)
+    elif args.command == "summary":
+        results = bench_summary(args.employees, repeat=args.repeat)
+    elif args.command == "writer":
+        results = bench_writer(args.employees, periods=args.periods, orientation=args.orientation,
+                               conditional=args.conditional, repeat=args.repeat)
+    elif args.command == "save":
+        results = bench_save(args.employees, levels=args.levels, backend=args.backend, repeat=args.repeat)
+    elif args.command == "render":
+        results = bench_render(args.employees, start_months=args.start_months, periods=args.periods,
+                               repeat=args.repeat)
+    elif args.command == "startup":
+        results = bench_startup(args.repeat, target_ms=args.target_ms)
+    elif args.command == "service":
+        results = bench_service(args.requests, distinct=args.distinct, employees=args.employees,
+                                workers=args.workers)
+    elif args.command == "suite":
+        results = bench_suite(args.employees, args.periods, args.years, streaming=args.streaming,
+                              repeat=args.repeat, memory=not args.no_memory)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'environment': _suite_environment(), 'results': results}, f, ensure_ascii=False, indent=2)
+    
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        _print_table(results)
+    
+    if args.command == "suite" and args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_suite(results, baseline, args.threshold)
+        print(f"\nСравнение с {args.compare} (ревизия {baseline['environment'].get('git_revision')}):")
+        _print_table(rows)
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+    if args.command == "writer" and not all(row['same_bytes'] for row in results):
+        sys.exit(1)
+    if args.command == "render" and not all(row['same_cells'] and row['same_as_plain'] is not False
+                                            for row in results):
+        sys.exit(1)
+    if args.command == "startup" and not all(row['ok'] is not False for row in results):
+        sys.exit(1)
+    if args.command == "service" and not all(row['all_ok'] and row['builds'] == row['distinct'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -40,105 +40,1002 @@
 ИСПРАВЛЕНИЕ 3: Добавлена кнопка на лист СОТРУДНИКИ для запуска макроса.
 
 ИСПРАВЛЕНИЕ 4: Более контрастные цвета для разграничения дней и защита ячеек (без пароля).
+
+ИСПРАВЛЕНИЕ 5: Производственный календарь хранится компактно (массив кодов типов дней
+и битовая карта сокращенных дней), get_day_info работает за O(1), добавлены запросы
+по диапазону дат (количество рабочих дней, праздники в диапазоне).
+
+ИСПРАВЛЕНИЕ 6: Потоковый режим VacationScheduleGenerator(streaming=True): листы
+СОТРУДНИКИ, ГРАФИК и ДАТЫ записываются построчно через write-only листы с заранее
+зарегистрированными именованными стилями. Результат совпадает с обычным режимом.
+
+ИСПРАВЛЕНИЕ 7: Реестр стилей StyleRegistry - каждый стиль создается один раз и
+назначается ячейкам по ссылке (в том числе на целые диапазоны). Замер стоимости
+оформления ячеек: python bench_graf.py styles
+
+ИСПРАВЛЕНИЕ 8: Раскладка листа СОТРУДНИКИ задается классом ScheduleLayout
+(max_employees, vacation_pairs, orientation='blocks' или 'rows'). Раскладка 'rows'
+(один сотрудник - группа строк) снимает ограничение по числу колонок Excel.
+Константы положения ячеек в VBA макросе генерируются из той же раскладки,
+DAYS_IN_MONTHS строится по году календаря (в 2026 году в феврале 28 дней).
+
+ИСПРАВЛЕНИЕ 9: Лист ГРАФИК можно заполнить без Excel и макроса:
+python graf.py render файл1.xlsx [файл2.xlsx ...]
+ScheduleRenderer определяет раскладку листа СОТРУДНИКИ, собирает дни отпуска
+каждого сотрудника в битовую карту по дням года и записывает ГРАФИК за один проход.
+
+ИСПРАВЛЕНИЕ 10: VacationMatrix - расчет занятости на NumPy для аналитики по большим
+спискам сотрудников: матрица сотрудники × дни, итоги без праздников, итоги по месяцам.
+NumPy необязателен и нужен только для этого класса. Замер: python bench_graf.py matrix
+
+ИСПРАВЛЕНИЕ 11: Вариант макроса через массивы (vacation_macro_bulk.txt):
+СОТРУДНИКИ читается одним обращением к листу, значения ГРАФИК собираются в памяти
+и записываются одним присваиванием Range.Value2, цвета месяцев восстанавливаются
+диапазонами, дни отпуска оформляются пачками непрерывных диапазонов через Union.
+
+ИСПРАВЛЕНИЕ 12: Режим VacationScheduleGenerator(conditional_formatting=True): цвета
+области данных ГРАФИК (отпуск, праздники, выходные, чередование месяцев, рамка)
+задаются пятью правилами условного форматирования по листу ДАТЫ (строка 2 - тип дня).
+Ячейки дней в файле не создаются, макрос в этом режиме записывает только значения.
+
+ИСПРАВЛЕНИЕ 13: Формулы дней отпуска больше не используют COUNTIFS по всей колонке
+ПРАЗДНИКИ!$A:$A. На листе ДАТЫ строка 2 - тип дня, строка 3 - накопленное число
+праздников; праздники в периоде считаются разностью двух значений INDEX.
+Замер пересчета: python bench_graf.py recalc (нужен pycel)
+
+ИСПРАВЛЕНИЕ 14: Производственный календарь читается из calendar_rules.json (праздники,
+переносы и сокращенные дни по годам) и кэшируется на диске ($GRAF_CACHE_DIR или
+~/.cache/graf). Для лет без данных в файле переносы рассчитываются по ТК РФ с
+предупреждением. График может начинаться с любого месяца и охватывать несколько
+лет: VacationScheduleGenerator(..., start_date=date(2026, 7, 1), months=18)
+
+ИСПРАВЛЕНИЕ 15: Пакетная генерация без диалога: python graf.py batch манифест.json
+[--workers N] [--timeout СЕК]. Графики отделов из JSON манифеста (параметры и списки
+сотрудников) строятся в пуле процессов, имена файлов не зависят от времени запуска,
+итоги записываются в batch_report.json. Замер: python bench_graf.py batch
+
+ИСПРАВЛЕНИЕ 16: Заготовки книг (TemplateCache). Книга без сотрудников и названия
+компании строится один раз на период и раскладку и хранится в кэше; книга отдела
+собирается из нее заменой в XML только ячеек ФИО, дат отпусков и подписи ГРАФИК.
+Пакетная генерация использует заготовки по умолчанию (--no-template - без них)
+
+ИСПРАВЛЕНИЕ 17: Инкрементальное обновление ГРАФИК. На скрытом листе ОТПЕЧАТКИ для
+каждого сотрудника хранятся отпечаток ФИО и периодов и строка ГРАФИК. Обработчик
+Worksheet_Change (vacation_sheet_module.txt) вызывает ОбновитьИзменения и перерисовывает
+только строки измененных сотрудников; если ФИО добавлено или удалено - полное
+построение. То же в Python: python graf.py render --incremental файл.xlsx
+
+ИСПРАВЛЕНИЕ 18: Импорт списка сотрудников из выгрузки HR (CSV, JSON Lines, XLSX) -
+RosterImporter. Файл читается построчно, в памяти только сотрудники выбранного
+отдела; даты проверяются по производственному календарю графика, ошибочные строки
+пропускаются с замечанием. python graf.py import выгрузка.csv --department ОТДЕЛ,
+в манифесте пакетной генерации - "roster": "выгрузка.xlsx", "roster_department"
+(без max_employees мест на листе и макрос - по числу сотрудников выгрузки).
+
+ИСПРАВЛЕНИЕ 19: Чтение заполненных графиков обратно в данные - ScheduleReader. Листы
+СОТРУДНИКИ, ГРАФИК и ДАТЫ разбираются из XML без load_workbook (в 4-5 раз быстрее),
+для каждого сотрудника - периоды и совпадает ли с ними ГРАФИК. Каталог с книгами
+читается в пуле процессов: python graf.py extract каталог --output периоды.csv
+(CSV подходит для python graf.py import). Замер: python bench_graf.py extract
+
+ИСПРАВЛЕНИЕ 20: Аналитика отпусков - VacationAnalytics (sweep line без NumPy):
+сотрудники в отпуске по дням, пересечения отпусков внутри команды, рабочие дни с
+нехваткой сотрудников. С analytics=True под ГРАФИК строка "В отпуске" (COUNTIF,
+красная при нехватке по минимуму из АНАЛИТИКА!B5) и лист АНАЛИТИКА, который
+пересчитывает python graf.py render. По многим книгам: python graf.py analyze каталог
+
+ИСПРАВЛЕНИЕ 21: Проверка отпусков по правилам ТК РФ - VacationValidator. Даты периодов,
+конец не раньше начала, границы графика, пересечения периодов сотрудника, за год
+графика не меньше 28 дней и одна часть не меньше 14 дней (праздники не считаются).
+Один проход по накопленным суммам календаря - миллисекунды на тысячи сотрудников.
+С validation=True - лист ПРОВЕРКА (пересчитывает render), по каталогу книг:
+python graf.py validate каталог --output проверка.json (код возврата 1 при ошибках)
+
+ИСПРАВЛЕНИЕ 22: Замеры построения книги - BuildStats. Для каждого листа и сохранения
+время, число ячеек и ячеек с оформлением (generator.build_stats), по желанию профиль
+cProfile или пик памяти tracemalloc: python graf.py import ... --timings замеры.json
+--profile cprofile. В пакетном отчете - этапы каждой книги. Макрос записывает время
+своих этапов на скрытый лист ЖУРНАЛ (последние 5000 строк)
+
+ИСПРАВЛЕНИЕ 23: Набор замеров для сравнения версий: python bench_graf.py suite
+--output замеры.json [--compare прошлые.json] - построение книги и заполнение ГРАФИК
+для 20/500/5000 сотрудников (время, пик памяти, размер файла, число формул) и поиск
+в производственном календаре; рост метрики больше 15% - регрессия (код возврата 1)
+
+ИСПРАВЛЕНИЕ 24: Прямая запись XML листов СОТРУДНИКИ и ГРАФИК - SheetXmlWriter
+(VacationScheduleGenerator(backend='xml'), python graf.py import ... --backend xml).
+Строки листов пишутся в <sheetData> без объектов ячеек openpyxl и вставляются в архив
+после сохранения книги; книга совпадает с потоковой записью openpyxl байт в байт,
+ГРАФИК на 500 сотрудников строится в 20 раз быстрее (python bench_graf.py writer)
+
+ИСПРАВЛЕНИЕ 25: Книга .xlsm с готовым макросом - VbaProjectTemplate. Проект VBA
+(xl/vbaProject.bin) и кодовые имена листов берутся из книги-образца, куда макрос вставлен
+один раз, на лист СОТРУДНИКИ добавляется кнопка, назначенная ОбновитьГрафик:
+VacationScheduleGenerator(vba_project="образец.xlsm"), python graf.py import ...
+--vba-project образец.xlsm, "vba_project" в манифесте пакетной генерации. Заготовки
+TemplateCache хранятся вместе с проектом, render сохраняет макрос в книгах .xlsm.
+Проект с макросом для другой раскладки или периода не вставляется: константы модулей
+(текст читается из vbaProject.bin) сверяются с макросом книги, иначе ValueError
+
+ИСПРАВЛЕНИЕ 26: Сервис генерации - python graf.py serve (ScheduleService на asyncio).
+POST /schedule с JSON (компания, отдел, параметры как в манифесте, "employees") отдает
+книгу частями из файла; книги строятся в пуле процессов, одинаковые запросы ждут одно
+построение, готовые книги кэшируются, при переполнении очереди - ответ 503. Книга не
+передается по мере сжатия архива, как предлагалось: она строится в пуле целиком и
+отдается с диска, иначе готовую книгу нельзя было бы кэшировать и отдавать повторным
+запросам. Мест на листе, периодов и месяцев в запросе - не больше REQUEST_LIMITS
+
+ИСПРАВЛЕНИЕ 27: Книга и макрос пишутся в любой поток (create_excel_file(BytesIO()),
+create_vba_macro_file(поток)), create_excel_bytes() возвращает книгу в памяти. Прямая
+запись XML больше не создает временный файл рядом с книгой. compresslevel (0 - без
+сжатия, 1-9 - уровень deflate) в генераторе, манифесте и python graf.py import
+
+ИСПРАВЛЕНИЕ 28: Быстрый запуск. openpyxl (с ним NumPy) импортируется при первом
+построении или чтении книги (_openpyxl), zipfile, csv, argparse, tempfile,
+ElementTree, asyncio, multiprocessing и профилировщики - в функциях, где нужны;
+накопительные суммы календаря строятся при первом подсчете. calendar, extract, analyze
+и validate работают без openpyxl. Производственный календарь - модуль
+production_calendar.py: python production_calendar.py 2027 [--output дни.csv|.json] -
+дни и норма часов по месяцам без разбора graf.py (то же - python graf.py calendar)
+
+ИСПРАВЛЕНИЕ 29: Лист СВОДКА - VacationSummary (summary=True, python graf.py import ...
+--summary, "summary" в манифесте). Дни отпуска (без праздничных) и рабочие дни отпуска
+каждого сотрудника по месяцам и кварталам, итоги отдела: дни, сотрудники в отпуске и
+наибольшее число отсутствующих за день. Считается в Python по накопленным суммам
+календаря и пишется значениями - без формул; render пересчитывает лист. Свободные места
+"Сотрудник N" без дат в сводку не входят (assigned_employees, как в аналитике и проверке)
 """
 
 import os
+import io
+import sys
+import time
+import json
+import contextlib
+import functools
+import types
+import collections
+import pickle
+import hashlib
+import heapq
+import bisect
+import itertools
 import datetime
+import re
+import math
+import struct
+from array import array
+from copy import copy
 from datetime import timedelta
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
-from openpyxl.utils import get_column_letter
 import calendar
 
-class WorkDay:
-    def __init__(self, date, day_type, is_short=False):
-        self.date = date
-        self.day_type = day_type  # 'рабочий', 'выходной', 'праздник'
-        self.is_short = is_short  # Сокращенный день
-
-class ProductionCalendar:
-    def __init__(self, year=2026):
-        self.year = year
-        self.days = []
-        self._generate_calendar()
-    
-    def _generate_calendar(self):
-        """Генерация производственного календаря на 2026 год в России (ОФИЦИАЛЬНЫЙ)"""
-        date = datetime.date(self.year, 1, 1)
-        
-        holidays = [
-            datetime.date(self.year, 1, 1),
-            datetime.date(self.year, 1, 2),
-            datetime.date(self.year, 1, 3),
-            datetime.date(self.year, 1, 4),
-            datetime.date(self.year, 1, 5),
-            datetime.date(self.year, 1, 6),
-            datetime.date(self.year, 1, 7),
-            datetime.date(self.year, 1, 8),
-            datetime.date(self.year, 2, 23),
-            datetime.date(self.year, 3, 8),
-            datetime.date(self.year, 5, 1),
-            datetime.date(self.year, 5, 9),
-            datetime.date(self.year, 6, 12),
-            datetime.date(self.year, 11, 4),
-        ]
+from production_calendar import (DAY_WORKING, DAY_WEEKEND, DAY_HOLIDAY, DAY_TYPE_NAMES, MONTH_NAMES_GENITIVE,
+                                 CALENDAR_RULES_FILE, WorkDay, CalendarRules, ProductionCalendar,
+                                 default_cache_dir, period_bounds, calendar_main)
+
+
+def xml_escape(text, entities=None):
+    """&, <, > и entities в тексте XML - как xml.sax.saxutils.escape, который импортирует urllib.request"""
+    text = text.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+    for key, value in (entities or {}).items():
+        text = text.replace(key, value)
+    return text
+
+
+@functools.lru_cache(maxsize=None)
+def _openpyxl():
+    """Классы и функции openpyxl, которые нужны генератору (импорт при первом обращении)
+    
+    Вместе с openpyxl загружается и NumPy (около 0.2 сек на запуск), поэтому
+    команды без книг openpyxl (calendar, extract, analyze, validate) его не
+    импортируют. Код, работающий с книгами, берет имена из пространства имен:
+    xl = _openpyxl(), затем xl.Workbook(), xl.get_column_letter(...).
+    """
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.cell import Cell
+    from openpyxl.cell._writer import etree_write_cell
+    from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+    from openpyxl.compat import safe_string
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import PatternFill, Font, Border, Side, Alignment, NamedStyle
+    from openpyxl.styles.borders import DEFAULT_BORDER
+    from openpyxl.styles.fonts import DEFAULT_FONT
+    from openpyxl.styles.numbers import is_date_format
+    from openpyxl.utils import get_column_letter
+    from openpyxl.utils.datetime import to_excel
+    from openpyxl.xml.functions import xmlfile
+    from openpyxl.worksheet.cell_range import CellRange
+    from openpyxl.worksheet.worksheet import Worksheet
+    from openpyxl.writer.excel import ExcelWriter
+    return types.SimpleNamespace(
+        Workbook=Workbook, load_workbook=load_workbook, Cell=Cell, etree_write_cell=etree_write_cell,
+        ERROR_CODES=ERROR_CODES, ILLEGAL_CHARACTERS_RE=ILLEGAL_CHARACTERS_RE, safe_string=safe_string,
+        FormulaRule=FormulaRule, PatternFill=PatternFill, Font=Font, Border=Border, Side=Side,
+        Alignment=Alignment, NamedStyle=NamedStyle, DEFAULT_BORDER=DEFAULT_BORDER, DEFAULT_FONT=DEFAULT_FONT,
+        is_date_format=is_date_format, get_column_letter=get_column_letter, to_excel=to_excel, xmlfile=xmlfile,
+        CellRange=CellRange, Worksheet=Worksheet, ExcelWriter=ExcelWriter,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _load_numpy():
+    """Модуль NumPy, импортируется при первом использовании VacationMatrix (None - NumPy не установлен)"""
+    try:
+        import numpy
+    except ImportError:  # NumPy нужен только для VacationMatrix
+        return None
+    return numpy
+
+# Служебный лист с отпечатками сотрудников для инкрементального обновления ГРАФИК
+FINGERPRINT_SHEET = "ОТПЕЧАТКИ"
+FINGERPRINT_VERSION = "v1:"
+
+# Скрытый лист, куда макрос пишет время этапов каждого запуска, и сколько строк в нем хранить
+TIMING_SHEET = "ЖУРНАЛ"
+TIMING_LOG_LIMIT = 5000
+
+# Лист аналитики (VacationScheduleGenerator(analytics=True)) и ячейка минимума сотрудников на работе
+ANALYTICS_SHEET = "АНАЛИТИКА"
+ANALYTICS_MIN_CELL = "B5"
+
+# Лист проверки отпусков (VacationScheduleGenerator(validation=True)) и ячейки правил:
+# дней отпуска за год графика, минимальная длина одной части
+VALIDATION_SHEET = "ПРОВЕРКА"
+VALIDATION_RULE_CELLS = ("B4", "B5")
+
+# Лист сводки отпусков по месяцам и кварталам (VacationScheduleGenerator(summary=True))
+SUMMARY_SHEET = "СВОДКА"
+
+# Начало отсчета дат Excel (порядковый номер 1 - 01.01.1900)
+EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+
+def employee_fingerprint(name, periods):
+    """Отпечаток сотрудника: ФИО и допустимые периоды отпуска (номера дат Excel)
+    
+    Тот же текст строит макрос (ОтпечатокСотрудника), поэтому отпечатки, записанные
+    ScheduleRenderer, понимает обработчик изменений листа СОТРУДНИКИ и наоборот.
+    """
+    return FINGERPRINT_VERSION + name + "".join(
+        f"|{(start - EXCEL_EPOCH).days}-{(end - EXCEL_EPOCH).days}" for start, end in periods
+    )
+
+
+class StyleRegistry:
+    """Реестр стилей книги: каждый уникальный стиль создается один раз
+    
+    Стили описываются по имени и регистрируются в книге как NamedStyle.
+    Ячейкам назначается готовый массив индексов стиля, поэтому объекты
+    Font/PatternFill/Border/Alignment не создаются заново для каждой ячейки.
+    Стили, уже сохраненные в загруженной книге, используются повторно.
+    """
+    
+    def __init__(self, wb):
+        xl = _openpyxl()
+        self.wb = wb
+        self._arrays = {}
+        for name, params in self._definitions().items():
+            if name in wb.named_styles:
+                self._arrays[name] = wb._named_styles[name].as_tuple()
+                continue
+            params.setdefault('font', xl.DEFAULT_FONT)
+            params.setdefault('border', xl.DEFAULT_BORDER)
+            params.setdefault('number_format', 'General')
+            named_style = xl.NamedStyle(name=name, **params)
+            wb.add_named_style(named_style)
+            self._arrays[name] = named_style.as_tuple()
+    
+    @staticmethod
+    def _definitions():
+        """Описание всех стилей листов СОТРУДНИКИ, ГРАФИК и ДАТЫ"""
+        xl = _openpyxl()
+        black_side = xl.Side(style='thin', color="000000")
+        black_border = xl.Border(left=black_side, right=black_side, top=black_side, bottom=black_side)
+        thin_side = xl.Side(style='thin')
+        grid_border = xl.Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
         
-        extra_holidays = [
-            datetime.date(self.year, 1, 9),
-            datetime.date(self.year, 3, 9),
-            datetime.date(self.year, 5, 11),
-            datetime.date(self.year, 12, 31),
-        ]
+        center = xl.Alignment(horizontal="center", vertical="center")
+        left = xl.Alignment(horizontal="left", vertical="center")
+        
+        def solid(color):
+            return xl.PatternFill(start_color=color, end_color=color, fill_type="solid")
+        
+        definitions = {
+            'сотр_заголовок': dict(font=xl.Font(bold=True, size=11, color="FFFFFF"), fill=solid("4472C4"),
+                                   alignment=center, border=black_border),
+            'сотр_рамка': dict(border=black_border),
+            'сотр_номер': dict(font=xl.Font(size=10), alignment=center, border=black_border),
+            'сотр_фио': dict(font=xl.Font(bold=True, size=10), fill=solid("D9E1F2"),
+                             alignment=left, border=black_border),
+            'сотр_итого': dict(font=xl.Font(bold=True, size=10), fill=solid("E2EFDA"),
+                               alignment=center, border=black_border, number_format='0'),
+            'сотр_дни': dict(font=xl.Font(size=10), alignment=center, border=black_border, number_format='0'),
+            'сотр_дата': dict(font=xl.Font(size=10), alignment=center, border=black_border,
+                              number_format='DD.MM.YYYY'),
+            'сотр_продолжение': dict(font=xl.Font(size=9, italic=True, color="666666"),
+                                     alignment=center, border=black_border),
+            'кнопка': dict(font=xl.Font(bold=True, size=12, color="FFFFFF"), fill=solid("4472C4"),
+                           alignment=center),
+            'кнопка_шаг': dict(font=xl.Font(size=9), alignment=xl.Alignment(horizontal="center")),
+            'кнопка_подсказка': dict(font=xl.Font(size=9, italic=True, color="666666"),
+                                     alignment=xl.Alignment(horizontal="center")),
+            'граф_шапка_номер': dict(font=xl.Font(bold=True), fill=solid("D9E1F2"), alignment=center),
+            'граф_шапка_фио': dict(font=xl.Font(bold=True), fill=solid("D9E1F2"), alignment=left),
+            'граф_номер': dict(font=xl.Font(size=10), alignment=center, border=grid_border),
+            'граф_фио': dict(font=xl.Font(size=10), alignment=left, border=grid_border),
+            'граф_подвал': dict(font=xl.Font(italic=True, size=10, color="666666"),
+                                alignment=xl.Alignment(horizontal="center")),
+            'граф_отпуск': dict(font=xl.Font(name="Arial", bold=True, size=9), fill=solid("C6EFCE"),
+                                alignment=center, border=grid_border),
+            'граф_колонка': dict(alignment=center),
+            'даты_дата': dict(number_format='DD.MM.YYYY'),
+            # Строка "В отпуске" под ГРАФИК (нули не показываются), листы АНАЛИТИКА и ПРОВЕРКА
+            'граф_покрытие_подпись': dict(font=xl.Font(bold=True, size=9), fill=solid("D9E1F2"), alignment=left),
+            'граф_покрытие': dict(font=xl.Font(size=8), fill=solid("D9E1F2"), alignment=center,
+                                  border=grid_border, number_format='0;-0;;@'),
+            'отчет_заголовок': dict(font=xl.Font(bold=True, size=14)),
+            'отчет_примечание': dict(font=xl.Font(italic=True, size=10, color="666666")),
+            'отчет_раздел': dict(font=xl.Font(bold=True, size=11, color="FFFFFF"), fill=solid("4472C4")),
+            'отчет_шапка': dict(font=xl.Font(bold=True, size=10), fill=solid("D9E1F2"), alignment=center,
+                               border=black_border),
+            'отчет_текст': dict(font=xl.Font(size=10), border=black_border),
+            'отчет_дата': dict(font=xl.Font(size=10), alignment=center, border=black_border,
+                               number_format='DD.MM.YYYY'),
+            'отчет_ошибка': dict(font=xl.Font(size=10), fill=solid("FFC7CE"), border=black_border),
+            'отчет_предупреждение': dict(font=xl.Font(size=10), fill=solid("FFEB9C"), border=black_border),
+        }
+        
+        # КОНТРАСТНЫЕ ЦВЕТА для чередования месяцев: серый и белый
+        for month_idx, color in enumerate(['E6E6E6', 'FFFFFF']):
+            definitions[f'граф_месяц_{month_idx}'] = dict(font=xl.Font(bold=True, size=11), fill=solid(color),
+                                                         alignment=center)
+            definitions[f'граф_ячейка_{month_idx}'] = dict(fill=solid(color), alignment=center,
+                                                          border=grid_border)
+        
+        # КОНТРАСТНЫЕ ЦВЕТА типов дней (индекс - код DAY_*): белый, серый, красный
+        for day_code, color in enumerate(['FFFFFF', 'D9D9D9', 'FF9999']):
+            definitions[f'граф_число_{day_code}'] = dict(font=xl.Font(size=9), fill=solid(color), alignment=center)
+            definitions[f'граф_день_{day_code}'] = dict(font=xl.Font(size=8), fill=solid(color), alignment=center)
+        
+        return definitions
+    
+    def __getitem__(self, name):
+        """Массив индексов стиля для передачи в конструктор ячейки"""
+        return self._arrays[name]
+    
+    def apply(self, cell, name):
+        """Назначить стиль ячейке по ссылке"""
+        # Копия нужна, чтобы последующее изменение формата ячейки
+        # не затронуло другие ячейки с тем же стилем
+        cell._style = copy(self._arrays[name])
+        return cell
+    
+    def apply_range(self, ws, min_row, min_col, max_row, max_col, name):
+        """Назначить стиль всем ячейкам прямоугольного диапазона"""
+        style_array = self._arrays[name]
+        for row in ws.iter_rows(min_row=min_row, min_col=min_col, max_row=max_row, max_col=max_col):
+            for cell in row:
+                cell._style = copy(style_array)
+
+class ScheduleLayout:
+    """Расположение данных на листах СОТРУДНИКИ и ГРАФИК
+    
+    Все позиции ячеек сотрудника вычисляются линейно от его номера, одни и те же
+    параметры используются в Python, в формулах и в константах VBA макроса.
+    
+    orientation='blocks' - блок из 4 колонок на сотрудника (ФИО, дни, начало, конец),
+    orientation='rows' - таблица, одна строка на период отпуска (для больших отделов).
+    """
+    ORIENTATIONS = ('blocks', 'rows')
+    BLOCK_COLS = 4
+    
+    # Ограничения листа Excel
+    MAX_COLUMNS = 16384
+    MAX_ROWS = 1048576
+    
+    # Первая строка сотрудников на листе ГРАФИК
+    SCHEDULE_FIRST_ROW = 5
+    
+    def __init__(self, max_employees=20, vacation_pairs=10, orientation='blocks'):
+        if orientation not in self.ORIENTATIONS:
+            raise ValueError(f"Неизвестная раскладка: {orientation!r} (допустимо: {', '.join(self.ORIENTATIONS)})")
+        if max_employees < 1 or vacation_pairs < 1:
+            raise ValueError("Количество сотрудников и периодов отпуска должно быть положительным")
         
-        all_holidays = holidays + extra_holidays
+        self.max_employees = max_employees
+        self.vacation_pairs = vacation_pairs
+        self.orientation = orientation
         
-        pre_holidays = [
-            datetime.date(self.year, 2, 20),
-            datetime.date(self.year, 4, 30),
-            datetime.date(self.year, 5, 8),
-            datetime.date(self.year, 6, 11),
-            datetime.date(self.year, 11, 3),
+        if orientation == 'blocks':
+            self.name_row = 3
+            self.name_col = 1
+            self.emp_row_step = 0
+            self.emp_col_step = self.BLOCK_COLS
+            self.first_period_row = 4
+            self.first_start_col = 3
+        else:
+            self.name_row = 2
+            self.name_col = 2
+            self.emp_row_step = vacation_pairs
+            self.emp_col_step = 0
+            self.first_period_row = 2
+            self.first_start_col = 5
+        
+        if self.button_col + 2 > self.MAX_COLUMNS:
+            raise ValueError(
+                f"{max_employees} сотрудников не помещаются в {self.MAX_COLUMNS} колонок листа Excel, "
+                f"используйте orientation='rows'"
+            )
+        if max(self.last_row, self.schedule_footer_row) > self.MAX_ROWS:
+            raise ValueError(f"{max_employees} сотрудников не помещаются в {self.MAX_ROWS} строк листа Excel")
+    
+    @classmethod
+    def from_sheet(cls, ws):
+        """Определение раскладки по заполненному листу СОТРУДНИКИ"""
+        return cls.from_rows(ws.iter_rows(values_only=True))
+    
+    @classmethod
+    def from_rows(cls, rows):
+        """Определение раскладки по значениям листа СОТРУДНИКИ (кортежи строк с первой)"""
+        rows = iter(rows)
+        header = next(rows, ())
+        if header and header[0] == "№":
+            numbers = 0
+            period_rows = 0
+            for row in rows:
+                number = row[0] if row else None
+                days = row[3] if len(row) > 3 else None
+                if isinstance(number, int):
+                    numbers += 1
+                if days not in (None, ""):
+                    period_rows += 1
+            if not numbers:
+                raise ValueError("На листе СОТРУДНИКИ не найдено ни одного сотрудника")
+            return cls(numbers, period_rows // numbers, 'rows')
+        
+        employees = 0
+        for col in range(0, len(header), cls.BLOCK_COLS):
+            if header[col] != "ФИО":
+                break
+            employees += 1
+        
+        for row_number, row in enumerate(rows, 2):
+            if row and row[0] == "...":
+                if not employees or row_number <= 4:
+                    break
+                return cls(employees, row_number - 4, 'blocks')
+        raise ValueError("Не удалось определить раскладку листа СОТРУДНИКИ")
+    
+    def name_cell(self, emp_idx):
+        """(строка, колонка) ФИО сотрудника"""
+        return (self.name_row + emp_idx * self.emp_row_step,
+                self.name_col + emp_idx * self.emp_col_step)
+    
+    def total_cell(self, emp_idx):
+        """(строка, колонка) итога дней отпуска сотрудника"""
+        row, col = self.name_cell(emp_idx)
+        return row, col + 1
+    
+    def period_row(self, emp_idx, period_idx):
+        """Строка периода отпуска сотрудника"""
+        return self.first_period_row + emp_idx * self.emp_row_step + period_idx
+    
+    def start_col(self, emp_idx):
+        """Колонка даты начала отпуска (конец - следующая колонка, дни - предыдущая)"""
+        return self.first_start_col + emp_idx * self.emp_col_step
+    
+    @property
+    def last_col(self):
+        """Последняя колонка данных сотрудников"""
+        return self.start_col(self.max_employees - 1) + 1
+    
+    @property
+    def last_row(self):
+        """Последняя строка листа СОТРУДНИКИ"""
+        last_period_row = self.period_row(self.max_employees - 1, self.vacation_pairs - 1)
+        if self.orientation == 'blocks':
+            return last_period_row + 1  # строка с многоточием
+        return last_period_row
+    
+    @property
+    def button_col(self):
+        """Первая колонка места для кнопки запуска макроса"""
+        return self.last_col + 2
+    
+    def schedule_row(self, position):
+        """Строка листа ГРАФИК для сотрудника с порядковым номером position (с 0)"""
+        return self.SCHEDULE_FIRST_ROW + position
+    
+    @property
+    def schedule_coverage_row(self):
+        """Строка "В отпуске" под сотрудниками ГРАФИК (только с аналитикой)"""
+        return self.SCHEDULE_FIRST_ROW + self.max_employees
+    
+    @property
+    def schedule_footer_row(self):
+        return self.SCHEDULE_FIRST_ROW + self.max_employees + 1
+    
+    def vba_constants(self):
+        """Константы расположения данных для VBA макроса"""
+        constants = [
+            ('MAX_EMPLOYEES', self.max_employees),
+            ('MAX_PERIODS', self.vacation_pairs),
+            ('NAME_ROW', self.name_row),
+            ('NAME_COL', self.name_col),
+            ('EMP_ROW_STEP', self.emp_row_step),
+            ('EMP_COL_STEP', self.emp_col_step),
+            ('FIRST_PERIOD_ROW', self.first_period_row),
+            ('FIRST_START_COL', self.first_start_col),
+            ('SCHEDULE_FIRST_ROW', self.SCHEDULE_FIRST_ROW),
         ]
+        lines = [f"' Расположение данных: {self.orientation} (генерируется из ScheduleLayout)"]
+        lines += [f"Public Const {name} As Long = {value}" for name, value in constants]
+        return "\n".join(lines) + "\n"
+
+
+class BuildStats:
+    """Замеры построения книги: время, число ячеек и оформленных ячеек по этапам
+    
+    Этап - лист книги (_create_*_sheet или потоковая запись), сборка из заготовки
+    или сохранение. Замеры собираются всегда: обычное построение они почти не
+    замедляют, потоковое - на несколько процентов (ячейки write-only листа
+    считает генератор при записи строк, см. count_row). profile='cprofile' -
+    профиль cProfile всего построения (в отчете самые затратные функции),
+    profile='tracemalloc' - пик памяти этапов.
+    """
+    PROFILES = ('cprofile', 'tracemalloc')
+    TOP_FUNCTIONS = 25
+    
+    def __init__(self, profile=None):
+        if profile is not None and profile not in self.PROFILES:
+            raise ValueError(f"Неизвестный профилировщик: {profile!r} (допустимо: {', '.join(self.PROFILES)})")
+        self.profile = profile
+        self.stages = []
+        self.total_seconds = None
+        self._profiler = None
+        self._row_counts = None  # [ячейки, оформленные ячейки] строк потокового листа текущего этапа
+    
+    @contextlib.contextmanager
+    def run(self):
+        """Все построение книги: общее время и профилировщик"""
+        import tracemalloc
+        started_tracing = False
+        if self.profile == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        if self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        start_time = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds = time.perf_counter() - start_time
+            if self._profiler is not None:
+                self._profiler.disable()
+            if started_tracing:
+                tracemalloc.stop()
+    
+    @contextlib.contextmanager
+    def stage(self, name, ws=None):
+        """Этап построения; с ws - число ячеек листа и ячеек с оформлением
         
-        while date.year == self.year:
-            day_type = 'рабочий'
-            is_short = False
-            
-            if date in all_holidays:
-                day_type = 'праздник'
-            elif date.weekday() >= 5:
-                day_type = 'выходной'
-            
-            if date in pre_holidays and day_type == 'рабочий':
-                is_short = True
-            
-            self.days.append(WorkDay(date, day_type, is_short))
-            date += timedelta(days=1)
-    
-    def get_day_info(self, date):
-        """Получить информацию о дне"""
-        for day in self.days:
-            if day.date == date:
-                return day
-        return None
+        Write-only лист не хранит ячейки, поэтому на время этапа считаются
+        ячейки строк, которые генератор передает в ws.append (count_row).
+        """
+        xl = _openpyxl()
+        counts = self._row_counts = [0, 0]
+        
+        import tracemalloc
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'stage': name, 'seconds': round(time.perf_counter() - start_time, 4)}
+            self._row_counts = None
+            if ws is not None:
+                if isinstance(ws, xl.Worksheet):
+                    counts = [len(ws._cells), sum(1 for cell in ws._cells.values() if cell.has_style)]
+                elif getattr(ws, 'sheet_xml', None) is not None:
+                    counts = [ws.sheet_xml.cells, ws.sheet_xml.styled_cells]
+                record['cells'], record['styled_cells'] = counts
+            if tracing:
+                record['peak_kb'] = round((tracemalloc.get_traced_memory()[1] - memory_before) / 1024, 1)
+            self.stages.append(record)
     
-    def get_all_holidays(self):
-        """Получить список всех праздничных дней (для листа ПРАЗДНИКИ)"""
-        return [day.date for day in self.days if day.day_type == 'праздник']
+    def count_row(self, values):
+        """Значения строки потокового листа без изменений, по пути считаются ячейки этапа
+        
+        Как write-only лист openpyxl: None - нет ячейки, остальные значения - ячейки.
+        """
+        counts = self._row_counts
+        if counts is None:
+            yield from values
+            return
+        for value in values:
+            if value is not None:
+                counts[0] += 1
+                counts[1] += getattr(value, 'has_style', False)
+            yield value
+    
+    def top_functions(self, limit=None):
+        """Самые затратные функции профиля cProfile (по времени с вложенными вызовами)"""
+        if self._profiler is None:
+            return []
+        import pstats
+        stats = pstats.Stats(self._profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit or self.TOP_FUNCTIONS]
+        return [{'function': f"{os.path.basename(filename)}:{line}({function})", 'calls': calls,
+                 'own_seconds': round(own, 4), 'cumulative_seconds': round(cumulative, 4)}
+                for (filename, line, function), (_, calls, own, cumulative, _) in rows]
+    
+    def report(self):
+        """Замеры для JSON"""
+        report = {
+            'profile': self.profile,
+            'total_seconds': round(self.total_seconds, 4) if self.total_seconds is not None else None,
+            'stages': self.stages,
+        }
+        if self._profiler is not None:
+            report['top_functions'] = self.top_functions()
+        return report
+    
+    def write_json(self, path):
+        """Запись замеров в JSON; с cProfile рядом сохраняется профиль .prof (для snakeviz, pstats)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        if self._profiler is not None:
+            self._profiler.dump_stats(os.path.splitext(path)[0] + ".prof")
+    
+    def print_summary(self):
+        """Таблица этапов: время, доля и ячейки"""
+        total = self.total_seconds or sum(record['seconds'] for record in self.stages) or 1
+        print("  Этапы построения:")
+        for record in self.stages:
+            cells = f", ячеек {record['cells']}" if 'cells' in record else ""
+            memory = f", пик памяти {record['peak_kb']:.0f} КБ" if 'peak_kb' in record else ""
+            print(f"    • {record['stage']}: {record['seconds']:.3f} сек "
+                  f"({record['seconds'] / total:.0%}){cells}{memory}")
+
+
+class SheetXmlWriter:
+    """Прямая запись строк потокового листа в XML без объектов ячеек openpyxl
+    
+    Строки (номер строки, [(колонка, значение, стиль), ...]) из _write_rows
+    сериализуются в <sheetData> так же, как их записал бы write-only лист
+    openpyxl: строки inline (openpyxl не пишет общую таблицу строк, поэтому
+    таблица строк здесь - кэш готовых фрагментов XML повторяющихся текстов),
+    номер стиля берется из таблицы стилей книги при первом использовании,
+    атрибуты строк - из row_dimensions. Значения редких типов (даты со
+    стилем без формата даты, логические, коды ошибок) записываются через
+    ячейку openpyxl. Результат копится во временном файле и вставляется
+    в архив после сохранения книги (insert).
+    """
+    # Строки, которые write-only лист пишет сам при сохранении (только размеры строк)
+    SHEET_DATA_PATTERN = re.compile(rb'<sheetData>.*?</sheetData>|<sheetData */>', re.S)
+    
+    def __init__(self, ws, styles):
+        import tempfile
+        self.ws = ws
+        self.styles = styles
+        self.file = tempfile.TemporaryFile()
+        self.cells = 0
+        self.styled_cells = 0
+        self._style_attrs = {}
+        self._date_styles = {}
+        self._texts = {}
+        self._letters = {}
+    
+    def _style_attr(self, name):
+        """Атрибут s="N" стиля (пустой для стиля по умолчанию)"""
+        try:
+            return self._style_attrs[name]
+        except KeyError:
+            array = self.styles[name]
+            attr = f' s="{self.ws.parent._cell_styles.add(array)}"' if any(array) else ""
+            self._style_attrs[name] = attr
+            return attr
+    
+    def _is_date_style(self, name):
+        """У стиля формат даты (иначе openpyxl сам назначает ячейке с датой формат)"""
+        xl = _openpyxl()
+        if name not in self._date_styles:
+            probe = xl.Cell(self.ws, row=1, column=1, style_array=self.styles[name])
+            self._date_styles[name] = xl.is_date_format(probe.number_format)
+        return self._date_styles[name]
+    
+    def _text(self, value):
+        """Фрагмент XML строки inline"""
+        try:
+            return self._texts[value]
+        except KeyError:
+            space = ' xml:space="preserve"' if value.strip() and value != value.strip() else ""
+            text = f'<is><t{space}>{xml_escape(value)}</t></is></c>'
+            self._texts[value] = text
+            return text
+    
+    def _letter(self, col):
+        """Буква колонки (get_column_letter с кэшем)"""
+        xl = _openpyxl()
+        try:
+            return self._letters[col]
+        except KeyError:
+            self._letters[col] = letter = xl.get_column_letter(col)
+            return letter
+    
+    def _cell(self, row, col, value, style):
+        """XML ячейки; пустая строка - ячейка без значения и стиля (не записывается)
+        
+        Номер стиля берется только для ячеек, которые пишутся здесь: ячейка
+        openpyxl может сменить стиль (формат даты) и номера пойдут по-другому.
+        """
+        xl = _openpyxl()
+        ref = f"{self._letter(col)}{row}"
+        kind = type(value)
+        if value is None:
+            s = self._style_attr(style)
+            return f'<c r="{ref}"{s} t="n" />' if s else ""
+        if kind is str:
+            if value == "":
+                return f'<c r="{ref}"{self._style_attr(style)} t="inlineStr" />'
+            if len(value) > 1 and value[0] == "=":
+                return f'<c r="{ref}"{self._style_attr(style)}><f>{xml_escape(value[1:])}</f><v /></c>'
+            if value not in xl.ERROR_CODES and len(value) <= 32767 and not xl.ILLEGAL_CHARACTERS_RE.search(value):
+                return f'<c r="{ref}"{self._style_attr(style)} t="inlineStr">{self._text(value)}'
+        elif (kind is int or kind is float) and math.isfinite(value):
+            return f'<c r="{ref}"{self._style_attr(style)} t="n"><v>{xl.safe_string(value)}</v></c>'
+        elif kind is datetime.date and self._is_date_style(style) and not self.ws.parent.iso_dates:
+            serial = xl.safe_string(xl.to_excel(value, self.ws.parent.epoch))
+            return f'<c r="{ref}"{self._style_attr(style)} t="n"><v>{serial}</v></c>'
+        
+        cell = xl.Cell(self.ws, row=row, column=col, value=value, style_array=self.styles[style])
+        buffer = io.BytesIO()
+        with xl.xmlfile(buffer) as xf:
+            xl.etree_write_cell(xf, self.ws, cell, cell.has_style)
+        return buffer.getvalue().decode('utf-8')
+    
+    def _row_start(self, row):
+        """Открывающий тег строки с атрибутами из row_dimensions"""
+        attributes = {'r': str(row)}
+        attributes.update(self.ws.row_dimensions.get(row, {}))
+        quoted = {'"': "&quot;"}
+        return "<row " + " ".join(f'{key}="{xml_escape(value, quoted)}"'
+                                  for key, value in attributes.items()) + ">"
+    
+    def write(self, rows):
+        """Запись строк; номера строк и колонки внутри строки должны возрастать"""
+        # Начало XML листа (колонки с их стилями) openpyxl пишет перед первой
+        # строкой - номера стилей колонок совпадают с обычной потоковой записью
+        self.ws._get_writer()
+        write = self.file.write
+        next_row = 1
+        for row, cells in rows:
+            for empty_row in range(next_row, row):
+                write(f"{self._row_start(empty_row)}</row>".encode('utf-8'))
+            parts = [self._row_start(row)]
+            for col, value, style in cells:
+                xml = self._cell(row, col, value, style)
+                if xml:
+                    parts.append(xml)
+                    self.cells += 1
+                    # Стиль по атрибуту тега: ячейка openpyxl могла получить другой стиль
+                    self.styled_cells += ' s="' in xml[:xml.index(">")]
+            parts.append("</row>")
+            write("".join(parts).encode('utf-8'))
+            next_row = row + 1
+        return self
+    
+    @classmethod
+    def insert(cls, source, filename, writers, compression=None, compresslevel=None):
+        """Копия книги source в filename с данными листов {часть архива: SheetXmlWriter}
+        
+        source и filename - пути или двоичные потоки; части сжимаются заново
+        с compression (по умолчанию ZIP_DEFLATED) и compresslevel.
+        """
+        import shutil
+        import zipfile
+        compression = zipfile.ZIP_DEFLATED if compression is None else compression
+        with zipfile.ZipFile(source) as package_in, \
+                zipfile.ZipFile(filename, 'w', compression, allowZip64=True, compresslevel=compresslevel) as package_out:
+            for info in package_in.infolist():
+                data = package_in.read(info.filename)
+                writer = writers.get(info.filename)
+                if writer is None:
+                    package_out.writestr(info.filename, data)
+                    continue
+                match = cls.SHEET_DATA_PATTERN.search(data)
+                head, tail = data[:match.start()], data[match.end():]
+                with package_out.open(info.filename, 'w') as part:
+                    part.write(head + b'<sheetData>')
+                    writer.file.seek(0)
+                    shutil.copyfileobj(writer.file, part)
+                    part.write(b'</sheetData>' + tail)
+    
+    def close(self):
+        self.file.close()
+
 
 class VacationScheduleGenerator:
-    def __init__(self, company_name="ООО РОГА И КОПЫТА"):
+    BACKENDS = ('openpyxl', 'xml')
+    
+    def __init__(self, company_name="ООО РОГА И КОПЫТА", streaming=False,
+                 max_employees=20, vacation_pairs=10, orientation='blocks',
+                 conditional_formatting=False, year=2026, start_date=None, months=12,
+                 employees=None, analytics=False, min_coverage=None, validation=False,
+                 backend='openpyxl', vba_project=None, compresslevel=None, summary=False):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестный способ записи: {backend!r} (допустимо: {', '.join(self.BACKENDS)})")
+        if compresslevel is not None and compresslevel not in range(10):
+            raise ValueError(f"Уровень сжатия книги - от 0 до 9, а не {compresslevel!r}")
         self.company_name = company_name
-        self.year = 2026
-        self.max_employees = 20
-        self.vacation_pairs = 10
-        self.calendar = ProductionCalendar(self.year)
+        # Способ записи листов СОТРУДНИКИ и ГРАФИК: 'xml' - SheetXmlWriter
+        # (только потоковый режим, результат тот же байт в байт)
+        self.backend = backend
+        self.streaming = streaming or backend == 'xml'  # Потоковая запись через write-only листы
+        # Книга .xlsm с макросом и кнопкой: проект VBA из книги-образца или vbaProject.bin
+        self.vba_project = vba_project
+        self.vba_template = VbaProjectTemplate.load(vba_project) if vba_project else None
+        # Сжатие архива книги: None - как openpyxl, 0 - без сжатия (быстрее всего), 1-9 - уровень deflate
+        self.compresslevel = compresslevel
+        # Цвета области данных ГРАФИК задаются правилами условного форматирования
+        self.conditional_formatting = conditional_formatting
+        # Строка "В отпуске" под ГРАФИК и лист АНАЛИТИКА; min_coverage - сколько
+        # сотрудников должно оставаться на работе в рабочий день
+        self.analytics = analytics
+        self.min_coverage = min_coverage
+        # Лист ПРОВЕРКА: нарушения правил отпусков (VacationValidator)
+        self.validation = validation
+        # Лист СВОДКА: дни отпуска по месяцам и кварталам значениями (VacationSummary)
+        self.summary = summary
+        # Замеры последнего построения книги (create_excel_file)
+        self.build_stats = BuildStats()
+        self.layout = ScheduleLayout(max_employees, vacation_pairs, orientation)
+        
+        # Период графика: календарный год year или months месяцев с start_date
+        # (финансовый год, скользящее окно через границу года)
+        start_date, end_date = self.period_bounds(year, start_date, months)
+        
+        self.year = start_date.year
+        self.calendar = ProductionCalendar(start_date=start_date, end_date=end_date)
+        
+        for unconfirmed_year in self.calendar.unconfirmed_years:
+            print(f"  ⚠ Для {unconfirmed_year} года нет календаря в {os.path.basename(self.calendar.rules.path)}: "
+                  f"переносы выходных рассчитаны по ТК РФ")
+        
+        # Сотрудники для листа СОТРУДНИКИ: [{'name': ФИО, 'periods': [(начало, конец), ...]}]
+        # (без списка - пример данных для первых трех сотрудников)
+        self.employees = self._example_employees() if employees is None else list(employees)
+        if len(self.employees) > self.max_employees:
+            raise ValueError(f"Сотрудников в списке ({len(self.employees)}) больше, "
+                             f"чем мест на листе ({self.max_employees})")
+        for employee in self.employees:
+            if len(employee['periods']) > self.vacation_pairs:
+                raise ValueError(f"У сотрудника {employee['name']} периодов отпуска больше, "
+                                 f"чем {self.vacation_pairs}")
+        if self.vba_template is not None:
+            # Макрос проекта должен быть собран для этой раскладки и периода
+            self.vba_template.check_macro(self._vba_header())
+    
+    # Первый и последний день графика на months месяцев с start_date (или на год year)
+    period_bounds = staticmethod(period_bounds)
     
-    def create_excel_file(self):
-        """Создание Excel файла"""
+    @staticmethod
+    def format_period_tag(start_date, end_date):
+        """Период графика для имени файла: 2026 или 202607-202712"""
+        if (start_date.month, start_date.day, end_date.month, end_date.day) == (1, 1, 12, 31) and \
+                start_date.year == end_date.year:
+            return str(start_date.year)
+        return f"{start_date:%Y%m}-{end_date:%Y%m}"
+    
+    @property
+    def is_calendar_year(self):
+        """График на один календарный год"""
+        return (self.calendar.start_date.month, self.calendar.start_date.day) == (1, 1) and \
+            self.calendar.end_date == datetime.date(self.year, 12, 31)
+    
+    @property
+    def period_range(self):
+        """Период графика: 2026 или 07.2026 - 12.2027"""
+        if self.is_calendar_year:
+            return str(self.year)
+        return f"{self.calendar.start_date:%m.%Y} - {self.calendar.end_date:%m.%Y}"
+    
+    @property
+    def period_text(self):
+        """Период графика для заголовков: 2026 год или период 07.2026 - 12.2027"""
+        if self.is_calendar_year:
+            return f"{self.year} год"
+        return f"период {self.period_range}"
+    
+    @property
+    def period_tag(self):
+        """Период графика для имени файла"""
+        return self.format_period_tag(self.calendar.start_date, self.calendar.end_date)
+    
+    def _month_label(self, month_names, year, month):
+        """Заголовок месяца на листе ГРАФИК (с годом, если период не календарный год)"""
+        if self.is_calendar_year:
+            return month_names[month - 1]
+        return f"{month_names[month - 1]} {year}"
+    
+    def _month_date(self, month_offset, day):
+        """Дата day-го числа месяца с номером month_offset от начала периода"""
+        month_index = self.calendar.start_date.month - 1 + month_offset
+        return datetime.date(self.year + month_index // 12, month_index % 12 + 1, day)
+    
+    @property
+    def file_extension(self):
+        """Расширение файла книги: .xlsm с проектом VBA"""
+        return ".xlsm" if self.vba_template is not None else ".xlsx"
+    
+    @property
+    def zip_options(self):
+        """Параметры zipfile.ZipFile для архива книги по уровню сжатия"""
+        import zipfile
+        if self.compresslevel == 0:
+            return {'compression': zipfile.ZIP_STORED, 'compresslevel': None}
+        return {'compression': zipfile.ZIP_DEFLATED, 'compresslevel': self.compresslevel}
+    
+    @property
+    def max_employees(self):
+        return self.layout.max_employees
+    
+    @property
+    def vacation_pairs(self):
+        return self.layout.vacation_pairs
+    
+    def create_excel_file(self, filename=None, template_cache=None, profile=None):
+        """Создание Excel файла (без filename - имя с названием компании и временем)
+        
+        filename - путь или двоичный поток с методом write (BytesIO, открытый
+        файл, сокет): книга пишется в поток без временных файлов.
+        С template_cache (TemplateCache) книга собирается из готовой заготовки
+        для этого периода и раскладки, заменяются только данные отдела.
+        Замеры этапов - в self.build_stats, profile - профилировщик BuildStats.
+        """
         print("Создание файла Excel...")
         
-        wb = Workbook()
+        if filename is None:
+            current_date = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+            filename = f"отпуск_{self.company_name}_{self.period_tag}_{current_date}{self.file_extension}"
+        is_stream = hasattr(filename, 'write')
+        
+        self.build_stats = stats = BuildStats(profile)
+        try:
+            if not is_stream and os.path.splitext(filename)[1].lower() != self.file_extension:
+                raise ValueError(f"книга {'с макросом' if self.vba_template else 'без макроса'} "
+                                 f"сохраняется в файл {self.file_extension}, а не {filename}")
+            with stats.run():
+                if template_cache is not None and self.builds_from_template:
+                    with stats.stage("заготовка"):
+                        template_cache.write(self, filename)
+                else:
+                    wb = self._build_streaming_workbook() if self.streaming else self._build_workbook()
+                    with stats.stage("сохранение"):
+                        self._save_workbook(wb, filename)
+            print("✓ Книга записана в поток" if is_stream else f"✓ Файл создан: {filename}")
+            return filename
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении файла: {e}")
+            return None
+    
+    def create_excel_bytes(self, template_cache=None, profile=None):
+        """Книга в памяти: содержимое файла .xlsx/.xlsm (None при ошибке)"""
+        buffer = io.BytesIO()
+        if self.create_excel_file(buffer, template_cache=template_cache, profile=profile) is None:
+            return None
+        return buffer.getvalue()
+    
+    def _build_workbook(self):
+        """Построение книги со всеми листами в памяти"""
+        xl = _openpyxl()
+        wb = xl.Workbook()
+        self.styles = StyleRegistry(wb)
         
         if 'Sheet' in wb.sheetnames:
             del wb['Sheet']
@@ -149,358 +1046,327 @@ class VacationScheduleGenerator:
         ws_holidays = wb.create_sheet("ПРАЗДНИКИ", 3)
         ws_legend = wb.create_sheet("ЛЕГЕНДА", 4)
         ws_instruction = wb.create_sheet("ИНСТРУКЦИЯ", 5)
+        ws_fingerprints = wb.create_sheet(FINGERPRINT_SHEET, 6)
         
         ws_dates.sheet_state = 'hidden'
         ws_holidays.sheet_state = 'hidden'
+        ws_fingerprints.sheet_state = 'hidden'
         
-        self._create_employees_sheet(ws_employees)
-        self._create_schedule_sheet(ws_schedule)
-        self._create_dates_sheet(ws_dates)
-        self._create_holidays_sheet(ws_holidays)
-        self._create_legend_sheet(ws_legend)
-        self._create_instruction_sheet(ws_instruction)
-        
-        # Добавляем место для кнопки
-        self._add_button_placeholder(ws_employees)
+        builders = [
+            (ws_employees, self._create_employees_sheet),
+            (ws_schedule, self._create_schedule_sheet),
+            (ws_dates, self._create_dates_sheet),
+            (ws_holidays, self._create_holidays_sheet),
+            (ws_legend, self._create_legend_sheet),
+            (ws_instruction, self._create_instruction_sheet),
+            (ws_fingerprints, self._create_fingerprints_sheet),
+        ]
+        if self.analytics:
+            builders.append((wb.create_sheet(ANALYTICS_SHEET), self._create_analytics_sheet))
+        if self.validation:
+            builders.append((wb.create_sheet(VALIDATION_SHEET), self._create_validation_sheet))
+        if self.summary:
+            builders.append((wb.create_sheet(SUMMARY_SHEET), self._create_summary_sheet))
+        if self.vba_template is not None:
+            self.vba_template.apply(wb, self.layout)
+        for ws, build in builders:
+            with self.build_stats.stage(ws.title, ws):
+                build(ws)
         
         # Не включаем защиту через openpyxl - будут проблемы с паролем
         # Вместо этого размечаем ячейки как заблокированные/разблокированные
         # Пользователь сам включит защиту в Excel если захочет
         
-        current_date = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-        filename = f"отпуск_{self.company_name}_{self.year}_{current_date}.xlsx"
+        return wb
+    
+    def _save_workbook(self, wb, filename):
+        """Сохранение книги в файл или поток с уровнем сжатия self.compresslevel
+        
+        С backend='xml' данные листов SheetXmlWriter вставляются в архив, который
+        openpyxl записывает в память без сжатия (листы в нем без данных).
+        """
+        import zipfile
+        writers = [ws for ws in wb.worksheets if getattr(ws, 'sheet_xml', None) is not None]
+        if not writers:
+            self._write_package(wb, filename, **self.zip_options)
+            return
         
         try:
-            wb.save(filename)
-            print(f"✓ Файл создан: {filename}")
-            return filename
-        except Exception as e:
-            print(f"✗ Ошибка при сохранении файла: {e}")
-            return None
+            package = io.BytesIO()
+            self._write_package(wb, package, zipfile.ZIP_STORED)
+            SheetXmlWriter.insert(package, filename, {ws.path.lstrip('/'): ws.sheet_xml for ws in writers},
+                                  **self.zip_options)
+        finally:
+            for ws in writers:
+                ws.sheet_xml.close()
+    
+    @staticmethod
+    def _write_package(wb, filename, compression=None, compresslevel=None):
+        """Workbook.save с выбором сжатия архива (filename - путь или двоичный поток, по умолчанию ZIP_DEFLATED)"""
+        import zipfile
+        xl = _openpyxl()
+        compression = zipfile.ZIP_DEFLATED if compression is None else compression
+        wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+        archive = zipfile.ZipFile(filename, 'w', compression, allowZip64=True, compresslevel=compresslevel)
+        xl.ExcelWriter(wb, archive).save()
     
     def _add_button_placeholder(self, ws):
         """Добавляем место для кнопки на лист СОТРУДНИКИ"""
-        total_blocks = self.max_employees
-        columns_per_block = 4
-        spacer_columns = self.max_employees - 1
-        
-        total_columns = (total_blocks * columns_per_block) + spacer_columns
-        button_start_col = total_columns + 3
-        
-        button_row = 1
-        button_height = 3
+        xl = _openpyxl()
+        button_start_col = self.layout.button_col
         
-        ws.merge_cells(start_row=button_row, start_column=button_start_col,
-                      end_row=button_row + button_height - 1, end_column=button_start_col + 2)
+        for row, height in ((1, 3), (5, 1), (6, 1), (7, 1)):
+            self._merge(ws, row, button_start_col, row + height - 1, button_start_col + 2)
         
-        button_cell = ws.cell(row=button_row, column=button_start_col, 
-                             value="КНОПКА ДЛЯ ЗАПУСКА МАКРОСА")
-        button_cell.font = Font(bold=True, size=12, color="FFFFFF")
-        button_cell.alignment = Alignment(horizontal="center", vertical="center")
-        button_cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        
-        instr_row = button_row + button_height + 1
-        ws.merge_cells(start_row=instr_row, start_column=button_start_col,
-                      end_row=instr_row, end_column=button_start_col + 2)
-        
-        instr_cell = ws.cell(row=instr_row, column=button_start_col,
-                           value="1. Вставьте кнопку из панели разработчика")
-        instr_cell.font = Font(size=9)
-        instr_cell.alignment = Alignment(horizontal="center")
+        for col in range(button_start_col, button_start_col + 3):
+            ws.column_dimensions[xl.get_column_letter(col)].width = 15
+    
+    def _button_cells(self, row):
+        """Текст места для кнопки в строке row листа СОТРУДНИКИ"""
+        texts = {
+            1: ("КНОПКА ДЛЯ ЗАПУСКА МАКРОСА", 'кнопка'),
+            5: ("1. Вставьте кнопку из панели разработчика", 'кнопка_шаг'),
+            6: ("2. Назначьте макрос 'ОбновитьГрафик'", 'кнопка_шаг'),
+            7: ("Alt+F8 - альтернативный способ", 'кнопка_подсказка'),
+        }
+        if self.vba_template is not None:
+            # В книге .xlsm кнопка уже на месте и назначена макросу
+            texts[5] = ("Кнопка запускает макрос 'ОбновитьГрафик'", 'кнопка_шаг')
+            texts[6] = ("При открытии книги разрешите макросы", 'кнопка_шаг')
+        if row in texts:
+            text, style = texts[row]
+            yield self.layout.button_col, text, style
+    
+    def _merge(self, ws, min_row, min_col, max_row, max_col):
+        """Объединение ячеек на обычном или потоковом листе"""
+        xl = _openpyxl()
+        if isinstance(ws, xl.Worksheet):
+            ws.merge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+        else:
+            ws.merged_cells.add(xl.CellRange(min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row))
+    
+    def _write_rows(self, ws, rows):
+        """Запись строк (номер строки, [(колонка, значение, стиль), ...]) на лист
         
-        instr_row2 = instr_row + 1
-        ws.merge_cells(start_row=instr_row2, start_column=button_start_col,
-                      end_row=instr_row2, end_column=button_start_col + 2)
+        Колонки внутри строки и номера строк должны возрастать. Для потокового
+        листа пропуски заполняются пустыми ячейками.
+        """
+        xl = _openpyxl()
+        styles = self.styles
         
-        instr_cell2 = ws.cell(row=instr_row2, column=button_start_col,
-                            value="2. Назначьте макрос 'ОбновитьГрафик'")
-        instr_cell2.font = Font(size=9)
-        instr_cell2.alignment = Alignment(horizontal="center")
+        if isinstance(ws, xl.Worksheet):
+            for row, cells in rows:
+                for col, value, style in cells:
+                    styles.apply(ws.cell(row=row, column=col, value=value), style)
+            return
         
-        instr_row3 = instr_row2 + 1
-        ws.merge_cells(start_row=instr_row3, start_column=button_start_col,
-                      end_row=instr_row3, end_column=button_start_col + 2)
+        if self.backend == 'xml':
+            # Данные листа вставляются в архив при сохранении (_save_workbook)
+            ws.sheet_xml = SheetXmlWriter(ws, styles).write(rows)
+            return
         
-        instr_cell3 = ws.cell(row=instr_row3, column=button_start_col,
-                            value="Alt+F8 - альтернативный способ")
-        instr_cell3.font = Font(size=9, italic=True, color="666666")
-        instr_cell3.alignment = Alignment(horizontal="center")
+        def stream_cells(cells):
+            next_col = 1
+            for col, value, style in cells:
+                for _ in range(next_col, col):
+                    yield None
+                yield xl.Cell(ws, row=1, column=1, value=value, style_array=styles[style])
+                next_col = col + 1
         
-        for col in range(button_start_col, button_start_col + 3):
-            ws.column_dimensions[get_column_letter(col)].width = 15
+        next_row = 1
+        for row, cells in rows:
+            for _ in range(next_row, row):
+                ws.append([])
+            ws.append(self.build_stats.count_row(stream_cells(cells)))
+            next_row = row + 1
     
     def _create_employees_sheet(self, ws):
         """Создание листа СОТРУДНИКИ"""
+        xl = _openpyxl()
         print("  Создание листа 'СОТРУДНИКИ'...")
         
+        layout = self.layout
         ws.sheet_view.showGridLines = False
         
         date_width = 12
         days_width = 10
         name_width = 25
         
-        header_font = Font(bold=True, size=11, color="FFFFFF")
-        data_font = Font(size=10)
-        total_font = Font(bold=True, size=10)
+        if layout.orientation == 'blocks':
+            for emp_index in range(self.max_employees):
+                name_col = layout.name_cell(emp_index)[1]
+                ws.column_dimensions[xl.get_column_letter(name_col)].width = name_width
+                ws.column_dimensions[xl.get_column_letter(name_col+1)].width = days_width
+                ws.column_dimensions[xl.get_column_letter(name_col+2)].width = date_width
+                ws.column_dimensions[xl.get_column_letter(name_col+3)].width = date_width
+            rows = self._employee_block_rows()
+        else:
+            for col, width in zip("ABCDEF", (6, name_width, days_width, days_width, date_width, date_width)):
+                ws.column_dimensions[col].width = width
+            ws.freeze_panes = 'A2'
+            rows = self._employee_table_rows()
         
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        name_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-        days_fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
+        self._add_button_placeholder(ws)
+        self._write_rows(ws, rows)
         
-        date_format = 'DD.MM.YYYY'
-        BLOCK_COLS = 4
-        MAX_PERIODS = 10
+        print(f"  ✓ Лист 'СОТРУДНИКИ' создан для {self.max_employees} сотрудников "
+              f"(раскладка {layout.orientation})")
+    
+    def _employee_block_rows(self):
+        """Строки листа СОТРУДНИКИ при раскладке блоками (колонки на сотрудника)"""
+        layout = self.layout
+        examples = dict(enumerate(self.employees))
         
-        for emp_index in range(self.max_employees):
-            start_col = emp_index * BLOCK_COLS + 1
-            
-            headers = ["ФИО", "дни всего", "", ""]
-            for col_offset, header in enumerate(headers):
-                col = start_col + col_offset
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-                cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-            
-            for col_offset in range(BLOCK_COLS):
-                col = start_col + col_offset
-                cell = ws.cell(row=2, column=col, value="")
-                cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-            
-            name_cell = ws.cell(row=3, column=start_col, value=f"Сотрудник {emp_index+1}")
-            name_cell.font = Font(bold=True, size=10)
-            name_cell.fill = name_fill
-            name_cell.alignment = Alignment(horizontal="left", vertical="center")
-            name_cell.border = Border(
-                left=Side(style='thin', color="000000"),
-                right=Side(style='thin', color="000000"),
-                top=Side(style='thin', color="000000"),
-                bottom=Side(style='thin', color="000000")
-            )
-            
-            days_cell = ws.cell(row=3, column=start_col+1, value="")
-            days_cell.font = total_font
-            days_cell.fill = days_fill
-            days_cell.alignment = Alignment(horizontal="center", vertical="center")
-            days_cell.border = Border(
-                left=Side(style='thin', color="000000"),
-                right=Side(style='thin', color="000000"),
-                top=Side(style='thin', color="000000"),
-                bottom=Side(style='thin', color="000000")
-            )
-            
-            for col_offset in range(2, BLOCK_COLS):
-                col = start_col + col_offset
-                cell = ws.cell(row=3, column=col, value="")
-                cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
+        def block_cells(emp_idx, row):
+            start_col, name_col = layout.start_col(emp_idx), layout.name_cell(emp_idx)[1]
+            block = range(name_col, name_col + layout.BLOCK_COLS)
+            data = examples.get(emp_idx)
             
-            for period_idx in range(MAX_PERIODS):
-                row = 4 + period_idx
-                
-                start_cell = ws.cell(row=row, column=start_col+2, value="")
-                start_cell.number_format = date_format
-                start_cell.font = data_font
-                start_cell.alignment = Alignment(horizontal="center", vertical="center")
-                start_cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-                
-                end_cell = ws.cell(row=row, column=start_col+3, value="")
-                end_cell.number_format = date_format
-                end_cell.font = data_font
-                end_cell.alignment = Alignment(horizontal="center", vertical="center")
-                end_cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-                
-                days_period_cell = ws.cell(row=row, column=start_col+1, value="")
-                days_period_cell.font = data_font
-                days_period_cell.alignment = Alignment(horizontal="center", vertical="center")
-                days_period_cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-                
-                empty_cell = ws.cell(row=row, column=start_col, value="")
-                empty_cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-            
-            last_row = 4 + MAX_PERIODS
-            for col_offset in range(BLOCK_COLS):
-                col = start_col + col_offset
-                cell = ws.cell(row=last_row, column=col, value="...")
-                cell.font = Font(size=9, italic=True, color="666666")
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-                cell.border = Border(
-                    left=Side(style='thin', color="000000"),
-                    right=Side(style='thin', color="000000"),
-                    top=Side(style='thin', color="000000"),
-                    bottom=Side(style='thin', color="000000")
-                )
-            
-            ws.column_dimensions[get_column_letter(start_col)].width = name_width
-            ws.column_dimensions[get_column_letter(start_col+1)].width = days_width
-            ws.column_dimensions[get_column_letter(start_col+2)].width = date_width
-            ws.column_dimensions[get_column_letter(start_col+3)].width = date_width
-            
-            if emp_index < self.max_employees - 1:
-                separator_col = start_col + BLOCK_COLS
-                ws.column_dimensions[get_column_letter(separator_col)].width = 2
+            if row == 1:
+                for col, header in zip(block, ("ФИО", "дни всего", "", "")):
+                    yield col, header, 'сотр_заголовок'
+            elif row == layout.name_row:
+                name = data['name'] if data else f"Сотрудник {emp_idx+1}"
+                yield name_col, name, 'сотр_фио'
+                yield name_col + 1, self._total_days_formula(emp_idx), 'сотр_итого'
+                yield start_col, "", 'сотр_рамка'
+                yield start_col + 1, "", 'сотр_рамка'
+            elif row == layout.last_row:
+                for col in block:
+                    yield col, "...", 'сотр_продолжение'
+            elif row >= layout.first_period_row:
+                yield name_col, "", 'сотр_рамка'
+                yield from self._period_cells(emp_idx, row - layout.first_period_row, data)
+            else:
+                for col in block:
+                    yield col, "", 'сотр_рамка'
         
-        self._add_intelligent_formulas_for_days(ws)
-        self._add_example_data(ws)
+        def row_cells(row):
+            for emp_idx in range(self.max_employees):
+                yield from block_cells(emp_idx, row)
+            yield from self._button_cells(row)
         
-        print(f"  ✓ Лист 'СОТРУДНИКИ' создан с {self.max_employees} блоками сотрудников")
+        for row in range(1, layout.last_row + 1):
+            yield row, row_cells(row)
     
-    def _add_intelligent_formulas_for_days(self, ws):
-        """Добавляем формулы Excel для расчета дней отпуска"""
-        for emp_idx in range(self.max_employees):
-            start_col = emp_idx * 4 + 1
-            
-            for period_idx in range(self.vacation_pairs):
-                row = 4 + period_idx
-                
-                start_col_letter = get_column_letter(start_col + 2)
-                end_col_letter = get_column_letter(start_col + 3)
-                
-                days_cell = ws.cell(row=row, column=start_col+1)
-                
-                formula = (
-                    f'=IF(AND({start_col_letter}{row}<>"",{end_col_letter}{row}<>""),'
-                    f'({end_col_letter}{row}-{start_col_letter}{row}+1)-'
-                    f'COUNTIFS(ПРАЗДНИКИ!$A:$A,">="&{start_col_letter}{row},ПРАЗДНИКИ!$A:$A,"<="&{end_col_letter}{row}),'
-                    f'"")'
-                )
-                
-                days_cell.value = formula
-                days_cell.number_format = '0'
+    def _employee_table_rows(self):
+        """Строки листа СОТРУДНИКИ при табличной раскладке (строка на период)"""
+        layout = self.layout
+        examples = dict(enumerate(self.employees))
+        
+        headers = ["№", "ФИО", "дни всего", "дни", "начало", "конец"]
+        header_cells = [(col, header, 'сотр_заголовок') for col, header in enumerate(headers, 1)]
+        yield 1, header_cells + list(self._button_cells(1))
         
         for emp_idx in range(self.max_employees):
-            start_col = emp_idx * 4 + 1
-            total_row = 3
-            total_col = start_col + 1
-            
-            period_refs = []
+            data = examples.get(emp_idx)
             for period_idx in range(self.vacation_pairs):
-                row = 4 + period_idx
-                period_refs.append(f'{get_column_letter(start_col+1)}{row}')
-            
-            total_formula = f'=SUM({":".join(period_refs)})'
-            total_cell = ws.cell(row=total_row, column=total_col)
-            total_cell.value = total_formula
-            total_cell.number_format = '0'
-    
-    def _add_example_data(self, ws):
-        """Добавляем пример данных для первых трех сотрудников"""
-        example_data = [
+                row = layout.period_row(emp_idx, period_idx)
+                if period_idx == 0:
+                    name = data['name'] if data else f"Сотрудник {emp_idx+1}"
+                    cells = [
+                        (1, emp_idx + 1, 'сотр_номер'),
+                        (2, name, 'сотр_фио'),
+                        (3, self._total_days_formula(emp_idx), 'сотр_итого'),
+                    ]
+                else:
+                    cells = [(col, "", 'сотр_рамка') for col in (1, 2, 3)]
+                cells.extend(self._period_cells(emp_idx, period_idx, data))
+                cells.extend(self._button_cells(row))
+                yield row, cells
+    
+    def _period_cells(self, emp_idx, period_idx, data):
+        """Ячейки периода отпуска: дни (формула), начало, конец"""
+        start_col = self.layout.start_col(emp_idx)
+        row = self.layout.period_row(emp_idx, period_idx)
+        start_date = end_date = ""
+        if data and period_idx < len(data['periods']):
+            start_date, end_date = data['periods'][period_idx]
+        
+        yield start_col - 1, self._period_days_formula(emp_idx, period_idx), 'сотр_дни'
+        yield start_col, start_date, 'сотр_дата'
+        yield start_col + 1, end_date, 'сотр_дата'
+    
+    def _period_days_formula(self, emp_idx, period_idx):
+        """Формула количества дней отпуска в периоде (без праздников)
+        
+        Праздники в периоде - разность накопленного числа праздников (строка 3
+        листа ДАТЫ) на конец периода и на день перед началом, даты за пределами
+        периода графика приводятся к его границам. Вместо COUNTIFS по всей колонке
+        ПРАЗДНИКИ!$A:$A формула выполняет два обращения INDEX.
+        """
+        xl = _openpyxl()
+        row = self.layout.period_row(emp_idx, period_idx)
+        start_col = self.layout.start_col(emp_idx)
+        start = f'{xl.get_column_letter(start_col)}{row}'
+        end = f'{xl.get_column_letter(start_col + 1)}{row}'
+        days = len(self.calendar)
+        first_day = 'ДАТЫ!$C$1'
+        holidays_so_far = f'ДАТЫ!$C$3:${xl.get_column_letter(2 + days)}$3'
+        
+        return (
+            f'=IF(AND({start}<>"",{end}<>""),'
+            f'({end}-{start}+1)'
+            f'-IF({end}<{first_day},0,INDEX({holidays_so_far},MIN({end}-{first_day}+1,{days})))'
+            f'+IF({start}<={first_day},0,INDEX({holidays_so_far},MIN({start}-{first_day},{days}))),'
+            f'"")'
+        )
+    
+    def _total_days_formula(self, emp_idx):
+        """Формула итога дней отпуска по сотруднику"""
+        xl = _openpyxl()
+        days_col_letter = xl.get_column_letter(self.layout.start_col(emp_idx) - 1)
+        first_row = self.layout.period_row(emp_idx, 0)
+        last_row = self.layout.period_row(emp_idx, self.vacation_pairs - 1)
+        
+        return f'=SUM({days_col_letter}{first_row}:{days_col_letter}{last_row})'
+    
+    def _example_employees(self):
+        """Пример данных для первых трех сотрудников"""
+        return [
             {
                 'name': 'Иванов И.И.',
                 'periods': [
-                    (datetime.date(2026, 1, 10), datetime.date(2026, 1, 20)),
-                    (datetime.date(2026, 3, 20), datetime.date(2026, 3, 25)),
-                    (datetime.date(2026, 6, 10), datetime.date(2026, 6, 15)),
+                    (self._month_date(0, 10), self._month_date(0, 20)),
+                    (self._month_date(2, 20), self._month_date(2, 25)),
+                    (self._month_date(5, 10), self._month_date(5, 15)),
                 ]
             },
             {
                 'name': 'Петров П.П.',
                 'periods': [
-                    (datetime.date(2026, 5, 1), datetime.date(2026, 5, 15)),
+                    (self._month_date(4, 1), self._month_date(4, 15)),
                 ]
             },
             {
                 'name': 'Сидоров С.С.',
                 'periods': [
-                    (datetime.date(2026, 8, 1), datetime.date(2026, 8, 14)),
+                    (self._month_date(7, 1), self._month_date(7, 14)),
                 ]
             }
         ]
-        
-        for emp_idx, data in enumerate(example_data):
-            if emp_idx >= 3:
-                break
-                
-            start_col = emp_idx * 4 + 1
-            
-            ws.cell(row=3, column=start_col, value=data['name'])
-            
-            for period_idx, (start_date, end_date) in enumerate(data['periods']):
-                if period_idx >= self.vacation_pairs:
-                    break
-                    
-                row = 4 + period_idx
-                ws.cell(row=row, column=start_col+2, value=start_date)
-                ws.cell(row=row, column=start_col+3, value=end_date)
     
     def _create_holidays_sheet(self, ws):
         """Создание листа ПРАЗДНИКИ"""
+        xl = _openpyxl()
         print("  Создание листа 'ПРАЗДНИКИ'...")
         
         ws.column_dimensions['A'].width = 15
-        ws.cell(row=1, column=1, value="ПРАЗДНИЧНЫЕ ДНИ 2026").font = Font(bold=True, size=12, color="1F4E78")
-        ws.cell(row=2, column=1, value="Дата").font = Font(bold=True)
-        ws.cell(row=2, column=2, value="Описание").font = Font(bold=True)
+        ws.cell(row=1, column=1, value=f"ПРАЗДНИЧНЫЕ ДНИ {self.period_range}").font = xl.Font(bold=True, size=12, color="1F4E78")
+        ws.cell(row=2, column=1, value="Дата").font = xl.Font(bold=True)
+        ws.cell(row=2, column=2, value="Описание").font = xl.Font(bold=True)
         
         holidays = self.calendar.get_all_holidays()
-        holidays.sort()
-        
-        descriptions = {
-            datetime.date(2026, 1, 1): "Новый год",
-            datetime.date(2026, 1, 2): "Новогодние каникулы",
-            datetime.date(2026, 1, 3): "Новогодние каникулы",
-            datetime.date(2026, 1, 4): "Новогодние каникулы",
-            datetime.date(2026, 1, 5): "Новогодние каникулы",
-            datetime.date(2026, 1, 6): "Новогодние каникулы",
-            datetime.date(2026, 1, 7): "Рождество Христово",
-            datetime.date(2026, 1, 8): "Новогодние каникулы",
-            datetime.date(2026, 1, 9): "Перенос с 3 января",
-            datetime.date(2026, 2, 23): "День защитника Отечества",
-            datetime.date(2026, 3, 8): "Международный женский день",
-            datetime.date(2026, 3, 9): "Перенос с 8 марта",
-            datetime.date(2026, 5, 1): "Праздник Весны и Труда",
-            datetime.date(2026, 5, 9): "День Победы",
-            datetime.date(2026, 5, 11): "Перенос с 9 мая",
-            datetime.date(2026, 6, 12): "День России",
-            datetime.date(2026, 11, 4): "День народного единства",
-            datetime.date(2026, 12, 31): "Перенос с 4 января",
-        }
         
         for i, holiday in enumerate(holidays, start=1):
             row = i + 2
             ws.cell(row=row, column=1, value=holiday)
             ws.cell(row=row, column=1).number_format = 'DD.MM.YYYY'
             
-            desc = descriptions.get(holiday, "Праздничный день")
+            desc = self.calendar.holiday_name(holiday)
             ws.cell(row=row, column=2, value=desc)
             
-            holiday_fill = PatternFill(start_color="FF9999", end_color="FF9999", fill_type="solid")
+            holiday_fill = xl.PatternFill(start_color="FF9999", end_color="FF9999", fill_type="solid")
             ws.cell(row=row, column=1).fill = holiday_fill
             ws.cell(row=row, column=2).fill = holiday_fill
         
@@ -508,39 +1374,26 @@ class VacationScheduleGenerator:
     
     def _create_schedule_sheet(self, ws):
         """Создание листа ГРАФИК с КОНТРАСТНЫМИ ЦВЕТАМИ"""
+        xl = _openpyxl()
         print("  Создание листа 'ГРАФИК'...")
         
+        styles = self.styles
+        
         ws.column_dimensions['A'].width = 6
         ws.column_dimensions['B'].width = 25
         
-        ws.cell(row=4, column=1, value="№").font = Font(bold=True)
-        ws.cell(row=4, column=2, value="ФИО СОТРУДНИКА").font = Font(bold=True)
-        
-        ws.cell(row=4, column=1).alignment = Alignment(horizontal="center", vertical="center")
-        ws.cell(row=4, column=2).alignment = Alignment(horizontal="left", vertical="center")
-        
-        header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-        ws.cell(row=4, column=1).fill = header_fill
-        ws.cell(row=4, column=2).fill = header_fill
+        styles.apply(ws.cell(row=4, column=1, value="№"), 'граф_шапка_номер')
+        styles.apply(ws.cell(row=4, column=2, value="ФИО СОТРУДНИКА"), 'граф_шапка_фио')
         
         current_col = 3
         month_names = ['ЯНВ', 'ФЕВ', 'МАР', 'АПР', 'МАЙ', 'ИЮН', 
                       'ИЮЛ', 'АВГ', 'СЕН', 'ОКТ', 'НОЯ', 'ДЕК']
         day_names = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
         
-        # КОНТРАСТНЫЕ ЦВЕТА для лучшей видимости в Excel 2010
-        colors = {
-            'рабочий': 'FFFFFF',      # Белый - максимальный контраст
-            'выходной': 'D9D9D9',     # СЕРЫЙ (было F2F2F2) - темнее для лучшей видимости
-            'праздник': 'FF9999',     # Красный - оставляем как есть
-        }
-        
-        # КОНТРАСТНЫЕ ЦВЕТА для чередования месяцев
-        month_colors = ['E6E6E6', 'FFFFFF']  # Серый и белый (было F8F8F8 и FFFFFF)
+        data_start_row = self.layout.schedule_row(0)
+        data_end_row = self.layout.schedule_row(self.max_employees - 1)
         
-        for month_idx, month in enumerate(range(1, 13)):
-            days_in_month = calendar.monthrange(self.year, month)[1]
-            
+        for month_idx, (year, month, first_index, days_in_month) in enumerate(self.calendar.months()):
             start_col = current_col
             end_col = current_col + days_in_month - 1
             
@@ -549,124 +1402,209 @@ class VacationScheduleGenerator:
                 end_row=1, end_column=end_col
             )
             
-            month_color = month_colors[month_idx % 2]
-            month_fill = PatternFill(start_color=month_color, end_color=month_color, fill_type="solid")
+            # КОНТРАСТНЫЕ ЦВЕТА для чередования месяцев
+            month_style = month_idx % 2
             
-            month_cell = ws.cell(row=1, column=start_col, value=month_names[month-1])
-            month_cell.alignment = Alignment(horizontal="center", vertical="center")
-            month_cell.font = Font(bold=True, size=11)
-            month_cell.fill = month_fill
+            month_cell = ws.cell(row=1, column=start_col, value=self._month_label(month_names, year, month))
+            styles.apply(month_cell, f'граф_месяц_{month_style}')
             
             for day in range(1, days_in_month + 1):
                 col = current_col + day - 1
-                date_obj = datetime.date(self.year, month, day)
-                day_info = self.calendar.get_day_info(date_obj)
+                date_obj = self.calendar.date_at(first_index + day - 1)
+                day_code = self.calendar.day_code(date_obj)
                 
-                day_cell = ws.cell(row=2, column=col, value=day)
-                day_cell.alignment = Alignment(horizontal="center", vertical="center")
-                day_cell.font = Font(size=9)
+                # Применяем КОНТРАСТНЫЕ цвета
+                day_cell = ws.cell(row=2, column=col, value=date_obj.day)
+                styles.apply(day_cell, f'граф_число_{day_code}')
                 
                 day_name = day_names[date_obj.weekday()]
                 
                 symbol = ""
-                if day_info:
-                    if day_info.day_type == 'праздник':
-                        symbol = " ✶"
-                    elif day_info.is_short:
-                        symbol = " ●"
+                if day_code == DAY_HOLIDAY:
+                    symbol = " ✶"
+                elif self.calendar.is_short(date_obj):
+                    symbol = " ●"
                 
                 weekday_cell = ws.cell(row=3, column=col, value=f"{day_name}{symbol}")
-                weekday_cell.alignment = Alignment(horizontal="center", vertical="center")
-                weekday_cell.font = Font(size=8)
+                styles.apply(weekday_cell, f'граф_день_{day_code}')
                 
-                # Применяем КОНТРАСТНЫЕ цвета
-                fill_color = colors['рабочий']
-                if day_info:
-                    if day_info.day_type == 'праздник':
-                        fill_color = colors['праздник']
-                    elif day_info.day_type == 'выходной':
-                        fill_color = colors['выходной']
-                
-                day_fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
-                day_cell.fill = day_fill
-                weekday_cell.fill = day_fill
-                
-                ws.column_dimensions[get_column_letter(col)].width = 3.5
-            
-            current_col += days_in_month
-        
-        data_start_row = 5
-        data_end_row = data_start_row + self.max_employees - 1
-        
-        # Применяем КОНТРАСТНЫЕ цвета месяцев к области данных
-        col = 3
-        for month_idx, month in enumerate(range(1, 13)):
-            days_in_month = calendar.monthrange(self.year, month)[1]
+                ws.column_dimensions[xl.get_column_letter(col)].width = 3.5
             
-            month_color = month_colors[month_idx % 2]
-            month_fill = PatternFill(start_color=month_color, end_color=month_color, fill_type="solid")
+            # Применяем КОНТРАСТНЫЕ цвета месяцев к области данных
+            if self.conditional_formatting:
+                for col in range(start_col, end_col + 1):
+                    styles.apply(ws.column_dimensions[xl.get_column_letter(col)], 'граф_колонка')
+            else:
+                styles.apply_range(ws, data_start_row, start_col, data_end_row, end_col,
+                                   f'граф_ячейка_{month_style}')
             
-            for day in range(1, days_in_month + 1):
-                for row in range(data_start_row, data_end_row + 1):
-                    cell = ws.cell(row=row, column=col)
-                    cell.fill = month_fill
-                col += 1
+            current_col += days_in_month
         
         for i in range(1, self.max_employees + 1):
-            row = i + 4
-            
-            num_cell = ws.cell(row=row, column=1, value=i)
-            num_cell.alignment = Alignment(horizontal="center", vertical="center")
-            num_cell.font = Font(size=10)
-            
-            name_cell = ws.cell(row=row, column=2)
-            name_cell.font = Font(size=10)
-            name_cell.alignment = Alignment(horizontal="left", vertical="center")
-            
-            for col in range(1, current_col):
-                cell = ws.cell(row=row, column=col)
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-                cell.alignment = Alignment(vertical="center", horizontal="center")
-            ws.cell(row=row, column=2).alignment = Alignment(vertical="center", horizontal="left")
+            ws.cell(row=self.layout.schedule_row(i - 1), column=1, value=i)
+        
+        styles.apply_range(ws, data_start_row, 1, data_end_row, 1, 'граф_номер')
+        styles.apply_range(ws, data_start_row, 2, data_end_row, 2, 'граф_фио')
         
         ws.freeze_panes = 'C5'
         
-        last_col_letter = get_column_letter(current_col - 1)
-        footer_row = self.max_employees + 6
+        if self.conditional_formatting:
+            self._add_schedule_rules(ws, current_col - 1)
+        
+        last_col_letter = xl.get_column_letter(current_col - 1)
+        footer_row = self.layout.schedule_footer_row
         ws.merge_cells(f'A{footer_row}:{last_col_letter}{footer_row}')
         footer = ws.cell(row=footer_row, column=1, 
-                        value=f"График отпусков {self.company_name} на {self.year} год")
-        footer.font = Font(italic=True, size=10, color="666666")
-        footer.alignment = Alignment(horizontal="center")
+                        value=f"График отпусков {self.company_name} на {self.period_text}")
+        styles.apply(footer, 'граф_подвал')
+        
+        if self.analytics:
+            for col, (value, style) in enumerate(self._coverage_row_values(current_col - 1), 1):
+                styles.apply(ws.cell(row=self.layout.schedule_coverage_row, column=col, value=value), style)
+            self._add_coverage_rule(ws, current_col - 1)
         
         print(f"  ✓ Лист 'ГРАФИК' создан ({current_col-3} дней)")
-        print("    • Применены контрастные цвета для Excel 2010")
+        if self.conditional_formatting:
+            print("    • Цвета области данных заданы условным форматированием")
+        else:
+            print("    • Применены контрастные цвета для Excel 2010")
+    
+    def _coverage_row_values(self, last_col):
+        """Строка "В отпуске" под ГРАФИК: (значение, стиль) ячеек с колонки A
+        
+        В каждой колонке дня - число отметок "О" над ней. Подпись в колонке A,
+        колонка B пустая: макрос очищает ГРАФИК до последней заполненной строки
+        колонки B и строку не затрагивает.
+        """
+        xl = _openpyxl()
+        first_row = self.layout.schedule_row(0)
+        last_row = self.layout.schedule_row(self.max_employees - 1)
+        yield "В отпуске", 'граф_покрытие_подпись'
+        yield None, 'граф_покрытие_подпись'
+        for col in range(3, last_col + 1):
+            letter = xl.get_column_letter(col)
+            yield (f'=COUNTIF({letter}${first_row}:{letter}${last_row},"{ScheduleRenderer.VACATION_MARK}")',
+                   'граф_покрытие')
+    
+    def _add_coverage_rule(self, ws, last_col):
+        """Красная заливка дней строки "В отпуске", когда на работе меньше минимума
+        
+        Минимум берется из ячейки ANALYTICS_MIN_CELL листа АНАЛИТИКА (пустая -
+        проверки нет). На работе - заполненные ФИО на ГРАФИК, кроме свободных мест
+        "Сотрудник N", минус отметки отпуска; проверяются только рабочие дни (код 0
+        в строке 2 листа ДАТЫ).
+        """
+        xl = _openpyxl()
+        row = self.layout.schedule_coverage_row
+        names = f"$B${self.layout.schedule_row(0)}:$B${self.layout.schedule_row(self.max_employees - 1)}"
+        minimum = f"{ANALYTICS_SHEET}!${ANALYTICS_MIN_CELL[0]}${ANALYTICS_MIN_CELL[1:]}"
+        staff = f'COUNTA({names})-COUNTIF({names},"Сотрудник *")'
+        formula = f'AND(ДАТЫ!C$2=0,{minimum}>0,{staff}-C{row}<{minimum})'
+        fill = xl.PatternFill(start_color="FF9999", end_color="FF9999", fill_type="solid")
+        ws.conditional_formatting.add(f"C{row}:{xl.get_column_letter(last_col)}{row}",
+                                      xl.FormulaRule(formula=[formula], fill=fill, font=xl.Font(bold=True)))
+    
+    @property
+    def builds_from_template(self):
+        """Можно ли собрать книгу из заготовки TemplateCache
+        
+        Листы АНАЛИТИКА, ПРОВЕРКА и СВОДКА зависят от списка сотрудников целиком -
+        такие книги строятся без заготовки.
+        """
+        return not (self.analytics or self.validation or self.summary)
+    
+    def listed_employees(self):
+        """(ФИО, периоды) сотрудников листа СОТРУДНИКИ в порядке вывода на ГРАФИК"""
+        employees = [(employee['name'], employee['periods']) for employee in self.employees]
+        # Как на листе: свободные места заполнены ФИО "Сотрудник N" и тоже выводятся на ГРАФИК
+        employees += [(f"Сотрудник {emp_idx + 1}", []) for emp_idx in range(len(employees), self.max_employees)]
+        return employees
+    
+    def analytics_report(self):
+        """VacationAnalytics по сотрудникам листа СОТРУДНИКИ"""
+        return VacationAnalytics(self.calendar, assigned_employees(self.listed_employees()))
+    
+    def _create_analytics_sheet(self, ws):
+        """Создание листа АНАЛИТИКА по списку сотрудников генератора"""
+        print(f"  Создание листа '{ANALYTICS_SHEET}'...")
+        self.analytics_report().fill_sheet(ws, self.styles, f"График отпусков {self.company_name} на {self.period_text}",
+                                           self.min_coverage)
+        print(f"  ✓ Лист '{ANALYTICS_SHEET}' создан")
+    
+    def _create_validation_sheet(self, ws):
+        """Создание листа ПРОВЕРКА по списку сотрудников генератора"""
+        print(f"  Создание листа '{VALIDATION_SHEET}'...")
+        employees = self.listed_employees()
+        validator = VacationValidator(self.calendar)
+        issues = validator.check(employees)
+        validator.fill_sheet(ws, self.styles, f"График отпусков {self.company_name} на {self.period_text}",
+                             len(assigned_employees(employees)), issues)
+        print(f"  ✓ Лист '{VALIDATION_SHEET}' создан (замечаний: {len(issues)})")
+    
+    def _create_summary_sheet(self, ws):
+        """Создание листа СВОДКА по списку сотрудников генератора"""
+        print(f"  Создание листа '{SUMMARY_SHEET}'...")
+        VacationSummary(self.calendar, assigned_employees(self.listed_employees())).fill_sheet(
+            ws, self.styles, f"График отпусков {self.company_name} на {self.period_text}")
+        print(f"  ✓ Лист '{SUMMARY_SHEET}' создан")
+    
+    def _add_schedule_rules(self, ws, last_col):
+        """Условное форматирование области данных ГРАФИК
+        
+        Тип дня берется из строки 2 листа ДАТЫ, месяц - из даты в строке 1.
+        Правила проверяются по порядку до первого сработавшего.
+        """
+        xl = _openpyxl()
+        first_row = self.layout.schedule_row(0)
+        last_row = self.layout.schedule_row(self.max_employees - 1)
+        area = f"C{first_row}:{xl.get_column_letter(last_col)}{last_row}"
+        
+        thin_side = xl.Side(style='thin')
+        grid_border = xl.Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+        
+        def solid(color):
+            return xl.PatternFill(start_color=color, end_color=color, fill_type="solid")
+        
+        rules = [
+            (f'C{first_row}="О"', dict(fill=solid("C6EFCE"), font=xl.Font(bold=True))),
+            (f'ДАТЫ!C$2={DAY_HOLIDAY}', dict(fill=solid("FF9999"))),
+            (f'ДАТЫ!C$2={DAY_WEEKEND}', dict(fill=solid("D9D9D9"))),
+            (f'MOD(MONTH(ДАТЫ!C$1)-{self.calendar.start_date.month},2)=0', dict(fill=solid("E6E6E6"))),
+            ('TRUE', dict()),
+        ]
+        for formula, params in rules:
+            ws.conditional_formatting.add(area, xl.FormulaRule(formula=[formula], border=grid_border,
+                                                            stopIfTrue=True, **params))
     
     def _create_dates_sheet(self, ws):
         """Создание служебного листа с датами"""
+        xl = _openpyxl()
         print("  Создание служебного листа с датами...")
         
-        date_obj = datetime.date(self.year, 1, 1)
+        date_obj = self.calendar.start_date
         col = 3
         
-        while date_obj.year == self.year:
+        while date_obj <= self.calendar.end_date:
             cell = ws.cell(row=1, column=col, value=date_obj)
             cell.number_format = 'DD.MM.YYYY'
             date_obj += timedelta(days=1)
             col += 1
         
+        # Строка 2 - тип дня (для условного форматирования ГРАФИК),
+        # строка 3 - накопленное число праздников (для формул дней отпуска)
+        holidays_so_far = self.calendar.cumulative_counts(DAY_HOLIDAY)
+        for index, day_code in enumerate(self.calendar.codes()):
+            ws.cell(row=2, column=3 + index, value=day_code)
+            ws.cell(row=3, column=3 + index, value=holidays_so_far[index])
+        
         for c in range(1, col):
-            ws.column_dimensions[get_column_letter(c)].width = 0.5
+            ws.column_dimensions[xl.get_column_letter(c)].width = 0.5
         
         print(f"  ✓ Служебный лист создан ({col-3} дней, начинается с колонки C)")
     
     def _create_legend_sheet(self, ws):
         """Создание листа ЛЕГЕНДА"""
+        xl = _openpyxl()
         print("  Создание листа 'ЛЕГЕНДА'...")
         
         ws.column_dimensions['A'].width = 15
@@ -675,15 +1613,15 @@ class VacationScheduleGenerator:
         
         ws.merge_cells('A1:C1')
         title = ws.cell(row=1, column=1, value="ЛЕГЕНДА ГРАФИКА ОТПУСКОВ")
-        title.font = Font(bold=True, size=14, color="1F4E78")
-        title.alignment = Alignment(horizontal="center")
+        title.font = xl.Font(bold=True, size=14, color="1F4E78")
+        title.alignment = xl.Alignment(horizontal="center")
         
         headers = ["Обозначение", "Тип дня", "Описание"]
         for col, header in enumerate(headers, 1):
             cell = ws.cell(row=3, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
+            cell.font = xl.Font(bold=True)
+            cell.fill = xl.PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+            cell.alignment = xl.Alignment(horizontal="center", vertical="center")
         
         # Обновляем цвета в легенде для соответствия контрастным цветам
         legend_data = [
@@ -700,12 +1638,12 @@ class VacationScheduleGenerator:
             row = i + 3
             
             sym_cell = ws.cell(row=row, column=1, value=symbol)
-            sym_cell.alignment = Alignment(horizontal="center", vertical="center")
+            sym_cell.alignment = xl.Alignment(horizontal="center", vertical="center")
             
             type_cell = ws.cell(row=row, column=2, value=day_type)
             desc_cell = ws.cell(row=row, column=3, value=description)
             
-            fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+            fill = xl.PatternFill(start_color=color, end_color=color, fill_type="solid")
             sym_cell.fill = fill
             type_cell.fill = fill
             desc_cell.fill = fill
@@ -714,6 +1652,7 @@ class VacationScheduleGenerator:
     
     def _create_instruction_sheet(self, ws):
         """Создание листа ИНСТРУКЦИЯ"""
+        xl = _openpyxl()
         print("  Создание листа 'ИНСТРУКЦИЯ'...")
         
         ws.column_dimensions['A'].width = 80
@@ -748,6 +1687,11 @@ class VacationScheduleGenerator:
             ("3. Перейдите на лист 'ГРАФИК' для просмотра", 11, False, False),
             ("4. Количество дней рассчитывается автоматически (исключая праздники)", 11, False, False),
             ("", 1, False, False),
+            ("АВТООБНОВЛЕНИЕ ГРАФИКА:", 14, True, False),
+            ("1. В редакторе VBA (Alt+F11) дважды щелкните лист СОТРУДНИКИ в окне Project", 11, False, False),
+            ("2. Вставьте текст из файла vacation_sheet_module.txt", 11, False, False),
+            ("3. При изменении ФИО или дат перерисовываются только строки измененных сотрудников", 11, False, False),
+            ("", 1, False, False),
             ("ПРИМЕЧАНИЕ:", 14, True, False),
             ("• Ячейки размечены для защиты, но защита не включена", 11, False, False),
             ("• Чтобы включить защиту: Рецензирование → Защитить лист", 11, False, False),
@@ -757,34 +1701,326 @@ class VacationScheduleGenerator:
         
         for i, (text, size, bold, center) in enumerate(content, 1):
             cell = ws.cell(row=i, column=1, value=text)
-            cell.font = Font(size=size, bold=bold)
+            cell.font = xl.Font(size=size, bold=bold)
             if center:
-                cell.alignment = Alignment(horizontal="center")
+                cell.alignment = xl.Alignment(horizontal="center")
         
         print("  ✓ Лист 'ИНСТРУКЦИЯ' создан")
     
-    def create_vba_macro_file(self):
-        """Создание файла с оптимизированным VBA макросом"""
-        print("\nСоздание файла с VBA макросом...")
+    def _create_fingerprints_sheet(self, ws):
+        """Создание служебного листа отпечатков сотрудников
         
-        vba_code = '''Option Explicit
-
-Public Const MAX_EMPLOYEES As Integer = 20
-Public Const BLOCK_COLS As Integer = 4
-Public Const MAX_PERIODS As Integer = 10
-
-' ОБНОВЛЕННЫЕ КОНТРАСТНЫЕ ЦВЕТА для Excel 2010
+        Строка 2 + номер места сотрудника: отпечаток ФИО и периодов отпуска на момент
+        последнего обновления и строка ГРАФИК (0 - сотрудник не выведен). Заполняется
+        макросом и ScheduleRenderer, по нему перерисовываются только изменившиеся строки.
+        """
+        ws.column_dimensions['A'].width = 60
+        ws.column_dimensions['B'].width = 15
+        ws.cell(row=1, column=1, value="Отпечаток сотрудника")
+        ws.cell(row=1, column=2, value="Строка ГРАФИК")
+    
+    def _build_streaming_workbook(self):
+        """Построение книги в потоковом режиме (write-only листы)
+        
+        Строки больших листов (СОТРУДНИКИ, ГРАФИК, ДАТЫ) генерируются итераторами
+        и сразу записываются на диск, поэтому расход памяти не зависит
+        от количества сотрудников. Результат совпадает с обычным режимом.
+        """
+        xl = _openpyxl()
+        wb = xl.Workbook(write_only=True)
+        self.styles = StyleRegistry(wb)
+        
+        ws_employees = wb.create_sheet("СОТРУДНИКИ")
+        ws_schedule = wb.create_sheet("ГРАФИК")
+        ws_dates = wb.create_sheet("ДАТЫ")
+        ws_holidays = wb.create_sheet("ПРАЗДНИКИ")
+        ws_legend = wb.create_sheet("ЛЕГЕНДА")
+        ws_instruction = wb.create_sheet("ИНСТРУКЦИЯ")
+        ws_fingerprints = wb.create_sheet(FINGERPRINT_SHEET)
+        
+        ws_dates.sheet_state = 'hidden'
+        ws_holidays.sheet_state = 'hidden'
+        ws_fingerprints.sheet_state = 'hidden'
+        
+        # Небольшие листы строятся в листе-буфере и переносятся построчно
+        def buffered(build):
+            return functools.partial(self._stream_buffered_sheet, build=build)
+        
+        builders = [
+            (ws_employees, self._create_employees_sheet),
+            (ws_schedule, self._stream_schedule_sheet),
+            (ws_dates, self._stream_dates_sheet),
+            (ws_holidays, buffered(self._create_holidays_sheet)),
+            (ws_legend, buffered(self._create_legend_sheet)),
+            (ws_instruction, buffered(self._create_instruction_sheet)),
+            (ws_fingerprints, buffered(self._create_fingerprints_sheet)),
+        ]
+        if self.analytics:
+            builders.append((wb.create_sheet(ANALYTICS_SHEET), buffered(self._create_analytics_sheet)))
+        if self.validation:
+            builders.append((wb.create_sheet(VALIDATION_SHEET), buffered(self._create_validation_sheet)))
+        if self.summary:
+            builders.append((wb.create_sheet(SUMMARY_SHEET), buffered(self._create_summary_sheet)))
+        if self.vba_template is not None:
+            self.vba_template.apply(wb, self.layout)
+        for ws, build in builders:
+            with self.build_stats.stage(ws.title, ws):
+                build(ws)
+        
+        return wb
+    
+    def _stream_schedule_sheet(self, ws):
+        """Потоковая запись листа ГРАФИК"""
+        xl = _openpyxl()
+        print("  Создание листа 'ГРАФИК' (потоковая запись)...")
+        
+        month_names = ['ЯНВ', 'ФЕВ', 'МАР', 'АПР', 'МАЙ', 'ИЮН', 
+                      'ИЮЛ', 'АВГ', 'СЕН', 'ОКТ', 'НОЯ', 'ДЕК']
+        
+        ws.column_dimensions['A'].width = 6
+        ws.column_dimensions['B'].width = 25
+        ws.freeze_panes = 'C5'
+        
+        styles = self.styles
+        
+        # Стиль области данных для каждой колонки дня (чередование месяцев)
+        conditional = self.conditional_formatting
+        data_styles = []
+        month_starts = []
+        col = 3
+        for month_idx, (year, month, _, days_in_month) in enumerate(self.calendar.months()):
+            month_starts.append((self._month_label(month_names, year, month), days_in_month))
+            ws.merged_cells.add(xl.CellRange(min_col=col, min_row=1, max_col=col + days_in_month - 1, max_row=1))
+            for _ in range(days_in_month):
+                ws.column_dimensions[xl.get_column_letter(col)].width = 3.5
+                if conditional:
+                    styles.apply(ws.column_dimensions[xl.get_column_letter(col)], 'граф_колонка')
+                data_styles.append(f'граф_ячейка_{month_idx % 2}')
+                col += 1
+        last_col = col - 1
+        
+        footer_row = self.layout.schedule_footer_row
+        ws.merged_cells.add(xl.CellRange(min_col=1, min_row=footer_row, max_col=last_col, max_row=footer_row))
+        if conditional:
+            self._add_schedule_rules(ws, last_col)
+        
+        self._write_rows(ws, self._schedule_rows(month_starts, data_styles, last_col))
+        if self.analytics:
+            self._add_coverage_rule(ws, last_col)
+        
+        print(f"  ✓ Лист 'ГРАФИК' создан ({len(data_styles)} дней)")
+    
+    def _schedule_rows(self, month_starts, data_styles, last_col):
+        """Строки потокового листа ГРАФИК для _write_rows
+        
+        month_starts - (заголовок, число дней) месяцев, data_styles - стиль
+        области данных для каждой колонки дня.
+        """
+        day_names = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+        layout = self.layout
+        conditional = self.conditional_formatting
+        
+        def month_cells():
+            col = 3
+            for month_idx, (label, days_in_month) in enumerate(month_starts):
+                yield col, label, f'граф_месяц_{month_idx % 2}'
+                col += days_in_month
+        
+        def day_cells(weekdays):
+            for index in range(len(data_styles)):
+                date_obj = self.calendar.date_at(index)
+                day_code = self.calendar.day_code(date_obj)
+                if not weekdays:
+                    yield 3 + index, date_obj.day, f'граф_число_{day_code}'
+                    continue
+                symbol = ""
+                if day_code == DAY_HOLIDAY:
+                    symbol = " ✶"
+                elif self.calendar.is_short(date_obj):
+                    symbol = " ●"
+                yield 3 + index, f"{day_names[date_obj.weekday()]}{symbol}", f'граф_день_{day_code}'
+        
+        def employee_cells(number):
+            yield 1, number, 'граф_номер'
+            yield 2, None, 'граф_фио'
+            if conditional:
+                return
+            for col, style in enumerate(data_styles, 3):
+                yield col, None, style
+        
+        yield 1, month_cells()
+        yield 2, day_cells(weekdays=False)
+        yield 3, day_cells(weekdays=True)
+        yield 4, [(1, "№", 'граф_шапка_номер'), (2, "ФИО СОТРУДНИКА", 'граф_шапка_фио')]
+        for i in range(self.max_employees):
+            yield layout.schedule_row(i), employee_cells(i + 1)
+        if self.analytics:
+            yield layout.schedule_coverage_row, (
+                (col, value, style) for col, (value, style) in enumerate(self._coverage_row_values(last_col), 1))
+        yield layout.schedule_footer_row, [
+            (1, f"График отпусков {self.company_name} на {self.period_text}", 'граф_подвал')]
+    
+    def _stream_dates_sheet(self, ws):
+        """Потоковая запись служебного листа с датами"""
+        xl = _openpyxl()
+        print("  Создание служебного листа с датами...")
+        
+        styles = self.styles
+        dates = []
+        date_obj = self.calendar.start_date
+        while date_obj <= self.calendar.end_date:
+            dates.append(xl.Cell(ws, row=1, column=1, value=date_obj, style_array=styles["даты_дата"]))
+            date_obj += timedelta(days=1)
+        
+        for c in range(1, len(dates) + 3):
+            ws.column_dimensions[xl.get_column_letter(c)].width = 0.5
+        
+        count_row = self.build_stats.count_row
+        ws.append(count_row([None, None] + dates))
+        # Тип дня и накопленное число праздников (как в _create_dates_sheet)
+        ws.append(count_row([None, None] + list(self.calendar.codes())))
+        ws.append(count_row([None, None] + list(self.calendar.cumulative_counts(DAY_HOLIDAY))))
+        
+        print(f"  ✓ Служебный лист создан ({len(dates)} дней, начинается с колонки C)")
+    
+    def _stream_buffered_sheet(self, ws, build):
+        """Небольшой статичный лист строится в обычном листе-буфере и переносится построчно"""
+        xl = _openpyxl()
+        buffer = xl.Worksheet(ws.parent, title=ws.title)
+        build(buffer)
+        
+        for key, dimension in buffer.column_dimensions.items():
+            if dimension.width:
+                ws.column_dimensions[key].width = dimension.width
+        for merged in buffer.merged_cells.ranges:
+            ws.merged_cells.add(merged.coord)
+        
+        for row in buffer.iter_rows(min_row=1, min_col=1):
+            ws.append(self.build_stats.count_row(
+                [cell if cell.value is not None or cell.has_style else None for cell in row]))
+    
+    def create_vba_macro_file(self, bulk=False, filename=None):
+        """Создание файла с оптимизированным VBA макросом
+        
+        bulk=True - вариант макроса, работающий с листами через массивы
+        (одно чтение СОТРУДНИКИ и одна запись ГРАФИК через Range.Value2).
+        filename - путь или поток: текстовый (StringIO) или двоичный (текст в UTF-8).
+        """
+        print("\nСоздание файла с VBA макросом...")
+        
+        vba_code = self.vba_macro_code(bulk)
+        
+        if filename is None:
+            filename = "vacation_macro_bulk.txt" if bulk else "vacation_macro.txt"
+        
+        try:
+            if hasattr(filename, 'write'):
+                filename.write(vba_code if isinstance(filename, io.TextIOBase) else vba_code.encode('utf-8'))
+                print("✓ Макрос записан в поток")
+                return filename
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(vba_code)
+            print(f"✓ Файл с макросом создан: {filename}")
+            return filename
+        except Exception as e:
+            print(f"✗ Ошибка при создании файла макроса: {e}")
+            return None
+    
+    @property
+    def template_options(self):
+        """Параметры генератора, от которых зависит заготовка книги (все, кроме компании и сотрудников)"""
+        return {
+            'streaming': self.streaming,
+            'max_employees': self.max_employees,
+            'vacation_pairs': self.vacation_pairs,
+            'orientation': self.layout.orientation,
+            'conditional_formatting': self.conditional_formatting,
+            'start_date': self.calendar.start_date,
+            'months': len(self.calendar.months()),
+            'vba_project': self.vba_project,
+        }
+    
+    def department_cells(self):
+        """Ячейки книги, которые зависят от отдела: {лист: {(строка, колонка): значение}}
+        
+        ФИО и даты отпусков сотрудников на листе СОТРУДНИКИ и подпись с названием
+        компании на листе ГРАФИК. Остальное содержимое книги одинаково для всех
+        отделов с теми же периодом и раскладкой (см. TemplateCache).
+        """
+        layout = self.layout
+        employee_cells = {}
+        for emp_idx, employee in enumerate(self.employees):
+            employee_cells[layout.name_cell(emp_idx)] = employee['name']
+            start_col = layout.start_col(emp_idx)
+            for period_idx, (start_date, end_date) in enumerate(employee['periods']):
+                row = layout.period_row(emp_idx, period_idx)
+                employee_cells[row, start_col] = start_date
+                employee_cells[row, start_col + 1] = end_date
+        return {
+            "СОТРУДНИКИ": employee_cells,
+            "ГРАФИК": {(layout.schedule_footer_row, 1): f"График отпусков {self.company_name} на {self.period_text}"},
+        }
+    
+    def vba_macro_code(self, bulk=False):
+        """Текст VBA макроса для книги этого генератора"""
+        update_code = self._vba_update_bulk() if bulk else self._vba_update_cells()
+        return self._vba_header() + update_code + self._vba_incremental() + self._vba_test_data()
+    
+    def _vba_header(self):
+        """Константы, цвета и функции положения ячеек для VBA макроса"""
+        days_in_months = ",".join(str(days) for _, _, _, days in self.calendar.months())
+        start = self.calendar.start_date
+        
+        return "Option Explicit\n\n" + self.layout.vba_constants() + f'''
+Private Const SCHEDULE_START As Date = #{start.month}/{start.day}/{start.year}#
+Private Const SCHEDULE_DAYS As Long = {len(self.calendar)}
+Private Const DAYS_IN_MONTHS As String = "{days_in_months}"
+
+' Цвета ГРАФИК задаются условным форматированием - макрос записывает только значения
+Private Const CONDITIONAL_FORMATTING As Boolean = {self.conditional_formatting}
+
+' Журнал замеров: этапы каждого запуска на скрытом листе {TIMING_SHEET}
+Private Const TIMING_LOG_LIMIT As Long = {TIMING_LOG_LIMIT}
+Private timingPhases As Collection
+Private timingStart As Double
+Private timingRun As Date
+
+' ОБНОВЛЕННЫЕ КОНТРАСТНЫЕ ЦВЕТА для Excel 2010
 Private Const COLOR_MONTH_1 As Long = &HE6E6E6     ' Светло-серый (контрастный)
 Private Const COLOR_MONTH_2 As Long = &HFFFFFF     ' Белый
 Private Const COLOR_WEEKEND As Long = &HD9D9D9     ' Серый для выходных (контрастный)
 Private Const COLOR_HOLIDAY As Long = &H9999FF     ' Красный для праздников
 Private Const COLOR_VACATION As Long = &HCEC6EF    ' Светло-зеленый для отпуска
 
-Private Const DAYS_IN_MONTHS As String = "31,29,31,30,31,30,31,31,30,31,30,31"
+' Положение ячеек сотрудника на листе СОТРУДНИКИ (empIndex и periodIndex с 0)
+Private Function СтрокаФИО(empIndex As Long) As Long
+    СтрокаФИО = NAME_ROW + empIndex * EMP_ROW_STEP
+End Function
 
-Sub ОбновитьГрафик()
+Private Function КолонкаФИО(empIndex As Long) As Long
+    КолонкаФИО = NAME_COL + empIndex * EMP_COL_STEP
+End Function
+
+Private Function СтрокаПериода(empIndex As Long, periodIndex As Long) As Long
+    СтрокаПериода = FIRST_PERIOD_ROW + empIndex * EMP_ROW_STEP + periodIndex
+End Function
+
+Private Function КолонкаНачала(empIndex As Long) As Long
+    КолонкаНачала = FIRST_START_COL + empIndex * EMP_COL_STEP
+End Function
+
+'''
+    
+    def _vba_update_cells(self):
+        """Макрос ОбновитьГрафик с обработкой ячеек по одной"""
+        return '''Sub ОбновитьГрафик()
     ' Макрос для обновления графика отпусков
     ' Обновлено: используются контрастные цвета для Excel 2010
+    Call ПостроитьГрафик(True)
+End Sub
+
+Private Sub ПостроитьГрафик(showMessage As Boolean)
+    ' Полное построение ГРАФИК (showMessage = False - без сообщения, из обработчика изменений)
     
     Dim wsEmployees As Worksheet
     Dim wsSchedule As Worksheet
@@ -793,7 +2029,6 @@ Sub ОбновитьГрафик()
     Dim employeeCount As Long
     Dim vacationCount As Long
     Dim i As Long, j As Long
-    Dim empBlockStart As Long
     
     Dim startDate As Date
     Dim endDate As Date
@@ -809,6 +2044,10 @@ Sub ОбновитьГрафик()
     Dim lastCol As Long
     Dim dictKey As String
     
+    ' Строка ГРАФИК каждого места сотрудника (0 - не выведен) для листа отпечатков
+    Dim slotRows() As Long
+    ReDim slotRows(0 To MAX_EMPLOYEES - 1)
+    
     Dim startTime As Double
     startTime = Timer
     
@@ -825,7 +2064,9 @@ Sub ОбновитьГрафик()
     Set wsSchedule = ThisWorkbook.Worksheets("ГРАФИК")
     Set wsService = ThisWorkbook.Worksheets("ДАТЫ")
     
+    Call НачатьЗамер
     Call ОчиститьГрафик(wsSchedule)
+    Call ЗамерЭтапа("очистка")
     
     ' БЫСТРЫЙ ПОИСК ДАТ: создаем словарь для мгновенного доступа
     Set dateDict = CreateObject("Scripting.Dictionary")
@@ -838,6 +2079,7 @@ Sub ОбновитьГрафик()
             End If
         End If
     Next i
+    Call ЗамерЭтапа("словарь дат")
     
     ' ОСНОВНАЯ ОПТИМИЗАЦИЯ: остановка при пустых ФИО
     Dim stopProcessing As Boolean
@@ -846,8 +2088,7 @@ Sub ОбновитьГрафик()
     For i = 0 To MAX_EMPLOYEES - 1
         If stopProcessing Then Exit For
         
-        empBlockStart = i * BLOCK_COLS + 1
-        Set nameCell = wsEmployees.Cells(3, empBlockStart)
+        Set nameCell = wsEmployees.Cells(СтрокаФИО(i), КолонкаФИО(i))
         
         ' Пропускаем пустые ФИО
         If Trim(nameCell.Value) = "" Then
@@ -856,9 +2097,7 @@ Sub ОбновитьГрафик()
                 Dim emptyCount As Long
                 emptyCount = 0
                 For j = i To Application.Min(i + 2, MAX_EMPLOYEES - 1)
-                    Dim testBlock As Long
-                    testBlock = j * BLOCK_COLS + 1
-                    If Trim(wsEmployees.Cells(3, testBlock).Value) = "" Then
+                    If Trim(wsEmployees.Cells(СтрокаФИО(j), КолонкаФИО(j)).Value) = "" Then
                         emptyCount = emptyCount + 1
                     Else
                         Exit For
@@ -873,7 +2112,8 @@ Sub ОбновитьГрафик()
         End If
         
         employeeCount = employeeCount + 1
-        scheduleRow = employeeCount + 4
+        scheduleRow = SCHEDULE_FIRST_ROW + employeeCount - 1
+        slotRows(i) = scheduleRow
         
         wsSchedule.Cells(scheduleRow, 1).Value = employeeCount
         wsSchedule.Cells(scheduleRow, 2).Value = nameCell.Value
@@ -883,10 +2123,10 @@ Sub ОбновитьГрафик()
         ' Обработка периодов отпуска
         For j = 0 To MAX_PERIODS - 1
             Dim periodRow As Long
-            periodRow = 4 + j
+            periodRow = СтрокаПериода(i, j)
             
-            Set startDateCell = wsEmployees.Cells(periodRow, empBlockStart + 2)
-            Set endDateCell = wsEmployees.Cells(periodRow, empBlockStart + 3)
+            Set startDateCell = wsEmployees.Cells(periodRow, КолонкаНачала(i))
+            Set endDateCell = wsEmployees.Cells(periodRow, КолонкаНачала(i) + 1)
             
             If Not IsEmpty(startDateCell.Value) And Not IsEmpty(endDateCell.Value) Then
                 If IsDate(startDateCell.Value) And IsDate(endDateCell.Value) Then
@@ -905,12 +2145,14 @@ Sub ОбновитьГрафик()
                                 
                                 With wsSchedule.Cells(scheduleRow, dateCol)
                                     .Value = "О"
-                                    .Interior.Color = COLOR_VACATION
-                                    .Font.Bold = True
-                                    .Font.Name = "Arial"
-                                    .Font.Size = 9
-                                    .HorizontalAlignment = xlCenter
-                                    .VerticalAlignment = xlCenter
+                                    If Not CONDITIONAL_FORMATTING Then
+                                        .Interior.Color = COLOR_VACATION
+                                        .Font.Bold = True
+                                        .Font.Name = "Arial"
+                                        .Font.Size = 9
+                                        .HorizontalAlignment = xlCenter
+                                        .VerticalAlignment = xlCenter
+                                    End If
                                 End With
                             End If
                             
@@ -923,8 +2165,14 @@ Sub ОбновитьГрафик()
 
 NextEmployee:
     Next i
+    Call ЗамерЭтапа("сотрудники и отметки")
+    
+    Call ЗаписатьОтпечатки(ДанныеСотрудников(wsEmployees), slotRows)
+    Call ЗамерЭтапа("отпечатки")
     
     wsSchedule.Columns("B:B").AutoFit
+    Call ЗамерЭтапа("ширина колонки ФИО")
+    Call ЗаписатьЗамеры("ОбновитьГрафик", employeeCount)
     
     Application.ScreenUpdating = True
     Application.Calculation = xlCalculationAutomatic
@@ -935,15 +2183,17 @@ NextEmployee:
     Dim elapsedTime As Double
     elapsedTime = endTime - startTime
     
-    MsgBox "График отпусков успешно обновлен!" & vbCrLf & _
-           "Время выполнения: " & Format(elapsedTime, "0.0") & " сек" & vbCrLf & _
-           "Сотрудников: " & employeeCount & vbCrLf & _
-           "Периодов отпуска: " & vacationCount & vbCrLf & _
-           "Использованы контрастные цвета для Excel 2010", _
-           vbInformation, "График обновлен"
-    
-    wsSchedule.Activate
-    wsSchedule.Range("A1").Select
+    If showMessage Then
+        MsgBox "График отпусков успешно обновлен!" & vbCrLf & _
+               "Время выполнения: " & Format(elapsedTime, "0.0") & " сек" & vbCrLf & _
+               "Сотрудников: " & employeeCount & vbCrLf & _
+               "Периодов отпуска: " & vacationCount & vbCrLf & _
+               "Использованы контрастные цвета для Excel 2010", _
+               vbInformation, "График обновлен"
+        
+        wsSchedule.Activate
+        wsSchedule.Range("A1").Select
+    End If
     
     Exit Sub
 
@@ -966,13 +2216,15 @@ Private Sub ОчиститьГрафик(wsSchedule As Worksheet)
     
     lastRow = wsSchedule.Cells(wsSchedule.Rows.Count, "B").End(xlUp).Row
     
-    If lastRow >= 5 Then
-        wsSchedule.Range("A5:B" & lastRow).ClearContents
+    If lastRow >= SCHEDULE_FIRST_ROW Then
+        wsSchedule.Range("A" & SCHEDULE_FIRST_ROW & ":B" & lastRow).ClearContents
         
         lastCol = wsSchedule.Cells(3, wsSchedule.Columns.Count).End(xlToLeft).Column
         
-        If lastCol >= 3 Then
-            For i = 5 To lastRow
+        If lastCol >= 3 And CONDITIONAL_FORMATTING Then
+            wsSchedule.Range(wsSchedule.Cells(SCHEDULE_FIRST_ROW, 3), wsSchedule.Cells(lastRow, lastCol)).ClearContents
+        ElseIf lastCol >= 3 Then
+            For i = SCHEDULE_FIRST_ROW To lastRow
                 For j = 3 To lastCol
                     With wsSchedule.Cells(i, j)
                         .Value = ""
@@ -995,6 +2247,8 @@ Private Sub ВосстановитьЦветаМесяцев(wsSchedule As Works
     Dim monthColor As Long
     Dim daysInMonth As Integer
     
+    If CONDITIONAL_FORMATTING Then Exit Sub
+    
     monthDays = Split(DAYS_IN_MONTHS, ",")
     col = 3
     
@@ -1015,90 +2269,3440 @@ Private Sub ВосстановитьЦветаМесяцев(wsSchedule As Works
     Next i
 End Sub
 
-Sub ТестовыеДанные()
-    ' Процедура для заполнения тестовых данных
+'''
     
-    Dim ws As Worksheet
-    Dim i As Long
-    Dim blockStart As Long
+    def _vba_update_bulk(self):
+        """Макрос ОбновитьГрафик, работающий с листами через массивы"""
+        return '''' Вариант с массивами: СОТРУДНИКИ читается одним обращением к листу,
+' значения ГРАФИК собираются в памяти и записываются одним присваиванием Value2
+
+Sub ОбновитьГрафик()
+    ' Макрос для обновления графика отпусков (работа через массивы)
+    Call ПостроитьГрафик(True)
+End Sub
+
+Private Sub ПостроитьГрафик(showMessage As Boolean)
+    ' Полное построение ГРАФИК (showMessage = False - без сообщения, из обработчика изменений)
     
-    Set ws = ThisWorkbook.Worksheets("СОТРУДНИКИ")
+    Dim wsEmployees As Worksheet
+    Dim wsSchedule As Worksheet
     
-    ' Очищаем только первые 10 сотрудников
-    For i = 0 To 9
-        blockStart = i * BLOCK_COLS + 1
-        ws.Cells(3, blockStart).ClearContents
-        ws.Range(ws.Cells(4, blockStart + 2), ws.Cells(13, blockStart + 3)).ClearContents
-    Next i
+    Dim employeeData As Variant
+    Dim scheduleData() As Variant
     
-    ' Сотрудник 1
-    ws.Cells(3, 1).Value = "Иванов Иван Иванович"
-    ws.Cells(4, 3).Value = DateSerial(2026, 1, 10)
-    ws.Cells(4, 4).Value = DateSerial(2026, 1, 20)
-    ws.Cells(5, 3).Value = DateSerial(2026, 6, 10)
-    ws.Cells(5, 4).Value = DateSerial(2026, 6, 15)
+    Dim employeeCount As Long
+    Dim vacationCount As Long
+    Dim i As Long, j As Long, k As Long
+    Dim emptyCount As Long
+    Dim stopProcessing As Boolean
     
-    ' Сотрудник 2
-    ws.Cells(3, 5).Value = "Петров Петр Петрович"
-    ws.Cells(4, 7).Value = DateSerial(2026, 5, 1)
-    ws.Cells(4, 8).Value = DateSerial(2026, 5, 15)
+    Dim dayCount As Long
+    Dim firstSerial As Double
+    Dim startSerial As Double
+    Dim endSerial As Double
+    Dim firstDay As Long
+    Dim lastDay As Long
     
-    ' Сотрудник 3
-    ws.Cells(3, 9).Value = "Сидоров Сергей Сергеевич"
-    ws.Cells(4, 11).Value = DateSerial(2026, 8, 1)
-    ws.Cells(4, 12).Value = DateSerial(2026, 8, 14)
+    ' Строка ГРАФИК каждого места сотрудника (0 - не выведен) для листа отпечатков
+    Dim slotRows() As Long
+    ReDim slotRows(0 To MAX_EMPLOYEES - 1)
     
-    ' Сотрудник 4
-    ws.Cells(3, 13).Value = "Козлова Анна Михайловна"
-    ws.Cells(4, 15).Value = DateSerial(2026, 7, 1)
-    ws.Cells(4, 16).Value = DateSerial(2026, 7, 14)
-    
-    ' Форматируем даты
-    For i = 0 To 9
-        blockStart = i * BLOCK_COLS + 1
-        ws.Range(ws.Cells(4, blockStart + 2), ws.Cells(13, blockStart + 3)).NumberFormat = "DD.MM.YYYY"
+    Dim startTime As Double
+    startTime = Timer
+    
+    Application.ScreenUpdating = False
+    Application.Calculation = xlCalculationManual
+    Application.EnableEvents = False
+    
+    On Error GoTo ErrorHandler
+    
+    employeeCount = 0
+    vacationCount = 0
+    
+    Set wsEmployees = ThisWorkbook.Worksheets("СОТРУДНИКИ")
+    Set wsSchedule = ThisWorkbook.Worksheets("ГРАФИК")
+    
+    firstSerial = CDbl(SCHEDULE_START)
+    dayCount = SCHEDULE_DAYS
+    
+    Call НачатьЗамер
+    
+    ' Одно чтение всей области данных СОТРУДНИКИ
+    employeeData = ДанныеСотрудников(wsEmployees)
+    Call ЗамерЭтапа("чтение СОТРУДНИКИ")
+    
+    ' Значения ГРАФИК: №, ФИО и по колонке на каждый день года
+    ReDim scheduleData(1 To MAX_EMPLOYEES, 1 To 2 + dayCount)
+    
+    For i = 0 To MAX_EMPLOYEES - 1
+        If stopProcessing Then Exit For
+        
+        ' Пропускаем пустые ФИО
+        If ТекстЯчейки(employeeData(СтрокаФИО(i), КолонкаФИО(i))) = "" Then
+            ' Если три подряд пустых ФИО, останавливаем обработку
+            If i > 2 Then
+                emptyCount = 0
+                For j = i To Application.Min(i + 2, MAX_EMPLOYEES - 1)
+                    If ТекстЯчейки(employeeData(СтрокаФИО(j), КолонкаФИО(j))) = "" Then
+                        emptyCount = emptyCount + 1
+                    Else
+                        Exit For
+                    End If
+                Next j
+                
+                If emptyCount >= 3 Then
+                    stopProcessing = True
+                End If
+            End If
+            GoTo NextEmployee
+        End If
+        
+        employeeCount = employeeCount + 1
+        slotRows(i) = SCHEDULE_FIRST_ROW + employeeCount - 1
+        scheduleData(employeeCount, 1) = employeeCount
+        scheduleData(employeeCount, 2) = employeeData(СтрокаФИО(i), КолонкаФИО(i))
+        
+        ' Обработка периодов отпуска
+        For j = 0 To MAX_PERIODS - 1
+            If ДатаЯчейки(employeeData(СтрокаПериода(i, j), КолонкаНачала(i)), startSerial) And _
+               ДатаЯчейки(employeeData(СтрокаПериода(i, j), КолонкаНачала(i) + 1), endSerial) Then
+                If endSerial >= startSerial Then
+                    vacationCount = vacationCount + 1
+                    
+                    ' Дни отпуска внутри периода графика (с 0)
+                    firstDay = startSerial - firstSerial
+                    lastDay = endSerial - firstSerial
+                    If firstDay < 0 Then firstDay = 0
+                    If lastDay > dayCount - 1 Then lastDay = dayCount - 1
+                    
+                    For k = firstDay To lastDay
+                        scheduleData(employeeCount, 3 + k) = "О"
+                    Next k
+                End If
+            End If
+        Next j
+
+NextEmployee:
     Next i
+    Call ЗамерЭтапа("отметки в массиве")
     
-    ' Пересчитываем формулы
-    ws.Calculate
+    ' Одна запись значений и восстановление оформления целыми диапазонами
+    wsSchedule.Cells(SCHEDULE_FIRST_ROW, 1).Resize(MAX_EMPLOYEES, 2 + dayCount).Value2 = scheduleData
+    Call ЗамерЭтапа("запись ГРАФИК")
+    If Not CONDITIONAL_FORMATTING Then
+        Call ВосстановитьЦветаМесяцев(wsSchedule)
+        Call ОтметитьОтпуска(wsSchedule, scheduleData, employeeCount, dayCount)
+        Call ЗамерЭтапа("оформление")
+    End If
     
-    MsgBox "Тестовые данные для 4 сотрудников добавлены!" & vbCrLf & _
-           "Для удаления сотрудника оставьте поле ФИО пустым." & vbCrLf & _
-           "Ячейки размечены для защиты (защита не включена).", _
-           vbInformation, "Тестовые данные"
+    Call ЗаписатьОтпечатки(employeeData, slotRows)
+    Call ЗамерЭтапа("отпечатки")
+    
+    wsSchedule.Columns("B:B").AutoFit
+    Call ЗамерЭтапа("ширина колонки ФИО")
+    Call ЗаписатьЗамеры("ОбновитьГрафик (массивы)", employeeCount)
+    
+    Application.ScreenUpdating = True
+    Application.Calculation = xlCalculationAutomatic
+    Application.EnableEvents = True
+    
+    Dim endTime As Double
+    endTime = Timer
+    Dim elapsedTime As Double
+    elapsedTime = endTime - startTime
+    
+    If showMessage Then
+        MsgBox "График отпусков успешно обновлен!" & vbCrLf & _
+               "Время выполнения: " & Format(elapsedTime, "0.0") & " сек" & vbCrLf & _
+               "Сотрудников: " & employeeCount & vbCrLf & _
+               "Периодов отпуска: " & vacationCount & vbCrLf & _
+               "Использованы контрастные цвета для Excel 2010", _
+               vbInformation, "График обновлен"
+        
+        wsSchedule.Activate
+        wsSchedule.Range("A1").Select
+    End If
+    
+    Exit Sub
+
+ErrorHandler:
+    Application.ScreenUpdating = True
+    Application.Calculation = xlCalculationAutomatic
+    Application.EnableEvents = True
+    
+    MsgBox "Ошибка при обновлении графика!" & vbCrLf & _
+           "Код ошибки: " & Err.Number & vbCrLf & _
+           "Описание: " & Err.Description & vbCrLf & _
+           "Проверьте корректность введенных дат.", _
+           vbCritical, "Ошибка"
 End Sub
-'''
+
+Private Sub ВосстановитьЦветаМесяцев(wsSchedule As Worksheet)
+    ' Контрастное чередование цветов месяцев: одна операция на месяц
+    
+    Dim monthDays() As String
+    Dim i As Long
+    Dim col As Long
+    Dim daysInMonth As Long
+    Dim monthRange As Range
+    
+    monthDays = Split(DAYS_IN_MONTHS, ",")
+    col = 3
+    
+    For i = 0 To UBound(monthDays)
+        daysInMonth = CLng(monthDays(i))
+        Set monthRange = wsSchedule.Cells(SCHEDULE_FIRST_ROW, col).Resize(MAX_EMPLOYEES, daysInMonth)
         
-        filename = "vacation_macro.txt"
+        If (i Mod 2) = 0 Then
+            monthRange.Interior.Color = COLOR_MONTH_1  ' Четные месяцы: светло-серый
+        Else
+            monthRange.Interior.Color = COLOR_MONTH_2  ' Нечетные месяцы: белый
+        End If
+        monthRange.Font.Bold = False
         
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(vba_code)
-            print(f"✓ Файл с макросом создан: {filename}")
-            return filename
-        except Exception as e:
-            print(f"✗ Ошибка при создании файла макроса: {e}")
-            return None
+        col = col + daysInMonth
+    Next i
+End Sub
 
+Private Sub ОтметитьОтпуска(wsSchedule As Worksheet, scheduleData() As Variant, _
+                            employeeCount As Long, dayCount As Long)
+    ' Дни отпуска собираются в непрерывные диапазоны и оформляются пачками через Union
+    Const UNION_BATCH As Long = 50   ' Диапазонов отпуска в одном Union
+    
+    Dim vacationRange As Range
+    Dim runRange As Range
+    Dim areaCount As Long
+    Dim i As Long, k As Long
+    Dim runStart As Long
+    
+    For i = 1 To employeeCount
+        k = 1
+        Do While k <= dayCount
+            If scheduleData(i, 2 + k) = "О" Then
+                runStart = k
+                Do While k < dayCount
+                    If scheduleData(i, 3 + k) <> "О" Then Exit Do
+                    k = k + 1
+                Loop
+                
+                Set runRange = wsSchedule.Cells(SCHEDULE_FIRST_ROW + i - 1, 2 + runStart).Resize(1, k - runStart + 1)
+                If vacationRange Is Nothing Then
+                    Set vacationRange = runRange
+                Else
+                    Set vacationRange = Union(vacationRange, runRange)
+                End If
+                
+                areaCount = areaCount + 1
+                If areaCount >= UNION_BATCH Then
+                    Call ОформитьОтпуск(vacationRange)
+                    Set vacationRange = Nothing
+                    areaCount = 0
+                End If
+            End If
+            k = k + 1
+        Loop
+    Next i
+    
+    If Not vacationRange Is Nothing Then
+        Call ОформитьОтпуск(vacationRange)
+    End If
+End Sub
 
-def main():
-    """Основная функция"""
-    print("=" * 70)
-    print("ГЕНЕРАТОР ГРАФИКА ОТПУСКОВ С VBA МАКРОСОМ")
-    print("Версия с контрастными цветами (защита отключена)")
-    print("=" * 70)
+'''
     
-    company_name = input("\nВведите название компании: ").strip()
-    if not company_name:
-        company_name = "ООО РОГА И КОПЫТА"
+    def _vba_incremental(self):
+        """Общая часть обоих вариантов макроса: отпечатки сотрудников и инкрементальное обновление"""
+        return f'''' ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ: на листе {FINGERPRINT_SHEET} для каждого места сотрудника
+' хранятся отпечаток ФИО и периодов отпуска и строка ГРАФИК. После изменения ячеек
+' СОТРУДНИКИ перерисовываются только строки сотрудников с новым отпечатком.
+
+Public Sub ОбновитьИзменения(ByVal Target As Range)
+    ' Вызывается из Worksheet_Change листа СОТРУДНИКИ (файл vacation_sheet_module.txt)
+    
+    Dim wsEmployees As Worksheet
+    Dim wsSchedule As Worksheet
+    Dim wsPrints As Worksheet
+    Dim changedArea As Range
+    Dim area As Range
+    Dim changed As Object
+    Dim employeeData As Variant
+    Dim empIndex As Variant
+    Dim fingerprint As String
+    Dim stored As String
+    Dim scheduleRow As Long
+    Dim i As Long
+    
+    Set wsEmployees = Target.Worksheet
+    Set changedArea = Intersect(Target, wsEmployees.Range(wsEmployees.Cells(1, 1), _
+        wsEmployees.Cells(СтрокаПериода(MAX_EMPLOYEES - 1, MAX_PERIODS - 1), КолонкаНачала(MAX_EMPLOYEES - 1) + 1)))
+    If changedArea Is Nothing Then Exit Sub
+    
+    Application.ScreenUpdating = False
+    Application.EnableEvents = False
+    On Error GoTo ErrorHandler
+    
+    ' Места сотрудников, затронутые изменением: по колонкам (блоки) или по строкам (таблица)
+    Set changed = CreateObject("Scripting.Dictionary")
+    For Each area In changedArea.Areas
+        If EMP_COL_STEP > 0 Then
+            For i = area.Column To area.Column + area.Columns.Count - 1
+                Call ДобавитьМесто(changed, (i - NAME_COL) \\ EMP_COL_STEP)
+            Next i
+        Else
+            For i = area.Row To area.Row + area.Rows.Count - 1
+                Call ДобавитьМесто(changed, (i - FIRST_PERIOD_ROW) \\ EMP_ROW_STEP)
+            Next i
+        End If
+    Next area
+    
+    Call НачатьЗамер
+    Set wsSchedule = ThisWorkbook.Worksheets("ГРАФИК")
+    Set wsPrints = ЛистОтпечатков()
+    employeeData = ДанныеСотрудников(wsEmployees)
+    Call ЗамерЭтапа("чтение СОТРУДНИКИ")
+    
+    For Each empIndex In changed.Keys
+        fingerprint = ОтпечатокСотрудника(employeeData, CLng(empIndex))
+        stored = ТекстЯчейки(wsPrints.Cells(empIndex + 2, 1).Value2)
+        
+        If fingerprint <> stored Then
+            If ЕстьФИО(fingerprint) <> ЕстьФИО(stored) Then
+                ' Добавлено или удалено ФИО: строки ГРАФИК сдвигаются, нужен полный пересчет
+                Call ПостроитьГрафик(False)
+                GoTo Finish
+            End If
+            
+            scheduleRow = Val(ТекстЯчейки(wsPrints.Cells(empIndex + 2, 2).Value2))
+            If scheduleRow > 0 Then
+                Call ПерерисоватьСтроку(wsSchedule, scheduleRow, employeeData, CLng(empIndex))
+            End If
+            wsPrints.Cells(empIndex + 2, 1).Value2 = fingerprint
+        End If
+    Next empIndex
+    Call ЗамерЭтапа("перерисовка строк")
+    Call ЗаписатьЗамеры("ОбновитьИзменения", changed.Count)
+
+Finish:
+    Application.ScreenUpdating = True
+    Application.EnableEvents = True
+    Exit Sub
+
+ErrorHandler:
+    Application.ScreenUpdating = True
+    Application.EnableEvents = True
+    
+    MsgBox "Ошибка при обновлении графика!" & vbCrLf & _
+           "Код ошибки: " & Err.Number & vbCrLf & _
+           "Описание: " & Err.Description, _
+           vbCritical, "Ошибка"
+End Sub
+
+Private Sub ДобавитьМесто(changed As Object, empIndex As Long)
+    If empIndex >= 0 And empIndex < MAX_EMPLOYEES Then changed(empIndex) = True
+End Sub
+
+Private Sub ПерерисоватьСтроку(wsSchedule As Worksheet, scheduleRow As Long, _
+                               employeeData As Variant, empIndex As Long)
+    ' Строка ГРАФИК одного сотрудника: ФИО, отметки отпуска и оформление
+    
+    Dim rowData() As Variant
+    Dim j As Long, k As Long
+    Dim startSerial As Double
+    Dim endSerial As Double
+    Dim firstDay As Long
+    Dim lastDay As Long
+    
+    ReDim rowData(1 To 1, 1 To SCHEDULE_DAYS)
+    
+    wsSchedule.Cells(scheduleRow, 2).Value2 = employeeData(СтрокаФИО(empIndex), КолонкаФИО(empIndex))
+    If Not CONDITIONAL_FORMATTING Then Call ЦветаМесяцевСтроки(wsSchedule, scheduleRow)
+    
+    For j = 0 To MAX_PERIODS - 1
+        If ДатаЯчейки(employeeData(СтрокаПериода(empIndex, j), КолонкаНачала(empIndex)), startSerial) And _
+           ДатаЯчейки(employeeData(СтрокаПериода(empIndex, j), КолонкаНачала(empIndex) + 1), endSerial) Then
+            firstDay = startSerial - CDbl(SCHEDULE_START)
+            lastDay = endSerial - CDbl(SCHEDULE_START)
+            If firstDay < 0 Then firstDay = 0
+            If lastDay > SCHEDULE_DAYS - 1 Then lastDay = SCHEDULE_DAYS - 1
+            
+            If endSerial >= startSerial And lastDay >= firstDay Then
+                For k = firstDay To lastDay
+                    rowData(1, k + 1) = "О"
+                Next k
+                If Not CONDITIONAL_FORMATTING Then
+                    Call ОформитьОтпуск(wsSchedule.Cells(scheduleRow, 3 + firstDay).Resize(1, lastDay - firstDay + 1))
+                End If
+            End If
+        End If
+    Next j
+    
+    wsSchedule.Cells(scheduleRow, 3).Resize(1, SCHEDULE_DAYS).Value2 = rowData
+End Sub
+
+Private Sub ЦветаМесяцевСтроки(wsSchedule As Worksheet, rowNum As Long)
+    ' Чередование цветов месяцев в одной строке: одна операция на месяц
+    
+    Dim monthDays() As String
+    Dim i As Long
+    Dim col As Long
+    Dim monthRange As Range
+    
+    monthDays = Split(DAYS_IN_MONTHS, ",")
+    col = 3
+    
+    For i = 0 To UBound(monthDays)
+        Set monthRange = wsSchedule.Cells(rowNum, col).Resize(1, CLng(monthDays(i)))
+        If (i Mod 2) = 0 Then
+            monthRange.Interior.Color = COLOR_MONTH_1
+        Else
+            monthRange.Interior.Color = COLOR_MONTH_2
+        End If
+        monthRange.Font.Bold = False
+        col = col + CLng(monthDays(i))
+    Next i
+End Sub
+
+Private Sub ОформитьОтпуск(vacationRange As Range)
+    With vacationRange
+        .Interior.Color = COLOR_VACATION
+        .Font.Bold = True
+        .Font.Name = "Arial"
+        .Font.Size = 9
+        .HorizontalAlignment = xlCenter
+        .VerticalAlignment = xlCenter
+    End With
+End Sub
+
+Private Function ДанныеСотрудников(wsEmployees As Worksheet) As Variant
+    ' Вся область данных СОТРУДНИКИ одним чтением Value2
+    ДанныеСотрудников = wsEmployees.Range(wsEmployees.Cells(1, 1), _
+        wsEmployees.Cells(СтрокаПериода(MAX_EMPLOYEES - 1, MAX_PERIODS - 1), КолонкаНачала(MAX_EMPLOYEES - 1) + 1)).Value2
+End Function
+
+Private Function ОтпечатокСотрудника(employeeData As Variant, empIndex As Long) As String
+    ' ФИО и допустимые периоды отпуска номерами дат (как employee_fingerprint в graf.py)
+    
+    Dim result As String
+    Dim j As Long
+    Dim startSerial As Double
+    Dim endSerial As Double
+    
+    result = "{FINGERPRINT_VERSION}" & ТекстЯчейки(employeeData(СтрокаФИО(empIndex), КолонкаФИО(empIndex)))
+    For j = 0 To MAX_PERIODS - 1
+        If ДатаЯчейки(employeeData(СтрокаПериода(empIndex, j), КолонкаНачала(empIndex)), startSerial) And _
+           ДатаЯчейки(employeeData(СтрокаПериода(empIndex, j), КолонкаНачала(empIndex) + 1), endSerial) Then
+            If endSerial >= startSerial Then
+                result = result & "|" & CLng(startSerial) & "-" & CLng(endSerial)
+            End If
+        End If
+    Next j
+    
+    ОтпечатокСотрудника = result
+End Function
+
+Private Function ЕстьФИО(fingerprint As String) As Boolean
+    ЕстьФИО = Len(fingerprint) > {len(FINGERPRINT_VERSION)} And Mid(fingerprint, {len(FINGERPRINT_VERSION) + 1}, 1) <> "|"
+End Function
+
+Private Sub ЗаписатьОтпечатки(employeeData As Variant, slotRows() As Long)
+    ' Отпечатки всех мест сотрудников после полного построения ГРАФИК (одна запись)
+    
+    Dim fingerprints() As Variant
+    Dim i As Long
+    
+    ReDim fingerprints(1 To MAX_EMPLOYEES, 1 To 2)
+    For i = 0 To MAX_EMPLOYEES - 1
+        fingerprints(i + 1, 1) = ОтпечатокСотрудника(employeeData, i)
+        fingerprints(i + 1, 2) = slotRows(i)
+    Next i
+    
+    ЛистОтпечатков().Cells(2, 1).Resize(MAX_EMPLOYEES, 2).Value2 = fingerprints
+End Sub
+
+Private Function ЛистОтпечатков() As Worksheet
+    ' Служебный лист отпечатков (создается скрытым в книгах, построенных до его появления)
+    
+    On Error Resume Next
+    Set ЛистОтпечатков = ThisWorkbook.Worksheets("{FINGERPRINT_SHEET}")
+    On Error GoTo 0
+    
+    If ЛистОтпечатков Is Nothing Then
+        Set ЛистОтпечатков = ThisWorkbook.Worksheets.Add(After:=ThisWorkbook.Worksheets(ThisWorkbook.Worksheets.Count))
+        ЛистОтпечатков.Name = "{FINGERPRINT_SHEET}"
+        ЛистОтпечатков.Cells(1, 1).Value = "Отпечаток сотрудника"
+        ЛистОтпечатков.Cells(1, 2).Value = "Строка ГРАФИК"
+        ЛистОтпечатков.Visible = xlSheetHidden
+    End If
+End Function
+
+Private Sub НачатьЗамер()
+    ' Начало запуска: этапы отмечаются ЗамерЭтапа, записываются ЗаписатьЗамеры
+    Set timingPhases = New Collection
+    timingRun = Now
+    timingStart = Timer
+End Sub
+
+Private Sub ЗамерЭтапа(ByVal phase As String)
+    ' Время этапа - от предыдущей отметки
+    Dim currentTime As Double
+    currentTime = Timer
+    If timingPhases Is Nothing Then Set timingPhases = New Collection
+    timingPhases.Add Array(phase, currentTime - timingStart)
+    timingStart = currentTime
+End Sub
+
+Private Sub ЗаписатьЗамеры(ByVal operation As String, ByVal employeeCount As Long)
+    ' Этапы запуска и их сумма - в конец скрытого листа {TIMING_SHEET} (одна запись),
+    ' хранятся последние TIMING_LOG_LIMIT строк
+    
+    Dim wsLog As Worksheet
+    Dim logData() As Variant
+    Dim phase As Variant
+    Dim total As Double
+    Dim nextRow As Long
+    Dim i As Long
+    
+    If timingPhases Is Nothing Then Exit Sub
+    If timingPhases.Count = 0 Then Exit Sub
+    
+    ReDim logData(1 To timingPhases.Count + 1, 1 To 5)
+    For i = 1 To timingPhases.Count
+        phase = timingPhases(i)
+        logData(i, 1) = timingRun
+        logData(i, 2) = operation
+        logData(i, 3) = phase(0)
+        logData(i, 4) = phase(1)
+        logData(i, 5) = employeeCount
+        total = total + phase(1)
+    Next i
+    logData(timingPhases.Count + 1, 1) = timingRun
+    logData(timingPhases.Count + 1, 2) = operation
+    logData(timingPhases.Count + 1, 3) = "всего"
+    logData(timingPhases.Count + 1, 4) = total
+    logData(timingPhases.Count + 1, 5) = employeeCount
+    
+    Set wsLog = ЛистЖурнала()
+    nextRow = wsLog.Cells(wsLog.Rows.Count, 1).End(xlUp).Row + 1
+    If nextRow - 2 + UBound(logData, 1) > TIMING_LOG_LIMIT Then
+        ' Старые запуски удаляются, заголовок остается
+        wsLog.Rows("2:" & (nextRow - 1)).Delete
+        nextRow = 2
+    End If
+    wsLog.Cells(nextRow, 1).Resize(UBound(logData, 1), 5).Value = logData
+    Set timingPhases = Nothing
+End Sub
+
+Private Function ЛистЖурнала() As Worksheet
+    ' Скрытый лист замеров (создается при первом запуске макроса, активный лист не меняется)
+    
+    Dim activeWs As Object
+    
+    On Error Resume Next
+    Set ЛистЖурнала = ThisWorkbook.Worksheets("{TIMING_SHEET}")
+    On Error GoTo 0
+    
+    If ЛистЖурнала Is Nothing Then
+        Set activeWs = ActiveSheet
+        Set ЛистЖурнала = ThisWorkbook.Worksheets.Add(After:=ThisWorkbook.Worksheets(ThisWorkbook.Worksheets.Count))
+        ЛистЖурнала.Name = "{TIMING_SHEET}"
+        ЛистЖурнала.Range("A1:E1").Value = Array("Запуск", "Макрос", "Этап", "Секунд", "Сотрудников")
+        ЛистЖурнала.Columns("A").NumberFormat = "DD.MM.YYYY HH:MM:SS"
+        ЛистЖурнала.Columns("D").NumberFormat = "0.000"
+        ЛистЖурнала.Visible = xlSheetHidden
+        activeWs.Activate
+    End If
+End Function
+
+Private Function ТекстЯчейки(cellValue As Variant) As String
+    If IsError(cellValue) Then
+        ТекстЯчейки = ""
+    Else
+        ТекстЯчейки = Trim(CStr(cellValue))
+    End If
+End Function
+
+Private Function ДатаЯчейки(cellValue As Variant, ByRef serial As Double) As Boolean
+    ' Value2 возвращает даты числами, строки вида ДД.ММ.ГГГГ тоже принимаются
+    ДатаЯчейки = False
+    If IsError(cellValue) Or IsEmpty(cellValue) Then Exit Function
+    
+    If VarType(cellValue) = vbDouble Then
+        serial = Int(cellValue)
+        ДатаЯчейки = True
+    ElseIf VarType(cellValue) = vbString Then
+        If IsDate(cellValue) Then
+            serial = Int(CDbl(CDate(cellValue)))
+            ДатаЯчейки = True
+        End If
+    End If
+End Function
+
+'''
+    
+    @staticmethod
+    def vba_sheet_module_code():
+        """Код модуля листа СОТРУДНИКИ: обработчик изменений вызывает ОбновитьИзменения"""
+        return '''' Код модуля листа СОТРУДНИКИ: в редакторе VBA (Alt+F11) дважды щелкните
+' лист СОТРУДНИКИ в окне Project и вставьте этот текст. После изменения ФИО или
+' дат отпуска перерисовываются только строки ГРАФИК измененных сотрудников.
+
+Option Explicit
+
+Private Sub Worksheet_Change(ByVal Target As Range)
+    ОбновитьИзменения Target
+End Sub
+'''
+    
+    def create_vba_sheet_module_file(self, filename="vacation_sheet_module.txt"):
+        """Создание файла с кодом модуля листа СОТРУДНИКИ (инкрементальное обновление)"""
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(self.vba_sheet_module_code())
+            print(f"✓ Код модуля листа СОТРУДНИКИ создан: {filename}")
+            return filename
+        except Exception as e:
+            print(f"✗ Ошибка при создании файла модуля листа: {e}")
+            return None
+    
+    def _vba_test_data(self):
+        """Процедура заполнения тестовых данных"""
+        return '''Sub ТестовыеДанные()
+    ' Процедура для заполнения тестовых данных
+    
+    Dim ws As Worksheet
+    Dim i As Long, j As Long
+    
+    Set ws = ThisWorkbook.Worksheets("СОТРУДНИКИ")
+    
+    ' Очищаем только первые 10 сотрудников
+    For i = 0 To Application.Min(9, MAX_EMPLOYEES - 1)
+        ws.Cells(СтрокаФИО(i), КолонкаФИО(i)).ClearContents
+        For j = 0 To MAX_PERIODS - 1
+            ws.Cells(СтрокаПериода(i, j), КолонкаНачала(i)).Resize(1, 2).ClearContents
+            ws.Cells(СтрокаПериода(i, j), КолонкаНачала(i)).Resize(1, 2).NumberFormat = "DD.MM.YYYY"
+        Next j
+    Next i
+    
+    ' Сотрудник 1
+    Call ЗаписатьТестовыйПериод(ws, 0, 0, "Иванов Иван Иванович", ДатаПериода(0, 10), ДатаПериода(0, 20))
+    Call ЗаписатьТестовыйПериод(ws, 0, 1, "Иванов Иван Иванович", ДатаПериода(5, 10), ДатаПериода(5, 15))
+    
+    ' Сотрудник 2
+    Call ЗаписатьТестовыйПериод(ws, 1, 0, "Петров Петр Петрович", ДатаПериода(4, 1), ДатаПериода(4, 15))
+    
+    ' Сотрудник 3
+    Call ЗаписатьТестовыйПериод(ws, 2, 0, "Сидоров Сергей Сергеевич", ДатаПериода(7, 1), ДатаПериода(7, 14))
+    
+    ' Сотрудник 4
+    Call ЗаписатьТестовыйПериод(ws, 3, 0, "Козлова Анна Михайловна", ДатаПериода(6, 1), ДатаПериода(6, 14))
+    
+    ' Пересчитываем формулы
+    ws.Calculate
+    
+    MsgBox "Тестовые данные для 4 сотрудников добавлены!" & vbCrLf & _
+           "Для удаления сотрудника оставьте поле ФИО пустым." & vbCrLf & _
+           "Ячейки размечены для защиты (защита не включена).", _
+           vbInformation, "Тестовые данные"
+End Sub
+
+Private Function ДатаПериода(monthOffset As Long, dayOfMonth As Long) As Date
+    ' Дата в месяце с номером monthOffset от начала периода графика
+    ДатаПериода = DateSerial(Year(SCHEDULE_START), Month(SCHEDULE_START) + monthOffset, dayOfMonth)
+End Function
+
+Private Sub ЗаписатьТестовыйПериод(ws As Worksheet, empIndex As Long, periodIndex As Long, _
+                                   fullName As String, startDate As Date, endDate As Date)
+    If empIndex >= MAX_EMPLOYEES Or periodIndex >= MAX_PERIODS Then Exit Sub
+    
+    ws.Cells(СтрокаФИО(empIndex), КолонкаФИО(empIndex)).Value = fullName
+    ws.Cells(СтрокаПериода(empIndex, periodIndex), КолонкаНачала(empIndex)).Value = startDate
+    ws.Cells(СтрокаПериода(empIndex, periodIndex), КолонкаНачала(empIndex) + 1).Value = endDate
+End Sub
+'''
+
+class VacationMatrix:
+    """Матрица занятости сотрудники × дни года, вычисляемая на NumPy
+    
+    Принимает все периоды отпуска разом в виде массивов (номер сотрудника,
+    начало, конец). Периоды обрезаются по году календаря, пересекающиеся
+    периоды одного сотрудника учитываются один раз. NumPy - необязательная
+    зависимость, нужна только для этого класса.
+    """
+    
+    def __init__(self, calendar_days, employees, starts, ends, employee_count=None):
+        np = _load_numpy()
+        if np is None:
+            raise ImportError("Для VacationMatrix нужен NumPy: pip install numpy")
+        
+        self.calendar = calendar_days
+        employees = np.asarray(employees, dtype=np.int64)
+        if employee_count is None:
+            employee_count = int(employees.max()) + 1 if employees.size else 0
+        self.employee_count = employee_count
+        
+        day_count = len(calendar_days)
+        first = self._day_offsets(starts)
+        last = self._day_offsets(ends)
+        
+        valid = (last >= first) & (last >= 0) & (first < day_count)
+        employees = employees[valid]
+        first = np.clip(first[valid], 0, day_count - 1)
+        last = np.clip(last[valid], 0, day_count - 1)
+        
+        # Разностный массив: +1 в день начала, -1 на следующий день после конца,
+        # накопленная сумма по строке дает число периодов, покрывающих день
+        width = day_count + 1
+        size = employee_count * width
+        diff = (np.bincount(employees * width + first, minlength=size)
+                - np.bincount(employees * width + last + 1, minlength=size))
+        diff = diff.reshape(employee_count, width)[:, :day_count].astype(np.int16)
+        self.occupancy = np.cumsum(diff, axis=1, dtype=np.int16) > 0
+    
+    def _day_offsets(self, dates):
+        """Номера дней от начала календаря для массива дат"""
+        np = _load_numpy()
+        if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+            first_day = np.datetime64(self.calendar.start_date, 'D')
+            return (dates.astype('datetime64[D]') - first_day).astype(np.int64)
+        # Для списков date/datetime toordinal заметно быстрее преобразования в datetime64
+        first_ordinal = self.calendar.start_date.toordinal()
+        return np.fromiter((date.toordinal() - first_ordinal for date in dates), dtype=np.int64)
+    
+    @classmethod
+    def from_employees(cls, calendar_days, employees):
+        """Матрица по списку (ФИО, [(начало, конец), ...]) как у ScheduleRenderer.read_employees"""
+        indexes, starts, ends = [], [], []
+        for emp_idx, (_, periods) in enumerate(employees):
+            for start, end in periods:
+                indexes.append(emp_idx)
+                starts.append(start)
+                ends.append(end)
+        return cls(calendar_days, indexes, starts, ends, employee_count=len(employees))
+    
+    def holiday_mask(self):
+        """Праздничные дни года (как на листе ПРАЗДНИКИ)"""
+        np = _load_numpy()
+        codes = np.frombuffer(self.calendar.codes(), dtype=np.uint8)
+        return codes == DAY_HOLIDAY
+    
+    def totals(self):
+        """Календарные дни отпуска каждого сотрудника без праздничных дней"""
+        return (self.occupancy & ~self.holiday_mask()).sum(axis=1)
+    
+    def monthly_totals(self):
+        """Дни отпуска без праздников по месяцам: матрица сотрудники × месяцы периода"""
+        np = _load_numpy()
+        month_starts = [first for _, _, first, _ in self.calendar.months()]
+        days = (self.occupancy & ~self.holiday_mask()).astype(np.int32)
+        return np.add.reduceat(days, month_starts, axis=1)
+    
+    def daily_absent(self):
+        """Количество сотрудников в отпуске по дням периода"""
+        return self.occupancy.sum(axis=0)
+
+
+# Пересечение отпусков двух сотрудников одной команды (даты - общая часть отпусков)
+VacationOverlap = collections.namedtuple('VacationOverlap', 'team first second start end working_days')
+# Дни подряд, когда на работе меньше required сотрудников команды (present - наименьшее число на работе)
+CoverageGap = collections.namedtuple('CoverageGap', 'team start end present required')
+
+
+# ФИО свободного места листа СОТРУДНИКИ, которое заполняет генератор
+PLACEHOLDER_NAME = re.compile(r'Сотрудник \d+')
+
+
+def is_placeholder_slot(name, periods):
+    """Свободное место листа: ФИО "Сотрудник N" от генератора и ни одной даты периода"""
+    return (PLACEHOLDER_NAME.fullmatch(str(name)) is not None
+            and all(value in (None, "") for period in periods for value in period))
+
+
+def assigned_employees(employees):
+    """Сотрудники (ФИО, периоды) без свободных мест листа - для аналитики, проверки и сводки"""
+    return [(name, periods) for name, periods in employees if not is_placeholder_slot(name, periods)]
+
+
+def merged_day_spans(periods, first_ordinal, day_count):
+    """Периоды [(начало, конец), ...] как отрезки номеров дней графика (первый, последний)
+    
+    Периоды обрезаются по графику из day_count дней с порядковым номером даты
+    first_ordinal у первого дня, пересекающиеся и смежные объединяются.
+    """
+    spans = sorted((max(start.toordinal() - first_ordinal, 0), min(end.toordinal() - first_ordinal, day_count - 1))
+                   for start, end in periods)
+    current = None
+    for first, last in spans:
+        if last < first:
+            continue
+        if current is not None and first <= current[1] + 1:
+            current[1] = max(current[1], last)
+            continue
+        if current is not None:
+            yield current[0], current[1]
+        current = [first, last]
+    if current is not None:
+        yield current[0], current[1]
+
+
+class VacationAnalytics:
+    """Аналитика отпусков: сотрудники в отпуске по дням, пересечения отпусков внутри
+    команды и рабочие дни, когда на работе меньше заданного минимума
+    
+    Периоды обрезаются по календарю графика, свои пересекающиеся или смежные
+    периоды сотрудника объединяются. Отрезки каждой команды сортируются по
+    началу и обходятся один раз (sweep line): число сотрудников в отпуске по
+    дням - разностный массив, пересечения - куча активных отрезков по дате
+    конца. Время O(P log P + D + K) для P периодов, D дней и K пересечений,
+    NumPy не нужен.
+    """
+    
+    def __init__(self, calendar_days, employees, teams=None):
+        """employees - список (ФИО, [(начало, конец), ...]), teams - команды сотрудников (по умолчанию одна)"""
+        self.calendar = calendar_days
+        self.names = []
+        self.team_sizes = collections.Counter()
+        self._intervals = {}  # команда -> [(первый день, последний день, номер сотрудника)]
+        
+        day_count = len(calendar_days)
+        first_ordinal = calendar_days.start_date.toordinal()
+        for emp_idx, (name, periods) in enumerate(employees):
+            team = teams[emp_idx] if teams is not None else ""
+            self.names.append(name)
+            self.team_sizes[team] += 1
+            self._intervals.setdefault(team, []).extend(
+                (first, last, emp_idx) for first, last in merged_day_spans(periods, first_ordinal, day_count))
+        
+        for intervals in self._intervals.values():
+            intervals.sort()
+        
+        # Даты дней и число рабочих дней до каждого дня - для ответов без обращений к календарю
+        self._dates = [calendar_days.date_at(index) for index in range(day_count)]
+        self._working = array('l', [0]) + calendar_days.cumulative_counts(DAY_WORKING)
+    
+    @property
+    def teams(self):
+        return list(self.team_sizes)
+    
+    def daily_absent(self, team=None):
+        """Число сотрудников в отпуске по дням периода (team=None - все команды)"""
+        diff = [0] * (len(self.calendar) + 1)
+        for intervals in self._team_intervals(team):
+            for first, last, _ in intervals:
+                diff[first] += 1
+                diff[last + 1] -= 1
+        diff.pop()
+        return array('l', itertools.accumulate(diff))
+    
+    def _team_intervals(self, team):
+        """Списки отрезков команды team (None - всех команд)"""
+        if team is None:
+            return list(self._intervals.values())
+        return [self._intervals[team]] if team in self._intervals else []
+    
+    def peak(self, team=None):
+        """(наибольшее число сотрудников в отпуске, первая дата с таким числом или None)"""
+        absent = self.daily_absent(team)
+        most = max(absent, default=0)
+        return most, (self._dates[absent.index(most)] if most else None)
+    
+    def overlaps(self, team=None):
+        """Пересечения отпусков сотрудников одной команды: итератор VacationOverlap по дате начала"""
+        dates, working, names = self._dates, self._working, self.names
+        for interval_team in ([team] if team is not None else list(self._intervals)):
+            active = []  # куча (последний день, номер сотрудника) отпусков, идущих на текущий день
+            for first, last, emp_idx in self._intervals.get(interval_team, ()):
+                while active and active[0][0] < first:
+                    heapq.heappop(active)
+                for other_last, other_idx in active:
+                    end = last if last < other_last else other_last
+                    yield VacationOverlap(interval_team, names[other_idx], names[emp_idx], dates[first], dates[end],
+                                          working[end + 1] - working[first])
+                heapq.heappush(active, (last, emp_idx))
+    
+    def coverage_gaps(self, min_present, team=None):
+        """Рабочие дни, когда на работе меньше min_present сотрудников команды: список CoverageGap
+        
+        min_present - число или {команда: число}. Дни подряд (выходные и
+        праздники между ними не прерывают отрезок) объединяются в один CoverageGap.
+        """
+        codes, dates, working = self.calendar.codes(), self._dates, self._working
+        gaps = []
+        for gap_team in ([team] if team is not None else list(self.team_sizes)):
+            size = self.team_sizes.get(gap_team, 0)
+            required = min_present.get(gap_team) if isinstance(min_present, dict) else min_present
+            if not required:
+                continue
+            absent = self.daily_absent(gap_team)
+            # Нехватка - в отпуске больше limit сотрудников; большинство команд отсеивается по максимуму
+            limit = size - required
+            if max(absent, default=0) <= limit:
+                continue
+            days = [index for index, count in enumerate(absent) if count > limit and codes[index] == DAY_WORKING]
+            
+            first = previous = None
+            for index in days + [None]:
+                # Соседние рабочие дни отличаются на 1 по числу рабочих дней до них
+                if index is not None and previous is not None and working[index] == working[previous] + 1:
+                    previous, present = index, min(present, size - absent[index])
+                    continue
+                if first is not None:
+                    gaps.append(CoverageGap(gap_team, dates[first], dates[previous], present, required))
+                if index is not None:
+                    first = previous = index
+                    present = size - absent[index]
+        return gaps
+    
+    def report(self, min_present=None, limit=None):
+        """Итоги для JSON: команды, пиковая загрузка, пересечения и нехватка сотрудников"""
+        teams = {}
+        for team, size in self.team_sizes.items():
+            most, most_date = self.peak(team)
+            teams[team] = {'employees': size, 'peak_absent': most,
+                           'peak_date': most_date.isoformat() if most_date else None}
+        overlaps = []
+        overlaps_count = 0
+        for overlap in self.overlaps():
+            overlaps_count += 1
+            if limit is None or len(overlaps) < limit:
+                overlaps.append(dict(overlap._asdict(), start=overlap.start.isoformat(), end=overlap.end.isoformat()))
+        gaps = self.coverage_gaps(min_present) if min_present else []
+        return {
+            'period': [self.calendar.start_date.isoformat(), self.calendar.end_date.isoformat()],
+            'employees': len(self.names),
+            'teams': teams,
+            'daily_absent': list(self.daily_absent()),
+            'overlaps_count': overlaps_count,
+            'overlaps': overlaps,
+            'coverage_gaps': [dict(gap._asdict(), start=gap.start.isoformat(), end=gap.end.isoformat())
+                              for gap in gaps],
+        }
+    
+    def fill_sheet(self, ws, styles, title, min_present=None, limit=1000):
+        """Заполнение листа АНАЛИТИКА: итоги, пересечения отпусков и нехватка сотрудников
+        
+        Значения статичные. Минимум сотрудников на работе хранится в ячейке
+        ANALYTICS_MIN_CELL, по нему ScheduleRenderer пересчитывает лист.
+        """
+        for letter, width in zip('ABCDE', (34, 34, 12, 12, 14)):
+            ws.column_dimensions[letter].width = width
+        
+        def row_values(row, values, style, first_col=1):
+            for col, value in enumerate(values, first_col):
+                styles.apply(ws.cell(row=row, column=col, value=value), style)
+        
+        styles.apply(ws.cell(row=1, column=1, value="АНАЛИТИКА ОТПУСКОВ"), 'отчет_заголовок')
+        styles.apply(ws.cell(row=2, column=1, value=f"{title}. Пересчитывается при заполнении ГРАФИК "
+                                                    f"командой python graf.py render"), 'отчет_примечание')
+        most, most_date = self.peak()
+        row_values(4, ["Сотрудников", len(self.names)], 'отчет_текст')
+        row_values(5, ["Минимум на работе в рабочий день", min_present], 'отчет_текст')
+        row_values(6, ["Больше всего в отпуске", most], 'отчет_текст')
+        if most_date:
+            styles.apply(ws.cell(row=6, column=3, value=most_date), 'отчет_дата')
+        
+        row = 8
+        overlaps = self.overlaps()
+        styles.apply(ws.cell(row=row, column=1, value="ПЕРЕСЕЧЕНИЯ ОТПУСКОВ"), 'отчет_раздел')
+        row_values(row + 1, ["Сотрудник", "Сотрудник", "С", "По", "Рабочих дней"], 'отчет_шапка')
+        row += 2
+        shown = total = 0
+        for overlap in overlaps:
+            total += 1
+            if shown >= limit:
+                continue
+            row_values(row, [overlap.first, overlap.second], 'отчет_текст')
+            row_values(row, [overlap.start, overlap.end], 'отчет_дата', first_col=3)
+            styles.apply(ws.cell(row=row, column=5, value=overlap.working_days), 'отчет_текст')
+            row += 1
+            shown += 1
+        if not total:
+            styles.apply(ws.cell(row=row, column=1, value="Пересечений нет"), 'отчет_примечание')
+            row += 1
+        elif total > shown:
+            styles.apply(ws.cell(row=row, column=1, value=f"Показаны первые {shown} из {total}"), 'отчет_примечание')
+            row += 1
+        
+        row += 1
+        styles.apply(ws.cell(row=row, column=1, value="НЕХВАТКА СОТРУДНИКОВ"), 'отчет_раздел')
+        row_values(row + 1, ["С", "По", "На работе", "Требуется"], 'отчет_шапка')
+        row += 2
+        if not min_present:
+            styles.apply(ws.cell(row=row, column=1, value=f"Минимум не задан (ячейка {ANALYTICS_MIN_CELL})"),
+                         'отчет_примечание')
+            return
+        gaps = self.coverage_gaps(min_present)
+        for gap in gaps[:limit]:
+            row_values(row, [gap.start, gap.end], 'отчет_дата')
+            row_values(row, [gap.present, gap.required], 'отчет_текст', first_col=3)
+            row += 1
+        if not gaps:
+            styles.apply(ws.cell(row=row, column=1, value="Минимум соблюдается во все рабочие дни"),
+                         'отчет_примечание')
+
+
+class VacationSummary:
+    """Сводка отпусков по месяцам и кварталам: по сотрудникам и по отделу
+    
+    Дни отпуска - календарные без праздничных (как формула дней на листе
+    СОТРУДНИКИ), рабочие дни отпуска - по типам дней производственного
+    календаря. Отрезки отпуска (merged_day_spans) делятся по границам месяцев
+    calendar.months(), дни каждой части считаются по накопленным суммам
+    календаря за O(1), кварталы и итоги складываются из месяцев. Сотрудники
+    в отпуске по дням - разностный массив, как в VacationAnalytics.
+    """
+    MONTH_NAMES = ('ЯНВ', 'ФЕВ', 'МАР', 'АПР', 'МАЙ', 'ИЮН', 'ИЮЛ', 'АВГ', 'СЕН', 'ОКТ', 'НОЯ', 'ДЕК')
+    
+    def __init__(self, calendar_days, employees):
+        """employees - список (ФИО, [(начало, конец), ...])"""
+        self.calendar = calendar_days
+        self.months = calendar_days.months()
+        # Кварталы: (год, номер квартала, номера месяцев периода) - неполные по краям графика тоже
+        self.quarters = []
+        for month_idx, (year, month, _, _) in enumerate(self.months):
+            quarter = (month - 1) // 3 + 1
+            if not self.quarters or self.quarters[-1][:2] != (year, quarter):
+                self.quarters.append((year, quarter, []))
+            self.quarters[-1][2].append(month_idx)
+        
+        month_starts = [first_index for _, _, first_index, _ in self.months]
+        # Число праздничных и рабочих дней до каждого дня (с 0 в начале)
+        holidays = array('l', [0]) + calendar_days.cumulative_counts(DAY_HOLIDAY)
+        working = self._working = array('l', [0]) + calendar_days.cumulative_counts(DAY_WORKING)
+        day_count = len(calendar_days)
+        first_ordinal = calendar_days.start_date.toordinal()
+        diff = [0] * (day_count + 1)
+        
+        self.names = []
+        self.vacation_days = []  # по сотрудникам: дни отпуска по месяцам
+        self.working_days = []   # по сотрудникам: рабочие дни отпуска по месяцам
+        # Сколько сотрудников с каким набором месяцев отпуска (бит на месяц) - для числа
+        # сотрудников в отпуске за любой квартал без повторного обхода сотрудников
+        self._month_masks = collections.Counter()
+        for name, periods in employees:
+            vacation_days = [0] * len(self.months)
+            working_days = [0] * len(self.months)
+            for first, last in merged_day_spans(periods, first_ordinal, day_count):
+                diff[first] += 1
+                diff[last + 1] -= 1
+                month_idx = bisect.bisect_right(month_starts, first) - 1
+                while first <= last:
+                    _, _, month_first, days = self.months[month_idx]
+                    part_last = min(last, month_first + days - 1)
+                    vacation_days[month_idx] += part_last - first + 1 - (holidays[part_last + 1] - holidays[first])
+                    working_days[month_idx] += working[part_last + 1] - working[first]
+                    first = part_last + 1
+                    month_idx += 1
+            self.names.append(name)
+            self.vacation_days.append(vacation_days)
+            self.working_days.append(working_days)
+            self._month_masks[sum(1 << month_idx for month_idx, days in enumerate(vacation_days) if days)] += 1
+        
+        diff.pop()
+        absent = list(itertools.accumulate(diff))
+        # Больше всего сотрудников в отпуске в один день месяца
+        self.month_peaks = [max(absent[first_index:first_index + days], default=0)
+                            for _, _, first_index, days in self.months]
+    
+    def month_labels(self):
+        """Заголовки месяцев (с годом, если период не один календарный год)"""
+        with_year = self.months[0][0] != self.months[-1][0] or len(self.months) != 12
+        return [f"{self.MONTH_NAMES[month - 1]} {year}" if with_year else self.MONTH_NAMES[month - 1]
+                for year, month, _, _ in self.months]
+    
+    def quarter_labels(self):
+        with_year = self.quarters[0][0] != self.quarters[-1][0]
+        return [f"{quarter} кв. {year}" if with_year else f"{quarter} кв." for year, quarter, _ in self.quarters]
+    
+    def _by_quarter(self, values):
+        return [sum(values[month_idx] for month_idx in month_indexes) for _, _, month_indexes in self.quarters]
+    
+    def employee_rows(self):
+        """Строки сотрудников: (ФИО, дни по месяцам, дни по кварталам, всего дней, всего рабочих дней)"""
+        for name, vacation_days, working_days in zip(self.names, self.vacation_days, self.working_days):
+            yield name, vacation_days, self._by_quarter(vacation_days), sum(vacation_days), sum(working_days)
+    
+    def department_rows(self):
+        """Итоги отдела по месяцам, кварталам и за период: (подпись, рабочих дней в календаре,
+        дней отпуска, рабочих дней отпуска, сотрудников в отпуске, больше всего в отпуске в день)
+        """
+        working = self._working
+        vacation_totals = [sum(days) for days in zip(*self.vacation_days)] or [0] * len(self.months)
+        working_totals = [sum(days) for days in zip(*self.working_days)] or [0] * len(self.months)
+        
+        def totals(label, month_indexes):
+            first = self.months[month_indexes[0]][2]
+            last = self.months[month_indexes[-1]][2] + self.months[month_indexes[-1]][3]
+            mask = sum(1 << month_idx for month_idx in month_indexes)
+            return (label, working[last] - working[first],
+                    sum(vacation_totals[month_idx] for month_idx in month_indexes),
+                    sum(working_totals[month_idx] for month_idx in month_indexes),
+                    sum(count for months, count in self._month_masks.items() if months & mask),
+                    max(self.month_peaks[month_idx] for month_idx in month_indexes))
+        
+        for month_idx, label in enumerate(self.month_labels()):
+            yield totals(label, [month_idx])
+        for (_, _, month_indexes), label in zip(self.quarters, self.quarter_labels()):
+            yield totals(label, month_indexes)
+        yield totals("Итого", list(range(len(self.months))))
+    
+    def fill_sheet(self, ws, styles, title):
+        """Заполнение листа СВОДКА: дни отпуска сотрудников по месяцам и кварталам, итоги отдела
+        
+        Значения статичные - лист не добавляет формул к пересчету книги,
+        ScheduleRenderer заполняет его заново вместе с ГРАФИК.
+        """
+        xl = _openpyxl()
+        month_labels, quarter_labels = self.month_labels(), self.quarter_labels()
+        columns = 1 + len(month_labels) + len(quarter_labels) + 2
+        ws.column_dimensions['A'].width = 34
+        for col in range(2, columns + 1):
+            ws.column_dimensions[xl.get_column_letter(col)].width = 10 if col <= columns - 2 else 14
+        
+        def row_values(row, values, style, first_col=1):
+            for col, value in enumerate(values, first_col):
+                styles.apply(ws.cell(row=row, column=col, value=value), style)
+        
+        styles.apply(ws.cell(row=1, column=1, value="СВОДКА ОТПУСКОВ"), 'отчет_заголовок')
+        styles.apply(ws.cell(row=2, column=1, value=f"{title}. Дни отпуска без праздничных дней. Пересчитывается "
+                                                    f"при заполнении ГРАФИК командой python graf.py render"),
+                     'отчет_примечание')
+        
+        row = 4
+        styles.apply(ws.cell(row=row, column=1, value="ПО СОТРУДНИКАМ"), 'отчет_раздел')
+        row_values(row + 1, ["ФИО", *month_labels, *quarter_labels, "Всего дней", "Рабочих дней"], 'отчет_шапка')
+        row += 2
+        month_totals = [0] * len(month_labels)
+        working_total = 0
+        for name, months, quarters, total, working_days in self.employee_rows():
+            row_values(row, [name, *months, *quarters, total, working_days], 'отчет_текст')
+            month_totals = [a + b for a, b in zip(month_totals, months)]
+            working_total += working_days
+            row += 1
+        row_values(row, ["ИТОГО ПО ОТДЕЛУ", *month_totals, *self._by_quarter(month_totals), sum(month_totals),
+                         working_total], 'отчет_шапка')
+        
+        row += 2
+        styles.apply(ws.cell(row=row, column=1, value="ПО ОТДЕЛУ"), 'отчет_раздел')
+        row_values(row + 1, ["Период", "Рабочих дней", "Дней отпуска", "Рабочих дней отпуска",
+                             "Сотрудников в отпуске", "Больше всего в отпуске в день"], 'отчет_шапка')
+        row += 2
+        for values in self.department_rows():
+            row_values(row, values, 'отчет_текст')
+            row += 1
+
+
+# Замечание проверки отпусков: сотрудник, номер периода (с 1, None - замечание по сотруднику),
+# код правила (VacationValidator.RULES), 'error' или 'warning', описание
+ValidationIssue = collections.namedtuple('ValidationIssue', 'employee period code severity message')
+
+
+class VacationValidator:
+    """Проверка отпусков по правилам ТК РФ с учетом производственного календаря
+    
+    Периоды: обе даты заполнены и это даты, конец не раньше начала, период в
+    пределах графика, периоды сотрудника не пересекаются. За каждые полные 12
+    месяцев графика (год графика): всего не меньше annual_days дней отпуска и
+    хотя бы одна часть не меньше min_part дней; период относится к году, в
+    котором начинается. Дни отпуска - календарные без нерабочих праздничных
+    (как формула дней на листе СОТРУДНИКИ), считаются по накопленным суммам
+    календаря за O(1) на период, все сотрудники проверяются за один проход.
+    """
+    RULES = {
+        'incomplete': "указана только одна дата периода",
+        'not_a_date': "в ячейке не дата",
+        'reversed': "конец отпуска раньше начала",
+        'outside': "период вне графика",
+        'partly_outside': "период выходит за границы графика",
+        'overlap': "периоды отпуска пересекаются",
+        'no_periods': "отпуск не запланирован",
+        'total_short': "запланировано меньше дней, чем положено за год",
+        'total_long': "запланировано больше дней, чем положено за год",
+        'no_long_part': "нет части отпуска нужной длины",
+    }
+    WARNINGS = frozenset(('partly_outside', 'no_periods', 'total_long'))
+    
+    def __init__(self, calendar_days, annual_days=28, min_part=14):
+        self.calendar = calendar_days
+        self.annual_days = annual_days
+        self.min_part = min_part
+        self._first_ordinal = calendar_days.start_date.toordinal()
+        
+        # Границы лет графика (номера дней) - только полные 12 месяцев
+        self.years = []
+        start = calendar_days.start_date
+        while True:
+            end_year, end_month = start.year + (start.month + 10) // 12, (start.month + 10) % 12 + 1
+            end = datetime.date(end_year, end_month, calendar.monthrange(end_year, end_month)[1])
+            if end > calendar_days.end_date:
+                break
+            self.years.append((start.toordinal() - self._first_ordinal, end.toordinal() - self._first_ordinal))
+            start = end + timedelta(days=1)
+    
+    def vacation_days(self, start, end):
+        """Дни отпуска за период: календарные без праздничных дней графика"""
+        return (end - start).days + 1 - self.calendar.count_holidays(start, end)
+    
+    def _issue(self, issues, employee, period, code, detail=""):
+        message = self.RULES[code] + (f": {detail}" if detail else "")
+        issues.append(ValidationIssue(employee, period, code,
+                                      'warning' if code in self.WARNINGS else 'error', message))
+    
+    def check(self, employees):
+        """Проверка сотрудников [(ФИО, [(начало, конец), ...])]: список ValidationIssue
+        
+        Значения периодов - как в ячейках: даты, строки ДД.ММ.ГГГГ или None.
+        Свободные места листа не проверяются (см. is_placeholder_slot).
+        """
+        issues = []
+        day_count = len(self.calendar)
+        for name, periods in assigned_employees(employees):
+            spans = []
+            for period, (start_value, end_value) in enumerate(periods, 1):
+                if start_value in (None, "") and end_value in (None, ""):
+                    continue
+                start, end = ScheduleRenderer._as_date(start_value), ScheduleRenderer._as_date(end_value)
+                if start_value not in (None, "") and start is None or end_value not in (None, "") and end is None:
+                    bad = start_value if start is None and start_value not in (None, "") else end_value
+                    self._issue(issues, name, period, 'not_a_date', str(bad))
+                    continue
+                if start is None or end is None:
+                    self._issue(issues, name, period, 'incomplete')
+                    continue
+                if end < start:
+                    self._issue(issues, name, period, 'reversed', f"{start:%d.%m.%Y} - {end:%d.%m.%Y}")
+                    continue
+                first = start.toordinal() - self._first_ordinal
+                last = end.toordinal() - self._first_ordinal
+                if last < 0 or first >= day_count:
+                    self._issue(issues, name, period, 'outside', f"{start:%d.%m.%Y} - {end:%d.%m.%Y}")
+                    continue
+                if first < 0 or last >= day_count:
+                    self._issue(issues, name, period, 'partly_outside', f"{start:%d.%m.%Y} - {end:%d.%m.%Y}")
+                spans.append((first, last, period, self.vacation_days(start, end)))
+            
+            if not spans:
+                self._issue(issues, name, None, 'no_periods')
+                continue
+            
+            spans.sort()
+            latest = None
+            for first, last, period, _ in spans:
+                if latest is not None and first <= latest[0]:
+                    self._issue(issues, name, period, 'overlap', f"с периодом {latest[1]}")
+                if latest is None or last > latest[0]:
+                    latest = (last, period)
+            
+            for year_first, year_last in self.years:
+                year_spans = [days for first, _, _, days in spans if year_first <= first <= year_last]
+                label = f"год графика с {self.calendar.date_at(year_first):%d.%m.%Y}"
+                total = sum(year_spans)
+                if total < self.annual_days:
+                    self._issue(issues, name, None, 'total_short', f"{total} из {self.annual_days} ({label})")
+                elif total > self.annual_days:
+                    self._issue(issues, name, None, 'total_long', f"{total} из {self.annual_days} ({label})")
+                if year_spans and max(year_spans) < self.min_part:
+                    self._issue(issues, name, None, 'no_long_part',
+                                f"самая длинная {max(year_spans)}, нужно {self.min_part} ({label})")
+        return issues
+    
+    def report(self, employees, issues=None):
+        """Итоги проверки для JSON: число сотрудников, ошибок и предупреждений, замечания"""
+        employees = list(employees)
+        issues = self.check(employees) if issues is None else issues
+        return {
+            'period': [self.calendar.start_date.isoformat(), self.calendar.end_date.isoformat()],
+            'rules': {'annual_days': self.annual_days, 'min_part': self.min_part},
+            'employees': len(assigned_employees(employees)),
+            'errors': sum(1 for issue in issues if issue.severity == 'error'),
+            'warnings': sum(1 for issue in issues if issue.severity == 'warning'),
+            'issues': [issue._asdict() for issue in issues],
+        }
+    
+    def fill_sheet(self, ws, styles, title, employees_count, issues):
+        """Заполнение листа ПРОВЕРКА: правила, итоги и замечания (ошибки - красным, предупреждения - желтым)"""
+        for letter, width in zip('ABCD', (34, 10, 18, 70)):
+            ws.column_dimensions[letter].width = width
+        
+        errors = sum(1 for issue in issues if issue.severity == 'error')
+        styles.apply(ws.cell(row=1, column=1, value="ПРОВЕРКА ОТПУСКОВ"), 'отчет_заголовок')
+        styles.apply(ws.cell(row=2, column=1, value=f"{title}. Дни отпуска - календарные без праздничных. "
+                                                    f"Лист пересчитывается командой python graf.py render "
+                                                    f"по правилам из ячеек B4 и B5"), 'отчет_примечание')
+        rows = [("Дней отпуска за год графика", self.annual_days), ("Самая длинная часть не меньше", self.min_part),
+                (None, None), ("Сотрудников", employees_count), ("Ошибок", errors),
+                ("Предупреждений", len(issues) - errors)]
+        for row, (label, value) in enumerate(rows, 4):
+            if label is not None:
+                styles.apply(ws.cell(row=row, column=1, value=label), 'отчет_текст')
+                styles.apply(ws.cell(row=row, column=2, value=value), 'отчет_текст')
+        
+        for col, header in enumerate(["Сотрудник", "Период №", "Правило", "Описание"], 1):
+            styles.apply(ws.cell(row=11, column=col, value=header), 'отчет_шапка')
+        for row, issue in enumerate(issues, 12):
+            style = 'отчет_ошибка' if issue.severity == 'error' else 'отчет_предупреждение'
+            for col, value in enumerate([issue.employee, issue.period, issue.code, issue.message], 1):
+                styles.apply(ws.cell(row=row, column=col, value=value), style)
+        if not issues:
+            styles.apply(ws.cell(row=12, column=1, value="Замечаний нет"), 'отчет_примечание')
+    
+    @classmethod
+    def from_sheet(cls, ws, calendar_days):
+        """Проверка с правилами из ячеек VALIDATION_RULE_CELLS листа ПРОВЕРКА (пустые - по умолчанию)"""
+        rules = {}
+        for key, ref in zip(('annual_days', 'min_part'), VALIDATION_RULE_CELLS):
+            value = ws[ref].value
+            if isinstance(value, (int, float)) and value > 0:
+                rules[key] = int(value)
+        return cls(calendar_days, **rules)
+
+class ScheduleRenderer:
+    """Заполнение листа ГРАФИК по листу СОТРУДНИКИ без Excel
+    
+    Повторяет макрос ОбновитьГрафик: сотрудники без ФИО пропускаются (после трех
+    пустых ФИО подряд обработка останавливается), остальные выводятся на ГРАФИК
+    подряд, дни отпуска отмечаются буквой "О". Отпуск каждого сотрудника
+    собирается в битовую карту по дням периода, лист записывается за один проход.
+    
+    render(incremental=True) сравнивает отпечатки сотрудников с листом ОТПЕЧАТКИ
+    и перерисовывает только строки изменившихся сотрудников, если строки ГРАФИК
+    остальных не сдвинулись (не добавлены и не удалены ФИО).
+    """
+    VACATION_MARK = "О"
+    
+    def __init__(self, filename):
+        xl = _openpyxl()
+        self.filename = filename
+        # В книге .xlsm сохраняются проект VBA и кнопка макроса
+        self.wb = xl.load_workbook(filename, keep_vba=filename.lower().endswith('.xlsm'))
+        self.layout = ScheduleLayout.from_sheet(self.wb["СОТРУДНИКИ"])
+        self.calendar = ProductionCalendar(*self._detect_period())
+        self.styles = StyleRegistry(self.wb)
+    
+    def _detect_period(self):
+        """Первая и последняя даты графика по строке дат служебного листа ДАТЫ"""
+        return self.period_from_dates(next(self.wb["ДАТЫ"].iter_rows(min_row=1, max_row=1, values_only=True), ()))
+    
+    @classmethod
+    def period_from_dates(cls, dates_row):
+        """(год, первая дата, последняя дата) графика по значениям строки дат листа ДАТЫ"""
+        first_date = cls._as_date(dates_row[2]) if len(dates_row) > 2 else None
+        if first_date is None:
+            raise ValueError("На листе ДАТЫ не найдена первая дата графика (ячейка C1)")
+        last_date = first_date
+        for value in reversed(dates_row[3:]):
+            value = cls._as_date(value)
+            if value is not None:
+                last_date = value
+                break
+        return first_date.year, first_date, last_date
+    
+    @staticmethod
+    def _as_date(value):
+        """Дата из значения ячейки (дата или строка ДД.ММ.ГГГГ), иначе None"""
+        if isinstance(value, datetime.datetime):
+            return value.date()
+        if isinstance(value, datetime.date):
+            return value
+        if isinstance(value, str) and value.strip():
+            try:
+                return datetime.datetime.strptime(value.strip(), "%d.%m.%Y").date()
+            except ValueError:
+                return None
+        return None
+    
+    def read_employees(self):
+        """Список (ФИО, периоды) сотрудников в порядке вывода на ГРАФИК"""
+        return [(name, periods) for name, periods, position in self.read_slots() if position is not None]
+    
+    def read_slots(self):
+        """Все места сотрудников листа СОТРУДНИКИ: список (ФИО, периоды, позиция на ГРАФИК)
+        
+        Позиция None - место не выводится на ГРАФИК (пустое ФИО или место после
+        трех пустых ФИО подряд).
+        """
+        layout = self.layout
+        return self.slots_from_grid(layout, self.employees_grid())
+    
+    def employees_grid(self):
+        """Значения листа СОТРУДНИКИ в пределах раскладки (grid[строка - 1][колонка - 1])"""
+        return list(self.wb["СОТРУДНИКИ"].iter_rows(min_row=1, max_row=self.layout.last_row,
+                                                    max_col=self.layout.last_col, values_only=True))
+    
+    @classmethod
+    def slots_from_grid(cls, layout, grid):
+        """Места сотрудников по значениям листа СОТРУДНИКИ (grid[строка - 1][колонка - 1])"""
+        def value(row, col):
+            return grid[row - 1][col - 1]
+        
+        def name_at(emp_idx):
+            name = value(*layout.name_cell(emp_idx))
+            return str(name).strip() if name is not None else ""
+        
+        slots = []
+        position = 0
+        stopped = False
+        for emp_idx in range(layout.max_employees):
+            name = name_at(emp_idx)
+            if not name and not stopped and emp_idx > 2:
+                # Как в макросе: три пустых ФИО подряд - конец списка
+                empty_count = 0
+                for idx in range(emp_idx, min(emp_idx + 3, layout.max_employees)):
+                    if name_at(idx):
+                        break
+                    empty_count += 1
+                stopped = empty_count >= 3
+            
+            periods = []
+            for start, end in cls.period_values(layout, grid, emp_idx):
+                start, end = cls._as_date(start), cls._as_date(end)
+                if start and end and end >= start:
+                    periods.append((start, end))
+            
+            if name and not stopped:
+                slots.append((value(*layout.name_cell(emp_idx)), periods, position))
+                position += 1
+            else:
+                slots.append((value(*layout.name_cell(emp_idx)), periods, None))
+        return slots
+    
+    @staticmethod
+    def period_values(layout, grid, emp_idx):
+        """Значения ячеек (начало, конец) всех строк периодов сотрудника, без проверки"""
+        start_col = layout.start_col(emp_idx)
+        values = []
+        for period_idx in range(layout.vacation_pairs):
+            cells = grid[layout.period_row(emp_idx, period_idx) - 1]
+            values.append((cells[start_col - 1], cells[start_col]))
+        return values
+    
+    @classmethod
+    def listed_period_values(cls, layout, grid, slots):
+        """Сотрудники, выводимые на ГРАФИК: (ФИО, значения ячеек периодов) - для VacationValidator"""
+        return [(str(name).strip(), cls.period_values(layout, grid, emp_idx))
+                for emp_idx, (name, _, position) in enumerate(slots) if position is not None]
+    
+    def _fingerprint_sheet(self):
+        """Лист ОТПЕЧАТКИ (создается скрытым в книгах, построенных до его появления)"""
+        if FINGERPRINT_SHEET in self.wb.sheetnames:
+            return self.wb[FINGERPRINT_SHEET]
+        ws = self.wb.create_sheet(FINGERPRINT_SHEET)
+        ws.sheet_state = 'hidden'
+        ws.cell(row=1, column=1, value="Отпечаток сотрудника")
+        ws.cell(row=1, column=2, value="Строка ГРАФИК")
+        return ws
+    
+    def _changed_positions(self, slots, fingerprints):
+        """Позиции ГРАФИК, которые нужно перерисовать, или None - перерисовать весь лист
+        
+        Весь лист перерисовывается, если отпечатков нет или строка ГРАФИК хотя бы
+        одного сотрудника изменилась (добавлено или удалено ФИО).
+        """
+        ws = self._fingerprint_sheet()
+        stored = list(ws.iter_rows(min_row=2, max_row=len(slots) + 1, max_col=2, values_only=True))
+        if len(stored) < len(slots):
+            return None
+        
+        changed = set()
+        for (_, _, position), fingerprint, (stored_fingerprint, stored_row) in zip(slots, fingerprints, stored):
+            schedule_row = self.layout.schedule_row(position) if position is not None else 0
+            if stored_row != schedule_row:
+                return None
+            if position is not None and fingerprint != stored_fingerprint:
+                changed.add(position)
+        return changed
+    
+    def _refresh_analytics(self, employees):
+        """Пересчет листа АНАЛИТИКА по текущему списку сотрудников (минимум - из ANALYTICS_MIN_CELL)"""
+        ws = self.wb[ANALYTICS_SHEET]
+        min_present = ws[ANALYTICS_MIN_CELL].value
+        min_present = int(min_present) if isinstance(min_present, (int, float)) and min_present > 0 else None
+        title = self.wb["ГРАФИК"].cell(row=self.layout.schedule_footer_row, column=1).value or ""
+        
+        index = self.wb.index(ws)
+        self.wb.remove(ws)
+        ws = self.wb.create_sheet(ANALYTICS_SHEET, index)
+        VacationAnalytics(self.calendar, assigned_employees(employees)).fill_sheet(ws, self.styles, title, min_present)
+    
+    def _refresh_validation(self, employees):
+        """Пересчет листа ПРОВЕРКА по значениям ячеек периодов (правила - из VALIDATION_RULE_CELLS)"""
+        ws = self.wb[VALIDATION_SHEET]
+        validator = VacationValidator.from_sheet(ws, self.calendar)
+        title = self.wb["ГРАФИК"].cell(row=self.layout.schedule_footer_row, column=1).value or ""
+        
+        index = self.wb.index(ws)
+        self.wb.remove(ws)
+        ws = self.wb.create_sheet(VALIDATION_SHEET, index)
+        validator.fill_sheet(ws, self.styles, title, len(assigned_employees(employees)), validator.check(employees))
+    
+    def _refresh_summary(self, employees):
+        """Пересчет листа СВОДКА по текущему списку сотрудников"""
+        ws = self.wb[SUMMARY_SHEET]
+        title = self.wb["ГРАФИК"].cell(row=self.layout.schedule_footer_row, column=1).value or ""
+        
+        index = self.wb.index(ws)
+        self.wb.remove(ws)
+        ws = self.wb.create_sheet(SUMMARY_SHEET, index)
+        VacationSummary(self.calendar, assigned_employees(employees)).fill_sheet(ws, self.styles, title)
+    
+    def vacation_bitmap(self, periods):
+        """Битовая карта дней отпуска по дням периода (1 - день отпуска)"""
+        calendar_days = self.calendar
+        bitmap = bytearray(len(calendar_days))
+        for start, end in periods:
+            start = max(start, calendar_days.start_date)
+            end = min(end, calendar_days.end_date)
+            if start > end:
+                continue
+            first, last = calendar_days.index(start), calendar_days.index(end)
+            bitmap[first:last + 1] = b"\x01" * (last - first + 1)
+        return bitmap
+    
+    def uses_conditional_formatting(self, ws):
+        """Построена ли книга с conditional_formatting=True
+        
+        Признак - правила на всей области данных ГРАФИК. Правило строки "В отпуске"
+        (analytics=True) лежит под областью данных и режим не меняет.
+        """
+        xl = _openpyxl()
+        layout = self.layout
+        area = (f"C{layout.schedule_row(0)}:{xl.get_column_letter(2 + len(self.calendar))}"
+                f"{layout.schedule_row(layout.max_employees - 1)}")
+        return any(str(rules.sqref) == area for rules in ws.conditional_formatting)
+    
+    def render(self, output=None, incremental=False):
+        """Заполнить ГРАФИК и сохранить книгу (по умолчанию - в исходный файл)
+        
+        incremental=True - перерисовать только строки сотрудников, отпечатки
+        которых отличаются от листа ОТПЕЧАТКИ.
+        """
+        start_time = time.perf_counter()
+        layout = self.layout
+        grid = self.employees_grid()
+        slots = self.slots_from_grid(layout, grid)
+        employees = [(name, periods) for name, periods, position in slots if position is not None]
+        fingerprints = [employee_fingerprint(str(name).strip() if name is not None else "", periods)
+                        for name, periods, _ in slots]
+        positions = self._changed_positions(slots, fingerprints) if incremental else None
+        ws = self.wb["ГРАФИК"]
+        
+        # Стиль каждой колонки календаря: чередование месяцев по номеру месяца в периоде, как в генераторе
+        column_styles = []
+        for month_idx, (_, _, _, days) in enumerate(self.calendar.months()):
+            column_styles += [self.styles[f'граф_ячейка_{month_idx % 2}']] * days
+        vacation_style = self.styles['граф_отпуск']
+        number_style = self.styles['граф_номер']
+        name_style = self.styles['граф_фио']
+        first_day_col = 3
+        
+        # Книга с условным форматированием: ячейки дней содержат только отметки "О"
+        conditional = self.uses_conditional_formatting(ws)
+        mark_style = self.styles['граф_колонка']
+        
+        empty = bytearray(len(self.calendar))
+        last_col = 2 if conditional else first_day_col + len(self.calendar) - 1
+        rows = ws.iter_rows(min_row=layout.schedule_row(0), max_row=layout.schedule_row(layout.max_employees - 1),
+                            max_col=last_col)
+        for position, cells in enumerate(rows):
+            if positions is not None and position not in positions:
+                continue
+            if position < len(employees):
+                name, periods = employees[position]
+                number, bitmap = position + 1, self.vacation_bitmap(periods)
+            else:
+                name, number, bitmap = None, None, empty
+            
+            cells[0].value, cells[0]._style = number, copy(number_style)
+            cells[1].value, cells[1]._style = name, copy(name_style)
+            
+            if conditional:
+                row = cells[0].row
+                for index, is_vacation in enumerate(bitmap):
+                    col = first_day_col + index
+                    if is_vacation:
+                        cell = ws.cell(row=row, column=col, value=self.VACATION_MARK)
+                        cell._style = copy(mark_style)
+                    else:
+                        ws._cells.pop((row, col), None)
+                continue
+            
+            for cell, style_array, is_vacation in zip(cells[first_day_col - 1:], column_styles, bitmap):
+                if is_vacation:
+                    cell.value, cell._style = self.VACATION_MARK, copy(vacation_style)
+                else:
+                    cell.value, cell._style = None, copy(style_array)
+        
+        ws_fingerprints = self._fingerprint_sheet()
+        for emp_idx, ((_, _, position), fingerprint) in enumerate(zip(slots, fingerprints)):
+            ws_fingerprints.cell(row=emp_idx + 2, column=1, value=fingerprint)
+            ws_fingerprints.cell(row=emp_idx + 2, column=2,
+                                 value=layout.schedule_row(position) if position is not None else 0)
+        
+        if ANALYTICS_SHEET in self.wb.sheetnames:
+            self._refresh_analytics(employees)
+        if VALIDATION_SHEET in self.wb.sheetnames:
+            self._refresh_validation(self.listed_period_values(layout, grid, slots))
+        if SUMMARY_SHEET in self.wb.sheetnames:
+            self._refresh_summary(employees)
+        
+        output = output or self.filename
+        self.wb.save(output)
+        
+        periods_count = sum(len(periods) for _, periods in employees)
+        print(f"✓ График заполнен: {output}")
+        print(f"  • Сотрудников: {len(employees)}, периодов отпуска: {periods_count}")
+        if positions is not None:
+            print(f"  • Перерисовано строк: {len(positions)} (остальные сотрудники не изменились)")
+        print(f"  • Время выполнения: {time.perf_counter() - start_time:.1f} сек")
+        return output
+
+
+def render_files(filenames, incremental=False):
+    """Заполнение листа ГРАФИК в готовых файлах без запуска макроса"""
+    failed = 0
+    for filename in filenames:
+        try:
+            ScheduleRenderer(filename).render(incremental=incremental)
+        except Exception as e:
+            failed += 1
+            print(f"✗ Ошибка при заполнении графика {filename}: {e}")
+    return failed
+
+
+# Сотрудник заполненного графика (ScheduleReader.employees): ФИО, строка на ГРАФИК (с 0),
+# периоды отпуска листа СОТРУДНИКИ, отрезки отметок "О" строки ГРАФИК (None - в строке
+# ГРАФИК другое ФИО, график не обновлялся) и совпадают ли отметки ГРАФИК с периодами
+EmployeeRecord = collections.namedtuple('EmployeeRecord', 'name position periods schedule_periods up_to_date')
+
+
+class ScheduleReader:
+    """Чтение заполненных книг графика без загрузки книги в openpyxl
+    
+    Листы СОТРУДНИКИ, ГРАФИК и ДАТЫ разбираются прямо из XML архива
+    (ElementTree.iterparse, разобранные строки сразу очищаются). Значения
+    приводятся как в openpyxl: общие и встроенные строки, числа, даты - по
+    числовому формату стиля ячейки, поэтому раскладка и места сотрудников
+    определяются тем же кодом, что и в ScheduleRenderer (и в макросе).
+    """
+    MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    DIGITS = '0123456789'
+    EXTENSIONS = ('.xlsx', '.xlsm')
+    # Встроенные форматы даты и времени Excel (numFmtId) - без импорта openpyxl
+    BUILTIN_DATE_FORMATS = frozenset(range(14, 23)) | {45, 46, 47}
+    # Как в openpyxl.styles.numbers.is_date_format: текст в кавычках и [...] (кроме [h], [m], [s])
+    # не учитываются, формат даты - буква d, m, h, y или s в первом разделе формата
+    DATE_FORMAT_IGNORED = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+    DATE_FORMAT_LETTER = re.compile(r'(?<![_\\])[dmhysDMHYS]')
+    
+    def __init__(self, filename):
+        import zipfile
+        self.filename = filename
+        with zipfile.ZipFile(filename) as archive:
+            names = set(archive.namelist())
+            parts = {name: archive.read(name) for name in ('xl/workbook.xml', 'xl/_rels/workbook.xml.rels')}
+            self._sheets = TemplateCache._sheet_parts(parts)
+            self._shared = self._shared_strings(archive) if 'xl/sharedStrings.xml' in names else []
+            self._date_styles = self._date_style_ids(archive) if 'xl/styles.xml' in names else frozenset()
+            
+            self.calendar_period = ScheduleRenderer.period_from_dates(
+                self._dense(self._sheet_rows(archive, "ДАТЫ", max_row=1), 1)[0])
+            employees_rows = dict(self._sheet_rows(archive, "СОТРУДНИКИ"))
+            self.layout = ScheduleLayout.from_rows(self._dense(employees_rows))
+            # Пустые строки и колонки в конце листа в XML не записываются - сетка дополняется до раскладки
+            self._employees_grid = self._dense(employees_rows, self.layout.last_row, self.layout.last_col)
+            self.slots = ScheduleRenderer.slots_from_grid(self.layout, self._employees_grid)
+            self._schedule = {row: cells for row, cells in self._sheet_rows(archive, "ГРАФИК")
+                              if row >= ScheduleLayout.SCHEDULE_FIRST_ROW}
+    
+    @classmethod
+    def _shared_strings(cls, archive):
+        """Таблица общих строк (книги, сохраненные Excel)"""
+        from xml.etree import ElementTree
+        strings = []
+        with archive.open('xl/sharedStrings.xml') as f:
+            for _, element in ElementTree.iterparse(f):
+                if element.tag == f"{cls.MAIN_NS}si":
+                    strings.append("".join(text.text or "" for text in element.iter(f"{cls.MAIN_NS}t")))
+                    element.clear()
+        return strings
+    
+    @classmethod
+    def _date_style_ids(cls, archive):
+        """Номера стилей ячеек (атрибут s) с форматом даты"""
+        from xml.etree import ElementTree
+        root = ElementTree.fromstring(archive.read('xl/styles.xml'))
+        formats = {int(number_format.get('numFmtId')): number_format.get('formatCode')
+                   for number_format in root.iter(f"{cls.MAIN_NS}numFmt")}
+        date_styles = set()
+        cell_formats = root.find(f"{cls.MAIN_NS}cellXfs")
+        for index, cell_format in enumerate(cell_formats if cell_formats is not None else ()):
+            format_id = int(cell_format.get('numFmtId', 0))
+            if format_id in formats:
+                code = cls.DATE_FORMAT_IGNORED.sub("", (formats[format_id] or "").split(";")[0])
+                is_date = cls.DATE_FORMAT_LETTER.search(code) is not None
+            else:
+                is_date = format_id in cls.BUILTIN_DATE_FORMATS
+            if is_date:
+                date_styles.add(str(index))
+        return frozenset(date_styles)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _column_index(letters):
+        """Номер колонки по буквам ссылки ("A" - 1, "AA" - 27)"""
+        index = 0
+        for letter in letters:
+            index = index * 26 + ord(letter) - 64
+        return index
+    
+    def _cell_value(self, cell):
+        """Значение ячейки XML как в load_workbook: формула - текстом "=...", иначе значение"""
+        formula = cell.find(f"{self.MAIN_NS}f")
+        if formula is not None:
+            return f"={formula.text or ''}"
+        cell_type = cell.get('t', 'n')
+        if cell_type == 'inlineStr':
+            inline = cell.find(f"{self.MAIN_NS}is")
+            return "".join(text.text or "" for text in inline.iter(f"{self.MAIN_NS}t")) if inline is not None else None
+        value = cell.findtext(f"{self.MAIN_NS}v")
+        if not value:
+            return None
+        if cell_type == 's':
+            return self._shared[int(value)]
+        if cell_type in ('str', 'e'):
+            return value if cell_type == 'str' else None
+        if cell_type == 'b':
+            return value == '1'
+        number = float(value) if any(char in value for char in '.eE') else int(value)
+        if cell.get('s') in self._date_styles:
+            return EXCEL_EPOCH + timedelta(days=int(number))
+        return number
+    
+    def _sheet_rows(self, archive, sheet_name, max_row=None):
+        """Строки листа с непустыми ячейками: (номер строки, {колонка: значение})"""
+        from xml.etree import ElementTree
+        if sheet_name not in self._sheets:
+            raise ValueError(f"В книге {self.filename} нет листа {sheet_name}")
+        row_tag, cell_tag = f"{self.MAIN_NS}row", f"{self.MAIN_NS}c"
+        row_number = 0
+        with archive.open(self._sheets[sheet_name]) as f:
+            for _, element in ElementTree.iterparse(f):
+                if element.tag != row_tag:
+                    continue
+                row_number = int(element.get('r', row_number + 1))
+                if max_row is not None and row_number > max_row:
+                    break
+                cells = {}
+                col = 0
+                for cell in element.iter(cell_tag):
+                    if not len(cell):
+                        # Пустая ячейка (только стиль) - большая часть ячеек ГРАФИК
+                        col += 1
+                        continue
+                    ref = cell.get('r')
+                    col = self._column_index(ref.rstrip(self.DIGITS)) if ref else col + 1
+                    value = self._cell_value(cell)
+                    if value is not None:
+                        cells[col] = value
+                element.clear()
+                if cells:
+                    yield row_number, cells
+    
+    @staticmethod
+    def _dense(rows, min_rows=0, min_cols=0):
+        """Строки листа в виде списка кортежей значений (grid[строка - 1][колонка - 1])"""
+        rows = dict(rows)
+        last_row = max(rows, default=0)
+        width = max(max((max(cells) for cells in rows.values()), default=0), min_cols)
+        return [tuple(rows.get(row, {}).get(col) for col in range(1, width + 1))
+                for row in range(1, max(last_row, min_rows) + 1)]
+    
+    def _schedule_periods(self, position, name):
+        """Отрезки отметок "О" строки ГРАФИК сотрудника или None, если в строке другое ФИО"""
+        cells = self._schedule.get(self.layout.schedule_row(position), {})
+        if cells.get(2) != name:
+            return None
+        _, first_date, last_date = self.calendar_period
+        first_day_col, days = 3, (last_date - first_date).days + 1
+        periods = []
+        start = None
+        for index in range(days + 1):
+            marked = index < days and cells.get(first_day_col + index) == ScheduleRenderer.VACATION_MARK
+            if marked and start is None:
+                start = index
+            elif not marked and start is not None:
+                periods.append((first_date + timedelta(days=start), first_date + timedelta(days=index - 1)))
+                start = None
+        return tuple(periods)
+    
+    def _marked_days(self, periods):
+        """Номера дней графика, попадающих в периоды (для сравнения с отметками ГРАФИК)"""
+        _, first_date, last_date = self.calendar_period
+        days = set()
+        for start, end in periods:
+            start, end = max(start, first_date), min(end, last_date)
+            days.update(range((start - first_date).days, (end - first_date).days + 1))
+        return days
+    
+    def employees(self):
+        """Сотрудники в порядке вывода на ГРАФИК: список EmployeeRecord"""
+        records = []
+        for name, periods, position in self.slots:
+            if position is None:
+                continue
+            schedule_periods = self._schedule_periods(position, name)
+            up_to_date = (None if schedule_periods is None
+                          else self._marked_days(periods) == self._marked_days(schedule_periods))
+            records.append(EmployeeRecord(str(name).strip(), position, tuple(periods), schedule_periods, up_to_date))
+        return records
+    
+    def period_values(self):
+        """Сотрудники, выводимые на ГРАФИК: (ФИО, значения ячеек периодов) - для VacationValidator"""
+        return ScheduleRenderer.listed_period_values(self.layout, self._employees_grid, self.slots)
+    
+    @classmethod
+    def find_files(cls, paths):
+        """Книги графика по списку файлов и каталогов (каталоги обходятся рекурсивно)"""
+        filenames = []
+        for path in paths:
+            if not os.path.isdir(path):
+                filenames.append(path)
+                continue
+            for directory, _, names in os.walk(path):
+                filenames.extend(os.path.join(directory, name) for name in names
+                                 if name.lower().endswith(cls.EXTENSIONS) and not name.startswith('~$'))
+        return sorted(filenames)
+
+
+def _extract_file(filename):
+    """Задание пула извлечения: (файл, записи EmployeeRecord или None, текст ошибки)"""
+    try:
+        return filename, ScheduleReader(filename).employees(), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+
+def _validate_file(filename, annual_days=28, min_part=14):
+    """Задание пула проверки: (файл, (число сотрудников, замечания ValidationIssue) или None, текст ошибки)"""
+    try:
+        reader = ScheduleReader(filename)
+        _, first_date, last_date = reader.calendar_period
+        validator = VacationValidator(ProductionCalendar(start_date=first_date, end_date=last_date),
+                                      annual_days, min_part)
+        employees = reader.period_values()
+        return filename, (len(assigned_employees(employees)), validator.check(employees)), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+
+def extract_schedules(filenames, workers=None, chunksize=8, job=_extract_file):
+    """Чтение заполненных графиков в пуле процессов: итератор результатов job(файл) в порядке файлов"""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(filenames)))
+    if workers == 1:
+        yield from map(job, filenames)
+        return
+    import multiprocessing
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(job, filenames, chunksize)
+
+
+class TemplateCache:
+    """Кэш заготовок книг графика
+    
+    Заготовка - книга генератора с теми же периодом и раскладкой, но без списка
+    сотрудников и без названия компании. Она строится один раз и хранится как
+    .xlsx в каталоге кэша ($GRAF_CACHE_DIR или ~/.cache/graf), ключ - параметры
+    генератора, файл правил календаря и сам скрипт. Книга отдела собирается из
+    частей заготовки: в XML листов СОТРУДНИКИ и ГРАФИК заменяются только ячейки
+    из VacationScheduleGenerator.department_cells, остальные части копируются.
+    """
+    VERSION = 1
+    CELL_PATTERN = re.compile(r'<c r="([A-Z]+[0-9]+)"([^>]*?)(?:/>|>.*?</c>)', re.S)
+    STYLE_PATTERN = re.compile(r'\ss="([0-9]+)"')
+    _shared = None
+    _source_digest = None
+    
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self._templates = {}
+    
+    @classmethod
+    def shared(cls):
+        """Общий кэш процесса (заготовки читаются с диска один раз)"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    @classmethod
+    def _source(cls):
+        """Контрольная сумма скрипта: заготовки, построенные другой версией, не используются"""
+        if cls._source_digest is None:
+            with open(os.path.abspath(__file__), 'rb') as f:
+                cls._source_digest = hashlib.sha1(f.read()).hexdigest()
+        return cls._source_digest
+    
+    def template_path(self, generator):
+        """Файл заготовки для периода и раскладки генератора"""
+        options = dict(generator.template_options, start_date=generator.calendar.start_date.isoformat())
+        vba_digest = generator.vba_template.digest if generator.vba_template is not None else None
+        key = json.dumps([self.VERSION, options, generator.calendar.rules.digest, self._source(), vba_digest],
+                         sort_keys=True)
+        return os.path.join(self.cache_dir, f"template_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+                                            f"{generator.file_extension}")
+    
+    def template(self, generator):
+        """Части заготовки: ({имя части: (дата в архиве, данные)}, {лист: имя XML части})"""
+        import zipfile
+        path = self.template_path(generator)
+        if path not in self._templates:
+            if not os.path.exists(path):
+                self._build(generator, path)
+            with zipfile.ZipFile(path) as package:
+                parts = {info.filename: (info.date_time, package.read(info)) for info in package.infolist()}
+            sheet_parts = self._sheet_parts({name: data for name, (_, data) in parts.items()})
+            self._templates[path] = parts, sheet_parts
+        return self._templates[path]
+    
+    def _build(self, generator, path):
+        """Построение заготовки: книга без сотрудников и названия компании"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            skeleton = VacationScheduleGenerator("", employees=[], **generator.template_options)
+            wb = skeleton._build_streaming_workbook() if skeleton.streaming else skeleton._build_workbook()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_file = f"{path}.{os.getpid()}.tmp"
+        wb.save(temp_file)
+        os.replace(temp_file, path)
+    
+    @staticmethod
+    def _sheet_parts(parts):
+        """Имена XML частей листов по названиям листов (workbook.xml и его связи)"""
+        from xml.etree import ElementTree
+        namespaces = {
+            'main': "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+            'rel': "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+            'pkg': "http://schemas.openxmlformats.org/package/2006/relationships",
+        }
+        targets = {
+            rel.get('Id'): rel.get('Target')
+            for rel in ElementTree.fromstring(parts['xl/_rels/workbook.xml.rels']).findall('pkg:Relationship', namespaces)
+        }
+        sheets = {}
+        for sheet in ElementTree.fromstring(parts['xl/workbook.xml']).iterfind('main:sheets/main:sheet', namespaces):
+            target = targets[sheet.get(f"{{{namespaces['rel']}}}id")]
+            sheets[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+        return sheets
+    
+    @classmethod
+    def _cell_xml(cls, ref, attributes, value):
+        """XML ячейки с новым значением (стиль ячейки заготовки сохраняется)"""
+        style = cls.STYLE_PATTERN.search(attributes)
+        style = f' s="{style.group(1)}"' if style else ""
+        if isinstance(value, datetime.datetime):
+            value = value.date()
+        if isinstance(value, datetime.date):
+            return f'<c r="{ref}"{style}><v>{(value - EXCEL_EPOCH).days}</v></c>'
+        if isinstance(value, (int, float)):
+            return f'<c r="{ref}"{style}><v>{value!r}</v></c>'
+        text = xml_escape(str(value))
+        space = ' xml:space="preserve"' if text != text.strip() else ""
+        return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+    
+    @classmethod
+    def patch_sheet(cls, xml, cells):
+        """XML листа с заменой ячеек cells ({"A1": значение}); все ячейки должны быть в заготовке"""
+        missing = set(cells)
+        
+        def replace(match):
+            ref = match.group(1)
+            if ref not in cells:
+                return match.group(0)
+            missing.discard(ref)
+            return cls._cell_xml(ref, match.group(2), cells[ref])
+        
+        patched = cls.CELL_PATTERN.sub(replace, xml)
+        if missing:
+            raise ValueError(f"В заготовке нет ячеек {', '.join(sorted(missing))}")
+        return patched
+    
+    def write(self, generator, filename):
+        """Книга отдела из заготовки (в файл или поток): замена ячеек отдела в XML листов"""
+        import zipfile
+        xl = _openpyxl()
+        parts, sheet_parts = self.template(generator)
+        patched = {}
+        for title, cells in generator.department_cells().items():
+            part = sheet_parts[title]
+            refs = {f"{xl.get_column_letter(col)}{row}": value for (row, col), value in cells.items()}
+            patched[part] = self.patch_sheet(parts[part][1].decode('utf-8'), refs).encode('utf-8')
+        
+        options = generator.zip_options
+        with zipfile.ZipFile(filename, 'w', allowZip64=True, **options) as package:
+            for name, (date_time, data) in parts.items():
+                info = zipfile.ZipInfo(name, date_time)
+                info.compress_type = options['compression']
+                package.writestr(info, patched.get(name, data), compresslevel=options['compresslevel'])
+        return filename
+
+
+class VbaProjectTemplate:
+    """Готовый проект VBA для книг .xlsm
+    
+    Проект (xl/vbaProject.bin) берется из книги .xlsm, в которую макрос
+    вставлен один раз вручную (модуль vacation_macro.txt и модуль листа
+    vacation_sheet_module.txt), или из самого vbaProject.bin. Вместе с ним
+    запоминаются кодовые имена листов (ЭтаКнига, Лист1...): модули листов
+    в проекте привязаны к ним. Генератор с vba_project добавляет проект
+    в книгу (Workbook.vba_archive) и кнопку формы на лист СОТРУДНИКИ,
+    назначенную макросу ОбновитьГрафик (VML рядом с проектом). Шаблоны
+    читаются один раз на процесс.
+    
+    В текст макроса вписаны раскладка листа СОТРУДНИКИ и период графика
+    (константы _vba_header), поэтому проект подходит не любой книге:
+    check_macro сравнивает константы модулей проекта (исходный текст
+    читается из vbaProject.bin) с константами макроса книги. Для другой
+    раскладки или периода нужна книга-образец с новым vacation_macro.txt.
+    """
+    VBA_PART = 'xl/vbaProject.bin'
+    VML_PART = 'xl/drawings/vmlDrawing1.vml'
+    BUTTON_MACRO = "ОбновитьГрафик"
+    BUTTON_TEXT = "Обновить график"
+    CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+    CODE_NAME_PATTERN = re.compile(r'<(?:\w+:)?(?:sheetPr|workbookPr)\b[^>]*?\scodeName="([^"]*)"')
+    # Объявление константы VBA: имя и значение (без комментария в конце строки)
+    CONST_PATTERN = re.compile(r'^[ \t]*(?:(?:Public|Private|Global)[ \t]+)?Const[ \t]+(\w+)[ \t]+As[ \t]+\w+'
+                               r'[ \t]*=[ \t]*("[^"\r\n]*"|[^\'\r\n]*?)[ \t]*(?:\'[^\r\n]*)?\r?$', re.M | re.I)
+    END_OF_CHAIN = 0xFFFFFFFA  # Номера секторов OLE от этого значения - служебные (конец цепочки, свободный)
+    _loaded = {}
+    
+    def __init__(self, vba_project, code_names=None, workbook_code_name=None, path=None):
+        if not vba_project.startswith(self.CFB_SIGNATURE):
+            raise ValueError(f"{path or 'vbaProject.bin'}: не проект VBA (нет заголовка OLE)")
+        self.vba_project = vba_project
+        self.code_names = code_names or {}  # {название листа: кодовое имя}
+        self.workbook_code_name = workbook_code_name
+        self.path = path
+        self.digest = hashlib.sha1(vba_project).hexdigest()
+        self._macro_constants = None
+    
+    @classmethod
+    def load(cls, path):
+        """Шаблон из книги .xlsm или файла vbaProject.bin (один раз на процесс для файла)"""
+        import zipfile
+        path = os.path.abspath(path)
+        key = path, os.path.getmtime(path)
+        if key not in cls._loaded:
+            cls._loaded[key] = cls.from_workbook(path) if zipfile.is_zipfile(path) else cls.from_bin(path)
+        return cls._loaded[key]
+    
+    @classmethod
+    def from_bin(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read(), path=path)
+    
+    @classmethod
+    def from_workbook(cls, path):
+        """Проект и кодовые имена листов из книги с макросами"""
+        import zipfile
+        with zipfile.ZipFile(path) as package:
+            if cls.VBA_PART not in package.namelist():
+                raise ValueError(f"{path}: в книге нет проекта VBA ({cls.VBA_PART})")
+            parts = {name: package.read(name) for name in package.namelist() if name.endswith('.xml') or
+                     name.endswith('.rels') or name == cls.VBA_PART}
+        
+        def code_name(xml):
+            match = cls.CODE_NAME_PATTERN.search(xml.decode('utf-8'))
+            return match.group(1) if match else None
+        
+        code_names = {}
+        for title, part in TemplateCache._sheet_parts(parts).items():
+            name = code_name(parts[part])
+            if name:
+                code_names[title] = name
+        return cls(parts[cls.VBA_PART], code_names, code_name(parts['xl/workbook.xml']), path=path)
+    
+    @classmethod
+    def _ole_streams(cls, data):
+        """Потоки составного файла OLE (CFB): {путь в верхнем регистре через /: содержимое}"""
+        sector_shift, mini_shift = struct.unpack_from('<HH', data, 30)
+        sector_size, mini_size = 1 << sector_shift, 1 << mini_shift
+        dir_start, = struct.unpack_from('<I', data, 48)
+        mini_cutoff, minifat_start, _, difat_start, difat_count = struct.unpack_from('<5I', data, 56)
+        
+        def sector(number):
+            return data[(number + 1) * sector_size:(number + 2) * sector_size]
+        
+        # Таблица размещения (FAT): первые 109 секторов в заголовке, остальные - цепочкой DIFAT
+        fat_sectors = list(struct.unpack_from('<109I', data, 76))
+        number = difat_start
+        for _ in range(difat_count):
+            block = sector(number)
+            fat_sectors += struct.unpack_from(f'<{sector_size // 4 - 1}I', block)
+            number, = struct.unpack_from('<I', block, sector_size - 4)
+        fat = []
+        for number in fat_sectors:
+            if number < cls.END_OF_CHAIN:
+                fat += struct.unpack(f'<{sector_size // 4}I', sector(number))
+        
+        def chain(number, table, read):
+            blocks = []
+            while number < cls.END_OF_CHAIN:
+                blocks.append(read(number))
+                number = table[number]
+            return b''.join(blocks)
+        
+        directory = chain(dir_start, fat, sector)
+        entries = []
+        for offset in range(0, len(directory), 128):
+            entry = directory[offset:offset + 128]
+            name_size, kind = struct.unpack_from('<HB', entry, 64)
+            left, right, child = struct.unpack_from('<3I', entry, 68)
+            start, size = struct.unpack_from('<IQ', entry, 116)
+            entries.append((entry[:max(name_size - 2, 0)].decode('utf-16-le'), kind, left, right, child, start, size))
+        
+        # Потоки меньше mini_cutoff лежат в мини-потоке корневой записи
+        mini_stream = chain(entries[0][5], fat, sector)
+        minifat_data = chain(minifat_start, fat, sector)
+        minifat = struct.unpack(f'<{len(minifat_data) // 4}I', minifat_data)
+        
+        def mini_sector(number):
+            return mini_stream[number * mini_size:(number + 1) * mini_size]
+        
+        streams = {}
+        pending = [(entries[0][4], "")]
+        while pending:
+            index, prefix = pending.pop()
+            if index >= len(entries):
+                continue
+            name, kind, left, right, child, start, size = entries[index]
+            pending += [(left, prefix), (right, prefix)]
+            path = prefix + name.upper()
+            if kind == 1:  # Хранилище (каталог)
+                pending.append((child, path + "/"))
+            elif kind == 2:  # Поток
+                streams[path] = (chain(start, minifat, mini_sector) if size < mini_cutoff else
+                                 chain(start, fat, sector))[:size]
+        return streams
+    
+    @staticmethod
+    def _decompress(data):
+        """Распаковка сжатого контейнера VBA (MS-OVBA 2.4.1)"""
+        if not data or data[0] != 1:
+            raise ValueError("сжатый контейнер VBA начинается не с 0x01")
+        result = bytearray()
+        position = 1
+        while position < len(data):
+            header, = struct.unpack_from('<H', data, position)
+            chunk_end = min(position + (header & 0x0FFF) + 3, len(data))
+            position += 2
+            chunk_start = len(result)
+            if not header & 0x8000:
+                # Несжатый блок - 4096 байт как есть
+                result += data[position:position + 4096]
+                position += 4096
+                continue
+            while position < chunk_end:
+                flags = data[position]
+                position += 1
+                for bit in range(8):
+                    if position >= chunk_end:
+                        break
+                    if not flags >> bit & 1:
+                        result.append(data[position])
+                        position += 1
+                        continue
+                    # Ссылка на уже распакованное: длина и смещение делят 16 бит по позиции в блоке
+                    token, = struct.unpack_from('<H', data, position)
+                    position += 2
+                    offset_bits = max((len(result) - chunk_start - 1).bit_length(), 4)
+                    length = (token & (0xFFFF >> offset_bits)) + 3
+                    offset = (token >> (16 - offset_bits)) + 1
+                    for _ in range(length):
+                        result.append(result[-offset])
+        return bytes(result)
+    
+    def module_sources(self):
+        """Исходный текст модулей проекта: {имя модуля: текст}"""
+        streams = self._ole_streams(self.vba_project)
+        records = self._decompress(streams['VBA/DIR'])
+        codepage, modules, name, stream = 1252, [], None, None
+        position = 0
+        while position < len(records):
+            record_id, size = struct.unpack_from('<HI', records, position)
+            position += 6
+            if record_id == 0x0009:  # PROJECTVERSION: после размера еще 6 байт версии
+                size = 6
+            value = records[position:position + size]
+            position += size
+            if record_id == 0x0003:  # PROJECTCODEPAGE
+                codepage, = struct.unpack('<H', value)
+            elif record_id == 0x0019:  # MODULENAME
+                name = value.decode(f'cp{codepage}')
+            elif record_id == 0x001A:  # MODULESTREAMNAME
+                stream = value.decode(f'cp{codepage}')
+            elif record_id == 0x0031:  # MODULEOFFSET: начало сжатого текста в потоке модуля
+                offset, = struct.unpack('<I', value)
+                modules.append((name, stream, offset))
+        return {name: self._decompress(streams['VBA/' + stream.upper()][offset:]).decode(f'cp{codepage}')
+                for name, stream, offset in modules}
+    
+    @classmethod
+    def vba_constants(cls, code):
+        """Константы в тексте VBA: {имя: значение как в тексте}"""
+        return {name.upper(): value for name, value in cls.CONST_PATTERN.findall(code)}
+    
+    @property
+    def macro_constants(self):
+        """Константы всех модулей проекта (читаются из vbaProject.bin один раз)"""
+        if self._macro_constants is None:
+            try:
+                sources = self.module_sources()
+            except (KeyError, IndexError, UnicodeDecodeError, LookupError, ValueError, struct.error) as e:
+                raise ValueError(f"{self.path or 'vbaProject.bin'}: не удалось прочитать модули "
+                                 f"проекта VBA ({type(e).__name__}: {e})")
+            self._macro_constants = {}
+            for code in sources.values():
+                self._macro_constants.update(self.vba_constants(code))
+        return self._macro_constants
+    
+    def check_macro(self, code):
+        """Проверка, что макрос проекта собран для той же книги, что текст code
+        
+        Константы раскладки и периода из code (vba_macro_code генератора)
+        должны быть в проекте с теми же значениями, иначе ValueError со
+        списком расхождений: макрос писал бы даты не в те ячейки.
+        """
+        project = self.macro_constants
+        expected = self.vba_constants(code)
+        differences = [f"{name}: в проекте {project[name]}, в книге {value}" for name, value in expected.items()
+                       if name in project and project[name].casefold() != value.casefold()]
+        differences += [f"{name}: нет в проекте" for name in expected if name not in project]
+        if differences:
+            shown = "; ".join(differences[:5]) + (f" и еще {len(differences) - 5}" if len(differences) > 5 else "")
+            raise ValueError(f"{self.path or 'vbaProject.bin'}: макрос проекта VBA собран для другой раскладки "
+                             f"или периода ({shown}). Вставьте в книгу-образец vacation_macro.txt этой книги")
+    
+    def button_vml(self, layout):
+        """VML кнопки формы на месте заготовки под кнопку (строки 1-3 колонок кнопки)"""
+        left = layout.button_col - 1
+        return f"""<xml xmlns:v="urn:schemas-microsoft-com:vml" xmlns:o="urn:schemas-microsoft-com:office:office" \
+xmlns:x="urn:schemas-microsoft-com:office:excel">
+ <o:shapelayout v:ext="edit"><o:idmap v:ext="edit" data="1"/></o:shapelayout>
+ <v:shapetype id="_x0000_t201" coordsize="21600,21600" o:spt="201" path="m,l,21600r21600,l21600,xe">
+  <v:stroke joinstyle="miter"/>
+  <v:path shadowok="f" o:extrusionok="f" strokeok="f" fillok="f" o:connecttype="rect"/>
+  <o:lock v:ext="edit" shapetype="t"/>
+ </v:shapetype>
+ <v:shape id="_x0000_s1025" type="#_x0000_t201" style="position:absolute;z-index:1;mso-wrap-style:tight" \
+o:button="t" fillcolor="buttonFace [67]" strokecolor="windowText [64]" o:insetmode="auto">
+  <v:fill color2="buttonFace [67]" o:detectmouseclick="t"/>
+  <o:lock v:ext="edit" rotation="t"/>
+  <v:textbox style="mso-direction-alt:auto" o:singleclick="f">
+   <div style="text-align:center"><font face="Calibri" size="280" color="auto">{self.BUTTON_TEXT}</font></div>
+  </v:textbox>
+  <x:ClientData ObjectType="Button">
+   <x:Anchor>{left}, 4, 0, 4, {left + 3}, 0, 3, 0</x:Anchor>
+   <x:PrintObject>False</x:PrintObject>
+   <x:AutoFill>False</x:AutoFill>
+   <x:FmlaMacro>[0]!{self.BUTTON_MACRO}</x:FmlaMacro>
+   <x:TextHAlign>Center</x:TextHAlign>
+   <x:TextVAlign>Center</x:TextVAlign>
+  </x:ClientData>
+ </v:shape>
+</xml>
+"""
+    
+    def apply(self, wb, layout):
+        """Проект VBA, кодовые имена листов и кнопка в книге (до записи строк потоковых листов)
+        
+        openpyxl переносит в книгу части vba_archive: проект и VML кнопки;
+        типы содержимого и связи пакета он берет оттуда же.
+        """
+        import zipfile
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as package:
+            package.writestr('[Content_Types].xml',
+                             '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+            package.writestr('_rels/.rels',
+                             '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>')
+            package.writestr(self.VBA_PART, self.vba_project)
+            # Не-ASCII символы VML - ссылками на символы: кодировку файла Excel не угадывает
+            package.writestr(self.VML_PART, self.button_vml(layout).encode('ascii', 'xmlcharrefreplace'))
+        wb.vba_archive = zipfile.ZipFile(archive)
+        
+        if self.workbook_code_name:
+            wb.code_name = self.workbook_code_name
+        for ws in wb.worksheets:
+            if ws.title in self.code_names:
+                ws.sheet_properties.codeName = self.code_names[ws.title]
+        wb["СОТРУДНИКИ"].legacy_drawing = self.VML_PART
+
+
+class RosterImporter:
+    """Потоковый импорт сотрудников и периодов отпуска из CSV, JSON Lines или XLSX
+    
+    Строка источника - один период отпуска: ФИО, начало, конец и необязательно
+    отдел (сотрудник без отпуска - строка с пустыми датами). Названия колонок
+    (ключей JSON) сопоставляются по COLUMN_ALIASES без учета регистра. Источник
+    читается построчно (csv.reader, строки JSON Lines, книга openpyxl в режиме
+    read_only), в памяти остаются только сотрудники выбранного отдела, поэтому
+    расход памяти не зависит от размера выгрузки.
+    
+    Даты проверяются по календарю графика: период с концом раньше начала, вне
+    графика, пересекающийся с другим периодом сотрудника или сверх vacation_pairs
+    пропускается, замечание попадает в issues.
+    """
+    COLUMN_ALIASES = {
+        'name': ('фио', 'сотрудник', 'name', 'employee'),
+        'start': ('начало', 'дата начала', 'начало отпуска', 'start', 'start_date'),
+        'end': ('конец', 'окончание', 'дата окончания', 'конец отпуска', 'end', 'end_date'),
+        'department': ('отдел', 'подразделение', 'department'),
+    }
+    FORMATS = {'.csv': 'csv', '.txt': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.xlsx': 'xlsx', '.xlsm': 'xlsx'}
+    DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d", "%d.%m.%y", "%d/%m/%Y")
+    MAX_STORED_ISSUES = 100
+    
+    def __init__(self, path, calendar=None, department=None, max_employees=None, vacation_pairs=None,
+                 sheet=None, encoding='utf-8-sig'):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in self.FORMATS:
+            raise ValueError(f"Неизвестный формат списка сотрудников: {path} "
+                             f"(допустимо: {', '.join(sorted(self.FORMATS))})")
+        self.path = path
+        self.format = self.FORMATS[extension]
+        self.calendar = calendar
+        self.department = department.strip() if department else None
+        self.max_employees = max_employees
+        self.vacation_pairs = vacation_pairs
+        self.sheet = sheet
+        self.encoding = encoding
+        self.rows_read = 0
+        self.issue_count = 0
+        self.issues = []
+    
+    def _issue(self, line, name, message):
+        """Замечание по строке источника (хранятся первые MAX_STORED_ISSUES)"""
+        self.issue_count += 1
+        if len(self.issues) < self.MAX_STORED_ISSUES:
+            self.issues.append({'line': line, 'name': name, 'message': message})
+    
+    @classmethod
+    def _columns(cls, header):
+        """Номера колонок полей по строке заголовка: {поле: номер}"""
+        names = [str(value).strip().lower() if value is not None else "" for value in header]
+        columns = {}
+        for field, aliases in cls.COLUMN_ALIASES.items():
+            for index, name in enumerate(names):
+                if name in aliases:
+                    columns[field] = index
+                    break
+        if 'name' not in columns:
+            raise ValueError(f"В заголовке нет колонки ФИО (ожидается одно из: {', '.join(cls.COLUMN_ALIASES['name'])})")
+        return columns
+    
+    def _table_records(self, rows):
+        """Записи из строк таблицы с заголовком: (номер строки, {поле: значение})"""
+        columns = None
+        for line, row in enumerate(rows, 1):
+            if columns is None:
+                columns = self._columns(row)
+                continue
+            if not any(value not in (None, "") for value in row):
+                continue
+            yield line, {field: row[index] if index < len(row) else None for field, index in columns.items()}
+    
+    def _csv_records(self):
+        import csv
+        with open(self.path, newline='', encoding=self.encoding) as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            yield from self._table_records(csv.reader(f, dialect))
+    
+    def _jsonl_records(self):
+        with open(self.path, encoding=self.encoding) as f:
+            for line, text in enumerate(f, 1):
+                if not text.strip():
+                    continue
+                try:
+                    item = json.loads(text)
+                except ValueError as e:
+                    self._issue(line, None, f"строка не разобрана как JSON: {e}")
+                    continue
+                keys = {str(key).strip().lower(): value for key, value in item.items()}
+                yield line, {
+                    field: next((keys[alias] for alias in aliases if alias in keys), None)
+                    for field, aliases in self.COLUMN_ALIASES.items()
+                }
+    
+    def _xlsx_records(self):
+        xl = _openpyxl()
+        wb = xl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            ws = wb[self.sheet] if self.sheet else wb.worksheets[0]
+            yield from self._table_records(ws.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    
+    def records(self):
+        """Записи источника по одной: (номер строки, {'name', 'start', 'end', 'department'})"""
+        reader = {'csv': self._csv_records, 'jsonl': self._jsonl_records, 'xlsx': self._xlsx_records}[self.format]
+        for line, record in reader():
+            self.rows_read += 1
+            yield line, record
+    
+    @classmethod
+    def _parse_date(cls, value):
+        """Дата из значения источника (дата, ДД.ММ.ГГГГ, ГГГГ-ММ-ДД), пустое - None, иначе ValueError"""
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        if isinstance(value, datetime.datetime):
+            return value.date()
+        if isinstance(value, datetime.date):
+            return value
+        text = str(value).strip()
+        # Быстрый путь для ДД.ММ.ГГГГ и ГГГГ-ММ-ДД без strptime (основная часть времени импорта)
+        parts = text.split('.')
+        try:
+            if len(parts) == 3 and len(parts[2]) == 4:
+                return datetime.date(int(parts[2]), int(parts[1]), int(parts[0]))
+            if len(text) == 10 and text[4] == '-':
+                return datetime.date.fromisoformat(text)
+        except ValueError:
+            pass
+        for date_format in cls.DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(text, date_format).date()
+            except ValueError:
+                pass
+        raise ValueError(f"не удалось разобрать дату {text!r}")
+    
+    def _check_period(self, line, name, start, end, periods):
+        """Проверка периода по календарю графика и другим периодам сотрудника"""
+        if end < start:
+            return f"конец отпуска {end:%d.%m.%Y} раньше начала {start:%d.%m.%Y}"
+        calendar_days = self.calendar
+        if calendar_days is not None and (end < calendar_days.start_date or start > calendar_days.end_date):
+            return (f"период {start:%d.%m.%Y} - {end:%d.%m.%Y} вне графика "
+                    f"({calendar_days.start_date:%d.%m.%Y} - {calendar_days.end_date:%d.%m.%Y})")
+        for other_start, other_end in periods:
+            if start <= other_end and other_start <= end:
+                return f"период {start:%d.%m.%Y} - {end:%d.%m.%Y} пересекается с {other_start:%d.%m.%Y} - {other_end:%d.%m.%Y}"
+        if self.vacation_pairs is not None and len(periods) >= self.vacation_pairs:
+            return f"периодов отпуска больше {self.vacation_pairs}"
+        if calendar_days is not None and (start < calendar_days.start_date or end > calendar_days.end_date):
+            self._issue(line, name, f"период {start:%d.%m.%Y} - {end:%d.%m.%Y} выходит за границы графика, "
+                                    f"на ГРАФИК попадет только его часть")
+        return None
+    
+    def employees(self):
+        """Сотрудники выбранного отдела для VacationScheduleGenerator(employees=...)
+        
+        Порядок - по первому появлению в источнике, строки одного сотрудника
+        объединяются. Если сотрудников больше max_employees, чтение прекращается
+        с ValueError.
+        """
+        employees = {}
+        for line, record in self.records():
+            if self.department is not None:
+                department = record.get('department')
+                if department is None or str(department).strip() != self.department:
+                    continue
+            
+            name = str(record['name']).strip() if record.get('name') is not None else ""
+            if not name:
+                self._issue(line, None, "нет ФИО")
+                continue
+            if name not in employees:
+                if self.max_employees is not None and len(employees) >= self.max_employees:
+                    raise ValueError(f"Сотрудников больше, чем мест на листе ({self.max_employees}), "
+                                     f"строка {line}: {name}")
+                employees[name] = []
+            
+            try:
+                start, end = self._parse_date(record.get('start')), self._parse_date(record.get('end'))
+            except ValueError as e:
+                self._issue(line, name, str(e))
+                continue
+            if start is None and end is None:
+                continue
+            if start is None or end is None:
+                self._issue(line, name, "указана только одна дата периода")
+                continue
+            
+            problem = self._check_period(line, name, start, end, employees[name])
+            if problem:
+                self._issue(line, name, problem)
+                continue
+            employees[name].append((start, end))
+        
+        return [{'name': name, 'periods': sorted(periods)} for name, periods in employees.items()]
+    
+    def print_issues(self, limit=10):
+        """Вывод замечаний импорта"""
+        if not self.issue_count:
+            return
+        print(f"  ⚠ Замечаний при импорте: {self.issue_count}")
+        for issue in self.issues[:limit]:
+            name = f" {issue['name']}:" if issue['name'] else ""
+            print(f"    строка {issue['line']}:{name} {issue['message']}")
+        if self.issue_count > limit:
+            print(f"    ... и еще {self.issue_count - limit}")
+
+
+# Параметры VacationScheduleGenerator, которые можно задать в манифесте пакетной генерации
+BATCH_GENERATOR_OPTIONS = ('streaming', 'max_employees', 'vacation_pairs', 'orientation',
+                           'conditional_formatting', 'year', 'start_date', 'months', 'analytics', 'min_coverage',
+                           'validation', 'backend', 'vba_project', 'compresslevel', 'summary')
+# Поля манифеста и описания отдела (у отдела - еще параметры генератора)
+BATCH_MANIFEST_FIELDS = ('company', 'output_dir', 'timeout', 'defaults', 'departments')
+BATCH_DEPARTMENT_FIELDS = ('name', 'company', 'file', 'timeout', 'roster', 'roster_department')
+
+
+def _safe_file_part(text):
+    """Часть имени файла без недопустимых в Windows символов"""
+    cleaned = "".join("_" if ch in '<>:"/\\|?*' or ord(ch) < 32 else ch for ch in str(text))
+    return cleaned.strip(" .") or "без_названия"
+
+
+def _load_roster(roster, base_dir):
+    """Список сотрудников из манифеста: список в самом манифесте или путь к JSON файлу
+    
+    Формат: [{"name": "Иванов И.И.", "periods": [["2027-01-10", "2027-01-20"], ...]}, ...]
+    Выгрузки CSV, JSON Lines и XLSX читаются RosterImporter в процессе задания.
+    """
+    if isinstance(roster, str):
+        with open(os.path.join(base_dir, roster), encoding='utf-8') as f:
+            roster = json.load(f)
+    return [
+        {
+            'name': employee['name'],
+            'periods': [(datetime.date.fromisoformat(start), datetime.date.fromisoformat(end))
+                        for start, end in employee.get('periods', [])],
+        }
+        for employee in roster
+    ]
+
+
+def _check_manifest_fields(where, fields, known):
+    """ValueError, если в where есть поля не из known"""
+    unknown = set(fields) - set(known)
+    if unknown:
+        raise ValueError(f"Неизвестные поля в {where}: {', '.join(sorted(unknown))}")
+
+
+def load_batch_manifest(path, output_dir=None):
+    """Задания пакетной генерации из JSON манифеста
+    
+    Манифест:
+        {
+          "company": "ООО РОГА И КОПЫТА",
+          "output_dir": "графики",
+          "timeout": 300,
+          "defaults": {"start_date": "2027-01-01", "months": 12, "streaming": true,
+                       "vba_project": "образец.xlsm"},
+          "departments": [
+            {"name": "Бухгалтерия", "roster": "rosters/buh.json"},
+            {"name": "Склад", "max_employees": 60, "roster": [{"name": "...", "periods": [...]}]},
+            {"name": "ИТ", "roster": "hr_export.xlsx", "roster_department": "ИТ"}
+          ]
+        }
+    
+    Имена файлов детерминированы: отпуск_<компания>_<отдел>_<период>.xlsx
+    (или "file" в описании отдела), совпадающие имена считаются ошибкой манифеста.
+    Неизвестные поля (опечатки вроде "start" вместо "start_date") - тоже ошибка.
+    С "vba_project" (книга с макросом, путь от манифеста) книги - .xlsm с макросом
+    и кнопкой, расширение в "file" должно быть .xlsm.
+    """
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    _check_manifest_fields("манифесте", manifest, BATCH_MANIFEST_FIELDS)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    output_dir = output_dir or os.path.join(base_dir, manifest.get('output_dir', '.'))
+    company = manifest.get('company', "ООО РОГА И КОПЫТА")
+    defaults = manifest.get('defaults', {})
+    _check_manifest_fields('"defaults" манифеста', defaults, BATCH_GENERATOR_OPTIONS)
+    
+    jobs = []
+    outputs = set()
+    for department in manifest['departments']:
+        _check_manifest_fields(f'описании отдела "{department.get("name")}"', department,
+                               BATCH_DEPARTMENT_FIELDS + BATCH_GENERATOR_OPTIONS)
+        options = {key: department.get(key, defaults.get(key))
+                   for key in BATCH_GENERATOR_OPTIONS
+                   if key in department or key in defaults}
+        if isinstance(options.get('start_date'), str):
+            options['start_date'] = datetime.date.fromisoformat(options['start_date'])
+        if options.get('vba_project'):
+            options['vba_project'] = os.path.join(base_dir, options['vba_project'])
+        roster = department.get('roster')
+        roster_import = None
+        if isinstance(roster, str) and os.path.splitext(roster)[1].lower() in RosterImporter.FORMATS:
+            # Выгрузка читается в процессе задания (мест на листе - max_employees манифеста или по выгрузке)
+            roster_import = {'path': os.path.join(base_dir, roster), 'department': department.get('roster_department')}
+        elif roster is not None:
+            options['employees'] = _load_roster(roster, base_dir)
+            options.setdefault('max_employees', max(20, len(options['employees'])))
+        options['company_name'] = f"{department.get('company', company)} - {department['name']}"
+        
+        filename = department.get('file')
+        if filename is None:
+            period_tag = VacationScheduleGenerator.format_period_tag(*VacationScheduleGenerator.period_bounds(
+                options.get('year', 2026), options.get('start_date'), options.get('months', 12)))
+            filename = (f"отпуск_{_safe_file_part(department.get('company', company))}_"
+                        f"{_safe_file_part(department['name'])}_{period_tag}"
+                        f"{'.xlsm' if options.get('vba_project') else '.xlsx'}")
+        output = os.path.join(output_dir, filename)
+        if output in outputs:
+            raise ValueError(f"В манифесте повторяется файл {filename}")
+        outputs.add(output)
+        
+        jobs.append({
+            'department': department['name'],
+            'output': output,
+            'timeout': department.get('timeout', manifest.get('timeout')),
+            'options': options,
+            'roster_import': roster_import,
+        })
+    return jobs
+
+
+def _run_batch_job(job):
+    """Генерация одной книги в процессе пула (вывод генератора подавляется)
+    
+    Выгрузка отдела (roster_import) читается здесь же; без max_employees в
+    манифесте мест на листе столько, сколько сотрудников в выгрузке (не меньше 20),
+    тогда текст макроса под эту раскладку возвращается в 'macro_code'.
+    """
+    start_time = time.perf_counter()
+    issues = stages = macro_code = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            options = job['options']
+            if job.get('roster_import'):
+                options = dict(options)
+                start_date, end_date = VacationScheduleGenerator.period_bounds(
+                    options.get('year', 2026), options.get('start_date'), options.get('months', 12))
+                importer = RosterImporter(job['roster_import']['path'],
+                                          ProductionCalendar(start_date=start_date, end_date=end_date),
+                                          department=job['roster_import']['department'],
+                                          max_employees=options.get('max_employees'),
+                                          vacation_pairs=options.get('vacation_pairs', 10))
+                options['employees'] = importer.employees()
+                issues = {'count': importer.issue_count, 'first': importer.issues[:10]}
+                options.setdefault('max_employees', max(20, len(options['employees'])))
+            generator = VacationScheduleGenerator(**options)
+            if _batch_layout_from_roster(job):
+                macro_code = generator.vba_macro_code(), generator.vba_macro_code(bulk=True)
+            template_cache = TemplateCache.shared() if job['template'] else None
+            filename = generator.create_excel_file(job['output'], template_cache=template_cache)
+            stages = generator.build_stats.stages
+        status = 'ok' if filename else 'error'
+        error = None if filename else "не удалось сохранить файл"
+    except Exception as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+    return {'status': status, 'error': error, 'seconds': round(time.perf_counter() - start_time, 3),
+            'import_issues': issues, 'stages': stages, 'macro_code': macro_code}
+
+
+def _batch_layout_from_roster(job):
+    """Зависит ли раскладка книги задания от числа сотрудников в выгрузке"""
+    return bool(job.get('roster_import')) and 'max_employees' not in job['options']
+
+
+def _prepare_batch(jobs, template_cache=None):
+    """VBA макросы для книг пакета и заготовки книг (с template_cache)
+    
+    Макрос записывается один раз на каждый различающийся текст в каталог книги
+    задания, заготовка строится один раз на период и раскладку до запуска пула
+    процессов. Задания, у которых раскладка зависит от выгрузки, получают макрос
+    после построения (_store_batch_macro). Возвращает {(каталог, текст): имя файла}.
+    """
+    macro_files = {}
+    macro_codes = {}
+    for job in jobs:
+        job['macro'] = None
+        if _batch_layout_from_roster(job):
+            continue
+        try:
+            # Текст макроса зависит только от раскладки и периода, не от списка сотрудников
+            options = {key: value for key, value in job['options'].items()
+                       if key not in ('employees', 'company_name')}
+            options_key = json.dumps(options, sort_keys=True, default=str)
+            if options_key not in macro_codes:
+                macro_codes[options_key] = None
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generator = VacationScheduleGenerator(**options)
+                macro_codes[options_key] = generator.vba_macro_code(), generator.vba_macro_code(bulk=True)
+                if template_cache is not None and generator.builds_from_template:
+                    template_cache.template(generator)
+            code = macro_codes[options_key]
+        except Exception:
+            # Ошибка параметров будет в отчете по заданию
+            code = None
+        if code is not None:
+            _store_batch_macro(job, code, macro_files)
+    return macro_files
+
+
+def _store_batch_macro(job, code, macro_files):
+    """Файлы макроса (обычный и через массивы) в каталоге книги задания, одинаковый текст - один файл"""
+    job_dir = os.path.dirname(job['output'])
+    if (job_dir, code) not in macro_files:
+        count = sum(1 for directory, _ in macro_files if directory == job_dir)
+        suffix = f"_{count + 1}" if count else ""
+        names = f"vacation_macro{suffix}.txt", f"vacation_macro_bulk{suffix}.txt"
+        for name, text in zip(names, code):
+            with open(os.path.join(job_dir, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+        if not count:
+            with open(os.path.join(job_dir, "vacation_sheet_module.txt"), 'w', encoding='utf-8') as f:
+                f.write(VacationScheduleGenerator.vba_sheet_module_code())
+        macro_files[job_dir, code] = names[0]
+    job['macro'] = macro_files[job_dir, code]
+
+
+def run_batch(manifest_path, output_dir=None, workers=None, timeout=None, template=True):
+    """Пакетная генерация графиков отделов по манифесту в пуле процессов
+    
+    В работе одновременно не больше workers заданий, поэтому время задания
+    отсчитывается от его запуска. Задание дольше timeout секунд считается
+    зависшим: процесс пула нельзя остановить по отдельности, поэтому пул
+    пересоздается, а остальные незавершенные задания запускаются заново.
+    Итоги записываются в batch_report.json в общем каталоге книг пакета.
+    
+    template=True - книги собираются из заготовок TemplateCache (одна заготовка
+    на период и раскладку), иначе каждая книга строится полностью.
+    """
+    jobs = load_batch_manifest(manifest_path, output_dir)
+    for job in jobs:
+        job['template'] = template
+    if not jobs:
+        print("✗ В манифесте нет отделов")
+        return jobs
+    # Файл отдела может лежать в подкаталоге ("file" в манифесте), отчет - в общем каталоге всех книг
+    output_dirs = {os.path.dirname(os.path.abspath(job['output'])) for job in jobs}
+    for directory in output_dirs:
+        os.makedirs(directory, exist_ok=True)
+    output_dir = os.path.commonpath(output_dirs)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    
+    print(f"Пакетная генерация: {len(jobs)} отделов, процессов: {workers}")
+    start_time = time.perf_counter()
+    macro_files = _prepare_batch(jobs, TemplateCache.shared() if template else None)
+    
+    import multiprocessing
+    pending = collections.deque(range(len(jobs)))
+    running = {}
+    done = 0
+    pool = multiprocessing.Pool(workers)
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                index = pending.popleft()
+                running[index] = pool.apply_async(_run_batch_job, (jobs[index],)), time.monotonic()
+            
+            expired = []
+            for index, (result, started) in list(running.items()):
+                job_timeout = jobs[index]['timeout'] or timeout
+                if result.ready():
+                    del running[index]
+                    try:
+                        jobs[index].update(result.get())
+                        macro_code = jobs[index].pop('macro_code')
+                        if macro_code is not None:
+                            _store_batch_macro(jobs[index], macro_code, macro_files)
+                    except Exception as e:
+                        jobs[index].update(status='error', error=f"{type(e).__name__}: {e}", seconds=None)
+                elif job_timeout and time.monotonic() - started > job_timeout:
+                    del running[index]
+                    jobs[index].update(status='timeout', error=f"превышено время {job_timeout} сек",
+                                       seconds=round(time.monotonic() - started, 3))
+                    expired.append(index)
+                else:
+                    continue
+                done += 1
+                job = jobs[index]
+                mark = "✓" if job['status'] == 'ok' else "✗"
+                details = f"{job['seconds']} сек" if job['status'] == 'ok' else job['error']
+                print(f"  [{done}/{len(jobs)}] {mark} {job['department']}: {details}")
+            
+            if expired:
+                pool.terminate()
+                pool.join()
+                pending.extendleft(sorted(running, reverse=True))
+                running.clear()
+                pool = multiprocessing.Pool(workers)
+            elif running:
+                time.sleep(0.02)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    
+    elapsed = time.perf_counter() - start_time
+    macros = sorted(os.path.relpath(os.path.join(directory, name), output_dir)
+                    for (directory, _), name in macro_files.items())
+    counts = collections.Counter(job['status'] for job in jobs)
+    report = {
+        'manifest': os.path.abspath(manifest_path),
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'macros': macros,
+        'counts': dict(counts),
+        'jobs': [
+            {key: job.get(key) for key in ('department', 'output', 'status', 'error', 'seconds', 'macro',
+                                           'import_issues', 'stages')}
+            for job in jobs
+        ],
+    }
+    with open(os.path.join(output_dir, "batch_report.json"), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    print(f"✓ Готово: {counts['ok']} из {len(jobs)}, ошибок: {counts['error']}, "
+          f"превышено время: {counts['timeout']}")
+    print(f"  • Время: {elapsed:.1f} сек, {len(jobs) / elapsed:.1f} книг/сек")
+    print(f"  • Макросы: {', '.join(macros)}")
+    print(f"  • Отчет: {os.path.join(output_dir, 'batch_report.json')}")
+    return jobs
+
+
+class ServiceError(Exception):
+    """Ошибка запроса к сервису: HTTP статус и текст для клиента"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ScheduleService:
+    """Локальный HTTP сервис генерации графиков на asyncio (без сторонних библиотек)
+    
+    POST /schedule - JSON с названием компании, отделом, параметрами генератора
+    (как в манифесте пакетной генерации) и списком сотрудников "employees",
+    ответ - книга. GET /health - счетчики сервиса. Одно соединение - один запрос.
+    
+    Книги строятся в пуле из workers процессов тем же заданием, что и пакетная
+    генерация (_run_batch_job, заготовки TemplateCache). Ждать построения могут
+    не больше max_queue разных книг, сверх этого - ответ 503. Одинаковые запросы
+    (компания, параметры и список сотрудников) склеиваются: повторный ждет уже
+    идущее построение. Запрос дольше timeout получает 504, построение при этом
+    продолжается, и повтор запроса присоединяется к нему. Процесс пула нельзя
+    прервать, поэтому размер книги ограничен REQUEST_LIMITS (мест на листе,
+    периодов отпуска, месяцев), больше - ответ 400.
+    
+    Книга строится в пуле целиком и только потом отдается: последние cache_size
+    книг хранятся на диске и отдаются файлом частями по CHUNK_SIZE, память не
+    зависит от размера книги. Отдавать книгу по мере сжатия архива нельзя, не
+    потеряв кэш и склейку одинаковых запросов - это сознательный выбор.
+    """
+    CHUNK_SIZE = 64 * 1024
+    MAX_BODY = 32 * 1024 * 1024
+    MAX_HEADERS = 100
+    # Наибольшие значения параметров книги в запросе (max_employees - и по числу сотрудников в списке)
+    REQUEST_LIMITS = {'max_employees': 1000, 'vacation_pairs': 20, 'months': 36}
+    REQUEST_FIELDS = ('company', 'department', 'employees')
+    # Путь к проекту VBA задает только сервис (--vba-project), не клиент
+    REQUEST_OPTIONS = tuple(key for key in BATCH_GENERATOR_OPTIONS if key != 'vba_project')
+    CONTENT_TYPES = {
+        '.xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        '.xlsm': "application/vnd.ms-excel.sheet.macroEnabled.12",
+    }
+    STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                   411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+                   500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+    
+    def __init__(self, workers=None, max_queue=256, cache_size=256, timeout=None, vba_project=None,
+                 template=True, cache_dir=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.cache_size = max(1, cache_size)
+        self.timeout = timeout
+        self.vba_project = os.path.abspath(vba_project) if vba_project else None
+        self.template = template
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), 'service')
+        self.counters = collections.Counter()
+        self._files = collections.OrderedDict()  # ключ запроса -> файл книги
+        self._building = {}  # ключ запроса -> asyncio.Future с файлом книги
+        self._executor = None
+        self._directory = None
+        self._server = None
+    
+    def request_job(self, payload):
+        """(ключ, параметры генератора, имя файла для клиента) по JSON запроса"""
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "тело запроса - JSON объект")
+        unknown = set(payload) - set(self.REQUEST_FIELDS) - set(self.REQUEST_OPTIONS)
+        if unknown:
+            raise ServiceError(400, f"неизвестные поля: {', '.join(sorted(unknown))}")
+        roster = payload.get('employees', [])
+        if not isinstance(roster, list):
+            raise ServiceError(400, "employees - список сотрудников")
+        
+        options = {key: payload[key] for key in self.REQUEST_OPTIONS if key in payload}
+        company = str(payload.get('company') or "ООО РОГА И КОПЫТА")
+        department = payload.get('department')
+        try:
+            if isinstance(options.get('start_date'), str):
+                options['start_date'] = datetime.date.fromisoformat(options['start_date'])
+            options['employees'] = _load_roster(roster, None)
+            period_tag = VacationScheduleGenerator.format_period_tag(*VacationScheduleGenerator.period_bounds(
+                options.get('year', 2026), options.get('start_date'), options.get('months', 12)))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ServiceError(400, f"ошибка в запросе: {type(e).__name__}: {e}")
+        options.setdefault('max_employees', max(20, len(options['employees'])))
+        for name, limit in self.REQUEST_LIMITS.items():
+            value = options.get(name)
+            if value is not None and not (isinstance(value, int) and value <= limit):
+                raise ServiceError(400, f"{name} - целое число не больше {limit}, а не {value!r}"
+                                        f"{' (по числу сотрудников в списке)' if name not in payload else ''}")
+        options['company_name'] = f"{company} - {department}" if department else company
+        if self.vba_project:
+            options['vba_project'] = self.vba_project
+        
+        # Книга зависит и от правил календаря: после правки calendar_rules.json кэш не подходит
+        key = hashlib.sha1(json.dumps([TemplateCache._source(), CalendarRules.load().digest, options],
+                                      sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        extension = ".xlsm" if self.vba_project else ".xlsx"
+        name = f"отпуск_{_safe_file_part(company)}" + (f"_{_safe_file_part(department)}" if department else "")
+        return key, options, f"{name}_{period_tag}{extension}"
+    
+    async def workbook(self, key, options, extension):
+        """Файл книги: готовый из кэша, из уже идущего построения или новое построение в пуле"""
+        import asyncio
+        if key in self._files:
+            self._files.move_to_end(key)
+            self.counters['cache_hits'] += 1
+            return self._files[key]
+        if key in self._building:
+            self.counters['joined'] += 1
+            return await self._wait_build(self._building[key])
+        if len(self._building) >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise ServiceError(503, "сервис занят, повторите запрос позже")
+        
+        job = {'options': options, 'output': os.path.join(self._directory, key + extension),
+               'template': self.template, 'roster_import': None}
+        build = asyncio.get_running_loop().run_in_executor(self._executor, _run_batch_job, job)
+        future = self._building[key] = asyncio.ensure_future(self._finish_build(key, build, job['output']))
+        # Ошибка построения передается ожидающим запросам, без предупреждения asyncio
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await self._wait_build(future)
+    
+    async def _finish_build(self, key, build, output):
+        """Книга построения в пуле в кэше файлов
+        
+        Ключ остается в _building до конца построения, даже если запрос уже
+        получил 504: процесс пула не прервать, и повтор запроса ждет идущее
+        построение, а не ставит в пул еще одно.
+        """
+        try:
+            result = await build
+            if result['status'] != 'ok':
+                raise ServiceError(422, result['error'])
+            self.counters['builds'] += 1
+            self._files[key] = output
+            while len(self._files) > self.cache_size:
+                _, old_file = self._files.popitem(last=False)
+                with contextlib.suppress(OSError):
+                    os.remove(old_file)
+            return output
+        finally:
+            del self._building[key]
+    
+    async def _wait_build(self, future):
+        """Ожидание построения не дольше timeout (построение при этом продолжается)"""
+        import asyncio
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise ServiceError(504, f"книга не построена за {self.timeout} сек")
+    
+    def health(self):
+        return {
+            'workers': self.workers,
+            'building': len(self._building),
+            'cached': len(self._files),
+            **self.counters,
+        }
+    
+    async def _read_head(self, reader):
+        """Метод, адрес и заголовки запроса"""
+        try:
+            method, target, _ = (await reader.readline()).decode('latin-1').split(" ", 2)
+            headers = {}
+            for _ in range(self.MAX_HEADERS):
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    return method, target, headers
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            raise ServiceError(400, "некорректный запрос HTTP")
+        raise ServiceError(400, "слишком много заголовков")
+    
+    async def _read_json(self, reader, headers):
+        if 'content-length' not in headers:
+            raise ServiceError(411, "нужен заголовок Content-Length")
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise ServiceError(400, "некорректный Content-Length")
+        if length > self.MAX_BODY:
+            raise ServiceError(413, f"тело запроса больше {self.MAX_BODY // 1024 // 1024} МБ")
+        try:
+            return json.loads(await reader.readexactly(length))
+        except ValueError as e:
+            raise ServiceError(400, f"некорректный JSON: {e}")
+    
+    def _head(self, status, headers):
+        lines = [f"HTTP/1.1 {status} {self.STATUS_TEXT[status]}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+    
+    async def _send_json(self, writer, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        writer.write(self._head(status, {'Content-Type': "application/json; charset=utf-8",
+                                         'Content-Length': len(body), 'Connection': "close"}) + body)
+        await writer.drain()
+    
+    async def _send_file(self, writer, path, download_name):
+        """Книга частями; Content-Disposition с именем файла в UTF-8 (RFC 6266)"""
+        import urllib.parse
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            raise ServiceError(503, "книга вытеснена из кэша, повторите запрос")
+        with f:
+            extension = os.path.splitext(path)[1]
+            writer.write(self._head(200, {
+                'Content-Type': self.CONTENT_TYPES[extension],
+                'Content-Length': os.fstat(f.fileno()).st_size,
+                'Content-Disposition': f"attachment; filename=\"schedule{extension}\"; "
+                                       f"filename*=UTF-8''{urllib.parse.quote(download_name)}",
+                'Connection': "close",
+            }))
+            while chunk := f.read(self.CHUNK_SIZE):
+                writer.write(chunk)
+                await writer.drain()
+    
+    async def handle(self, reader, writer):
+        """Обработка одного соединения"""
+        import asyncio
+        import urllib.parse
+        self.counters['requests'] += 1
+        try:
+            try:
+                method, target, headers = await self._read_head(reader)
+                path = urllib.parse.urlsplit(target).path
+                if path == '/health':
+                    if method != 'GET':
+                        raise ServiceError(405, "нужен метод GET")
+                    await self._send_json(writer, 200, self.health())
+                elif path == '/schedule':
+                    if method != 'POST':
+                        raise ServiceError(405, "нужен метод POST")
+                    key, options, download_name = self.request_job(await self._read_json(reader, headers))
+                    filename = await self.workbook(key, options, os.path.splitext(download_name)[1])
+                    await self._send_file(writer, filename, download_name)
+                else:
+                    raise ServiceError(404, f"неизвестный адрес {path}")
+            except ServiceError as e:
+                self.counters[f'status_{e.status}'] += 1
+                await self._send_json(writer, e.status, {'error': e.message})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                self.counters['status_500'] += 1
+                await self._send_json(writer, 500, {'error': f"{type(e).__name__}: {e}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.counters['disconnected'] += 1
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+    
+    async def start(self, host="127.0.0.1", port=8080):
+        """Запуск пула процессов и сервера (port=0 - свободный порт, см. self.port)"""
+        import tempfile
+        import asyncio
+        import concurrent.futures
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._directory = tempfile.mkdtemp(prefix=f"service_{os.getpid()}_", dir=self.cache_dir)
+        self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        # Процессы пула запускаются до приема соединений: иначе fork унаследует сокеты
+        # клиентов, и закрытие соединения сервисом не дойдет до клиента
+        await asyncio.get_running_loop().run_in_executor(self._executor, os.getpid)
+        self._server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+    
+    async def close(self):
+        """Остановка сервера и пула, удаление книг кэша"""
+        import shutil
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+    
+    async def serve(self, host="127.0.0.1", port=8080):
+        await self.start(host, port)
+        print(f"✓ Сервис графиков: http://{host}:{self.port}/schedule (процессов: {self.workers})")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+
+def batch_main(argv):
+    """python graf.py batch манифест.json [--workers N] [--timeout СЕК] [--output КАТАЛОГ] [--no-template]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="graf.py batch",
+                                     description="Пакетная генерация графиков отпусков по отделам")
+    parser.add_argument("manifest", help="JSON манифест с отделами и списками сотрудников")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию - число ядер)")
+    parser.add_argument("--timeout", type=float, default=None, help="ограничение времени одного задания, сек")
+    parser.add_argument("--output", default=None, help="каталог для книг (по умолчанию из манифеста)")
+    parser.add_argument("--no-template", action="store_true", help="строить каждую книгу полностью, без заготовок")
+    args = parser.parse_args(argv)
+    
+    try:
+        jobs = run_batch(args.manifest, args.output, args.workers, args.timeout, template=not args.no_template)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка манифеста: {e}")
+        return 1
+    return sum(1 for job in jobs if job.get('status') != 'ok')
+
+
+def serve_main(argv):
+    """python graf.py serve [--host АДРЕС] [--port ПОРТ] [--workers N] [--max-queue N] [--cache-size N]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="graf.py serve",
+                                     description="Локальный HTTP сервис генерации графиков отпусков")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию - число ядер)")
+    parser.add_argument("--max-queue", type=int, default=256,
+                        help="разных книг в построении одновременно, сверх - ответ 503")
+    parser.add_argument("--cache-size", type=int, default=256, help="готовых книг в кэше сервиса")
+    parser.add_argument("--timeout", type=float, default=None, help="ограничение времени построения книги, сек")
+    parser.add_argument("--vba-project", default=None,
+                        help="книга .xlsm с макросом (или vbaProject.bin): все ответы - .xlsm с макросом и кнопкой")
+    parser.add_argument("--no-template", action="store_true", help="строить каждую книгу полностью, без заготовок")
+    args = parser.parse_args(argv)
+    
+    import asyncio
+    service = ScheduleService(workers=args.workers, max_queue=args.max_queue, cache_size=args.cache_size,
+                              timeout=args.timeout, vba_project=args.vba_project, template=not args.no_template)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(service.serve(args.host, args.port))
+    return 0
+
+
+def import_main(argv):
+    """python graf.py import список.csv|.jsonl|.xlsx [--department ОТДЕЛ] [--start ГГГГ-ММ] [--output файл.xlsx]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="graf.py import",
+                                     description="График отпусков по списку сотрудников из CSV, JSON Lines или XLSX")
+    parser.add_argument("roster", help="файл со строкой на период отпуска: ФИО, начало, конец, [отдел]")
+    parser.add_argument("--department", default=None, help="взять только сотрудников этого отдела")
+    parser.add_argument("--sheet", default=None, help="лист книги XLSX (по умолчанию первый)")
+    parser.add_argument("--company", default="ООО РОГА И КОПЫТА")
+    parser.add_argument("--start", default=None, help="начало графика ГГГГ-ММ (по умолчанию январь 2026)")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--max-employees", type=int, default=None,
+                        help="мест на листе (по умолчанию по числу сотрудников, не меньше 20)")
+    parser.add_argument("--vacation-pairs", type=int, default=10)
+    parser.add_argument("--orientation", choices=ScheduleLayout.ORIENTATIONS, default='blocks')
+    parser.add_argument("--streaming", action="store_true", help="потоковая запись книги")
+    parser.add_argument("--backend", choices=VacationScheduleGenerator.BACKENDS, default='openpyxl',
+                        help="запись листов СОТРУДНИКИ и ГРАФИК: xml - напрямую в XML (потоковый режим)")
+    parser.add_argument("--vba-project", default=None,
+                        help="книга .xlsm с макросом (или vbaProject.bin): результат - .xlsm с макросом и кнопкой")
+    parser.add_argument("--compresslevel", type=int, choices=range(10), default=None, metavar="0-9",
+                        help="сжатие книги: 0 - без сжатия (быстрее), 9 - максимальное (по умолчанию 6)")
+    parser.add_argument("--summary", action="store_true",
+                        help="лист СВОДКА: дни отпуска сотрудников и отдела по месяцам и кварталам")
+    parser.add_argument("--output", default=None, help="файл книги (по умолчанию имя с названием и временем)")
+    parser.add_argument("--timings", default=None,
+                        help="замеры этапов построения в JSON (с --profile cprofile рядом - профиль .prof)")
+    parser.add_argument("--profile", choices=BuildStats.PROFILES, default=None,
+                        help="профиль cProfile всего построения или пик памяти этапов (tracemalloc)")
+    args = parser.parse_args(argv)
+    
+    start_date = datetime.datetime.strptime(args.start, "%Y-%m").date() if args.start else datetime.date(2026, 1, 1)
+    start_date, end_date = VacationScheduleGenerator.period_bounds(start_date=start_date, months=args.months)
+    importer = RosterImporter(args.roster, ProductionCalendar(start_date=start_date, end_date=end_date),
+                              department=args.department, max_employees=args.max_employees,
+                              vacation_pairs=args.vacation_pairs, sheet=args.sheet)
+    
+    start_time = time.perf_counter()
+    try:
+        employees = importer.employees()
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка импорта: {e}")
+        return 1
+    periods_count = sum(len(employee['periods']) for employee in employees)
+    print(f"✓ Импортировано сотрудников: {len(employees)}, периодов отпуска: {periods_count} "
+          f"(прочитано строк: {importer.rows_read}, {time.perf_counter() - start_time:.1f} сек)")
+    importer.print_issues()
+    if not employees:
+        print("✗ В файле нет сотрудников" + (f" отдела {args.department}" if args.department else ""))
+        return 1
+    
+    company = f"{args.company} - {args.department}" if args.department else args.company
+    try:
+        generator = VacationScheduleGenerator(company, streaming=args.streaming, backend=args.backend,
+                                              max_employees=args.max_employees or max(20, len(employees)),
+                                              vacation_pairs=args.vacation_pairs, orientation=args.orientation,
+                                              start_date=start_date, months=args.months, employees=employees,
+                                              vba_project=args.vba_project, compresslevel=args.compresslevel,
+                                              summary=args.summary)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка параметров книги: {e}")
+        return 1
+    filename = generator.create_excel_file(args.output, profile=args.profile)
+    generator.build_stats.print_summary()
+    if args.timings:
+        generator.build_stats.write_json(args.timings)
+        print(f"  • Замеры: {args.timings}")
+    return 0 if filename else 1
+
+
+def extract_main(argv):
+    """python graf.py extract файлы|каталоги [--workers N] [--output периоды.csv|.jsonl]"""
+    import argparse
+    import csv
+    parser = argparse.ArgumentParser(prog="graf.py extract",
+                                     description="Сотрудники и периоды отпуска из заполненных графиков")
+    parser.add_argument("paths", nargs="+", help="книги графика или каталоги с ними")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию по числу ядер)")
+    parser.add_argument("--output", default="периоды_отпусков.csv",
+                        help="CSV (колонки как у import) или JSON Lines (.jsonl)")
+    args = parser.parse_args(argv)
+    
+    filenames = ScheduleReader.find_files(args.paths)
+    if not filenames:
+        print("✗ Не найдено ни одной книги графика")
+        return 1
+    
+    start_time = time.perf_counter()
+    jsonl = args.output.lower().endswith(('.jsonl', '.ndjson'))
+    files_ok = employees_count = periods_count = outdated = 0
+    failed = []
+    with open(args.output, 'w', newline='', encoding='utf-8' if jsonl else 'utf-8-sig') as f:
+        writer = None if jsonl else csv.writer(f, delimiter=';')
+        if writer:
+            writer.writerow(["Файл", "ФИО", "Начало", "Окончание", "Дней", "ГРАФИК обновлен"])
+        for filename, records, error in extract_schedules(filenames, args.workers):
+            if error:
+                failed.append((filename, error))
+                continue
+            files_ok += 1
+            employees_count += len(records)
+            outdated += sum(1 for record in records if record.up_to_date is False)
+            for record in records:
+                periods_count += len(record.periods)
+                # Сотрудник без отпуска - строка с пустыми датами (как в формате import)
+                for start, end in record.periods or [(None, None)]:
+                    days = (end - start).days + 1 if start else None
+                    if jsonl:
+                        f.write(json.dumps({'file': filename, 'name': record.name,
+                                            'start': start.isoformat() if start else None,
+                                            'end': end.isoformat() if end else None,
+                                            'days': days, 'up_to_date': record.up_to_date},
+                                           ensure_ascii=False) + "\n")
+                    else:
+                        writer.writerow([filename, record.name, f"{start:%d.%m.%Y}" if start else "",
+                                         f"{end:%d.%m.%Y}" if end else "", days or "",
+                                         {True: "да", False: "нет", None: ""}[record.up_to_date]])
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"✓ Прочитано книг: {files_ok} из {len(filenames)} ({elapsed:.1f} сек, {len(filenames) / elapsed:.1f} книг/сек)")
+    print(f"  • Сотрудников: {employees_count}, периодов отпуска: {periods_count}")
+    if outdated:
+        print(f"  ⚠ ГРАФИК не совпадает с листом СОТРУДНИКИ у {outdated} сотрудников - обновите график")
+    for filename, error in failed[:10]:
+        print(f"  ✗ {filename}: {error}")
+    print(f"  • Результат: {args.output}")
+    return 1 if failed else 0
+
+
+def analyze_main(argv):
+    """python graf.py analyze файлы|каталоги [--min-coverage N] [--start ГГГГ-ММ] [--output отчет.json]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="graf.py analyze",
+                                     description="Пересечения отпусков и нехватка сотрудников по заполненным графикам")
+    parser.add_argument("paths", nargs="+", help="книги графика или каталоги с ними (книга - отдельная команда)")
+    parser.add_argument("--min-coverage", type=int, default=None,
+                        help="сколько сотрудников команды должно быть на работе в рабочий день")
+    parser.add_argument("--start", default=None, help="начало периода анализа ГГГГ-ММ (по умолчанию январь 2026)")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=None, help="число процессов чтения книг")
+    parser.add_argument("--limit", type=int, default=1000, help="сколько пересечений записать в отчет")
+    parser.add_argument("--output", default="аналитика_отпусков.json")
+    args = parser.parse_args(argv)
+    
+    filenames = ScheduleReader.find_files(args.paths)
+    if not filenames:
+        print("✗ Не найдено ни одной книги графика")
+        return 1
+    start_date = datetime.datetime.strptime(args.start, "%Y-%m").date() if args.start else datetime.date(2026, 1, 1)
+    start_date, end_date = VacationScheduleGenerator.period_bounds(start_date=start_date, months=args.months)
+    
+    start_time = time.perf_counter()
+    employees, teams, failed = [], [], []
+    for filename, records, error in extract_schedules(filenames, args.workers):
+        if error:
+            failed.append({'file': filename, 'error': error})
+            continue
+        for record in records:
+            if is_placeholder_slot(record.name, record.periods):
+                continue
+            employees.append((record.name, record.periods))
+            teams.append(filename)
+    read_seconds = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    analytics = VacationAnalytics(ProductionCalendar(start_date=start_date, end_date=end_date), employees, teams)
+    report = analytics.report(args.min_coverage, limit=args.limit)
+    analyze_seconds = time.perf_counter() - start_time
+    report['failed_files'] = failed
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    print(f"✓ Книг: {len(filenames) - len(failed)} из {len(filenames)}, сотрудников: {report['employees']} "
+          f"(чтение {read_seconds:.1f} сек, анализ {analyze_seconds:.2f} сек)")
+    print(f"  • Пересечений отпусков внутри отделов: {report['overlaps_count']}")
+    if args.min_coverage:
+        print(f"  • Отрезков с нехваткой сотрудников: {len(report['coverage_gaps'])}")
+    for failure in failed[:10]:
+        print(f"  ✗ {failure['file']}: {failure['error']}")
+    print(f"  • Отчет: {args.output}")
+    return 1 if failed else 0
+
+
+def validate_main(argv):
+    """python graf.py validate файлы|каталоги [--annual-days N] [--min-part N] [--output отчет.json]"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="graf.py validate",
+                                     description="Проверка отпусков в заполненных графиках по правилам ТК РФ")
+    parser.add_argument("paths", nargs="+", help="книги графика или каталоги с ними")
+    parser.add_argument("--annual-days", type=int, default=28, help="дней отпуска за год графика")
+    parser.add_argument("--min-part", type=int, default=14, help="минимальная длина одной из частей отпуска")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов чтения книг")
+    parser.add_argument("--output", default=None, help="отчет JSON (по умолчанию - только вывод на экран)")
+    args = parser.parse_args(argv)
+    
+    filenames = ScheduleReader.find_files(args.paths)
+    if not filenames:
+        print("✗ Не найдено ни одной книги графика")
+        return 1
+    
+    start_time = time.perf_counter()
+    job = functools.partial(_validate_file, annual_days=args.annual_days, min_part=args.min_part)
+    files, failed = [], []
+    for filename, result, error in extract_schedules(filenames, args.workers, job=job):
+        if error:
+            failed.append({'file': filename, 'error': error})
+            continue
+        employees_count, issues = result
+        files.append({'file': filename, 'employees': employees_count,
+                      'errors': sum(1 for issue in issues if issue.severity == 'error'),
+                      'warnings': sum(1 for issue in issues if issue.severity == 'warning'),
+                      'issues': [issue._asdict() for issue in issues]})
+    elapsed = time.perf_counter() - start_time
+    
+    errors = sum(item['errors'] for item in files)
+    warnings = sum(item['warnings'] for item in files)
+    if args.output:
+        report = {'rules': {'annual_days': args.annual_days, 'min_part': args.min_part},
+                  'errors': errors, 'warnings': warnings, 'files': files, 'failed_files': failed}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    for item in files:
+        mark = "✗" if item['errors'] else "✓"
+        print(f"{mark} {item['file']}: сотрудников {item['employees']}, ошибок {item['errors']}, "
+              f"предупреждений {item['warnings']}")
+        for issue in item['issues'][:10]:
+            period = f", период {issue['period']}" if issue['period'] else ""
+            print(f"    {issue['employee']}{period}: {issue['message']}")
+        if len(item['issues']) > 10:
+            print(f"    ... и еще {len(item['issues']) - 10}")
+    for failure in failed:
+        print(f"✗ {failure['file']}: {failure['error']}")
+    print(f"  • Ошибок: {errors}, предупреждений: {warnings} ({elapsed * 1000:.0f} мс)")
+    if args.output:
+        print(f"  • Отчет: {args.output}")
+    return 1 if errors or failed else 0
+
+
+def main():
+    """Основная функция"""
+    # python graf.py render [--incremental] файл1.xlsx [файл2.xlsx ...] - заполнить ГРАФИК без Excel
+    # (--incremental - перерисовать только строки изменившихся сотрудников)
+    if len(sys.argv) > 2 and sys.argv[1] == "render":
+        filenames = [arg for arg in sys.argv[2:] if arg != "--incremental"]
+        sys.exit(1 if render_files(filenames, incremental="--incremental" in sys.argv[2:]) else 0)
+    # python graf.py extract каталог - сотрудники и периоды из заполненных графиков
+    if len(sys.argv) > 1 and sys.argv[1] == "extract":
+        sys.exit(extract_main(sys.argv[2:]))
+    # python graf.py analyze каталог - пересечения отпусков и нехватка сотрудников по отделам
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze":
+        sys.exit(analyze_main(sys.argv[2:]))
+    # python graf.py validate каталог - нарушения правил отпусков (ошибки - код возврата 1)
+    if len(sys.argv) > 1 and sys.argv[1] == "validate":
+        sys.exit(validate_main(sys.argv[2:]))
+    # python graf.py import список.csv - график по выгрузке сотрудников и отпусков
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        sys.exit(import_main(sys.argv[2:]))
+    # python graf.py batch манифест.json - графики всех отделов в пуле процессов
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(1 if batch_main(sys.argv[2:]) else 0)
+    # python graf.py calendar 2027 - производственный календарь: дни и норма часов по месяцам (без openpyxl)
+    if len(sys.argv) > 1 and sys.argv[1] == "calendar":
+        sys.exit(calendar_main(sys.argv[2:], prog="graf.py calendar"))
+    # python graf.py serve [--port 8080] - HTTP сервис: POST /schedule с JSON запросом, ответ - книга
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        sys.exit(serve_main(sys.argv[2:]))
+    
+    print("=" * 70)
+    print("ГЕНЕРАТОР ГРАФИКА ОТПУСКОВ С VBA МАКРОСОМ")
+    print("Версия с контрастными цветами (защита отключена)")
+    print("=" * 70)
+    
+    company_name = input("\nВведите название компании: ").strip()
+    if not company_name:
+        company_name = "ООО РОГА И КОПЫТА"
+    
+    start_text = input("Начало графика (ГГГГ или ММ.ГГГГ, Enter - 2026 год): ").strip()
+    try:
+        if not start_text:
+            start_date = datetime.date(2026, 1, 1)
+        elif "." in start_text:
+            month, year = start_text.split(".")
+            start_date = datetime.date(int(year), int(month), 1)
+        else:
+            start_date = datetime.date(int(start_text), 1, 1)
+    except ValueError:
+        print(f"⚠ Не удалось разобрать дату начала '{start_text}', используется 2026 год")
+        start_date = datetime.date(2026, 1, 1)
     
     print("\n" + "=" * 70)
     print("СОЗДАНИЕ ФАЙЛОВ...")
     print("=" * 70)
     
-    generator = VacationScheduleGenerator(company_name)
+    generator = VacationScheduleGenerator(company_name, year=start_date.year, start_date=start_date)
     excel_file = generator.create_excel_file()
     macro_file = generator.create_vba_macro_file()
+    bulk_macro_file = generator.create_vba_macro_file(bulk=True)
+    sheet_module_file = generator.create_vba_sheet_module_file()
     
     print("\n" + "=" * 70)
     
@@ -1106,6 +5710,10 @@ def main():
         print("✓ ФАЙЛЫ УСПЕШНО СОЗДАНЫ")
         print(f"  • Excel файл: {excel_file}")
         print(f"  • Файл макроса: vacation_macro.txt")
+        if bulk_macro_file:
+            print(f"  • Макрос для больших графиков (массивы): {bulk_macro_file}")
+        if sheet_module_file:
+            print(f"  • Автообновление при изменении СОТРУДНИКИ (модуль листа): {sheet_module_file}")
         print("\nОСНОВНЫЕ УЛУЧШЕНИЯ:")
         print("  1. КОНТРАСТНЫЕ ЦВЕТА для Excel 2010:")
         print("     • Выходные дни: СЕРЫЙ (D9D9D9)")
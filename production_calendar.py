@@ -0,0 +1,445 @@
+"""
+Производственный календарь России для генератора графика отпусков (graf.py)
+
+Типы дней по правилам calendar_rules.json (праздники, переносы и сокращенные дни
+по годам, для лет без постановления - переносы по ТК РФ), подсчет дней любого типа
+в диапазоне за O(1) и итоги по месяцам:
+python production_calendar.py 2027 [--start ГГГГ-ММ --months N] [--output дни.csv|.json]
+(то же - python graf.py calendar). Модуль не зависит от openpyxl и от остального
+graf.py: команда не разбирает большой скрипт и запускается за десятки миллисекунд.
+"""
+
+import os
+import sys
+import json
+import pickle
+import hashlib
+import itertools
+import datetime
+import calendar
+from array import array
+
+
+# Коды типов дней в компактном представлении календаря
+DAY_WORKING = 0
+DAY_WEEKEND = 1
+DAY_HOLIDAY = 2
+DAY_TYPE_NAMES = ('рабочий', 'выходной', 'праздник')
+
+MONTH_NAMES_GENITIVE = ('января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+                        'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря')
+
+# Правила производственного календаря (лежат рядом со скриптом)
+CALENDAR_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calendar_rules.json")
+
+
+def default_cache_dir():
+    """Каталог кэша на диске: $GRAF_CACHE_DIR или ~/.cache/graf"""
+    return os.environ.get('GRAF_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'graf')
+
+
+class WorkDay:
+    """Представление дня календаря (создается только по запросу)"""
+    __slots__ = ('date', 'day_type', 'is_short')
+    
+    def __init__(self, date, day_type, is_short=False):
+        self.date = date
+        self.day_type = day_type  # 'рабочий', 'выходной', 'праздник'
+        self.is_short = is_short  # Сокращенный день
+    
+    def __repr__(self):
+        return f"WorkDay({self.date!r}, {self.day_type!r}, is_short={self.is_short})"
+
+class CalendarRules:
+    """Правила производственного календаря из JSON файла (calendar_rules.json)
+    
+    Общие праздники задаются датой без года, для отдельных лет - перенесенные
+    выходные, рабочие выходные и сокращенные дни по постановлению Правительства.
+    Для лет без постановления переносы рассчитываются по ст. 112 ТК РФ: праздник,
+    совпавший с выходным, переносится на следующий рабочий день (кроме января).
+    
+    Рассчитанные годы сохраняются в кэш на диске (ключ - содержимое файла правил),
+    повторные запуски не разбирают правила заново.
+    """
+    CACHE_VERSION = 1
+    _loaded = {}
+    
+    def __init__(self, path=None, cache_dir=None):
+        self.path = os.path.abspath(path or CALENDAR_RULES_FILE)
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        self.digest = hashlib.sha1(raw).hexdigest()
+        self.rules = json.loads(raw.decode('utf-8'))
+        self.weekend = frozenset(self.rules.get('weekend', (5, 6)))
+        
+        self.cache_file = os.path.join(cache_dir or default_cache_dir(), f"calendar_{self.digest[:16]}.pickle")
+        self._years = self._read_cache()
+    
+    @classmethod
+    def load(cls, path=None):
+        """Правила из файла path (один разбор файла на процесс)"""
+        key = os.path.abspath(path or CALENDAR_RULES_FILE)
+        if key not in cls._loaded:
+            cls._loaded[key] = cls(key)
+        return cls._loaded[key]
+    
+    def _read_cache(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                version, years = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            return {}
+        return years if version == self.CACHE_VERSION else {}
+    
+    def _write_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'wb') as f:
+                pickle.dump((self.CACHE_VERSION, self._years), f)
+            os.replace(temp_file, self.cache_file)
+        except OSError:
+            pass  # Кэш необязателен: без него календарь просто рассчитывается заново
+    
+    def is_confirmed(self, year):
+        """Задан ли календарь года явно (по постановлению), а не по общим правилам"""
+        return str(year) in self.rules.get('years', {})
+    
+    def year_data(self, year):
+        """Коды дней, сокращенные дни и названия праздников года
+        
+        Возвращает (codes, short, names): bytes с кодом DAY_* на каждый день года,
+        кортеж номеров сокращенных дней (с 0), словарь {номер дня: название}.
+        """
+        if year not in self._years:
+            self._years[year] = self._compile_year(year)
+            self._write_cache()
+        return self._years[year]
+    
+    def _compile_year(self, year):
+        first_day = datetime.date(year, 1, 1)
+        total_days = 366 if calendar.isleap(year) else 365
+        first_weekday = first_day.weekday()
+        codes = bytearray(total_days)
+        for index in range(total_days):
+            if (first_weekday + index) % 7 in self.weekend:
+                codes[index] = DAY_WEEKEND
+        
+        def index_of(date):
+            return date.toordinal() - first_day.toordinal()
+        
+        def month_day(text):
+            month, day = text.split('-')
+            return datetime.date(year, int(month), int(day))
+        
+        names = {}
+        holidays = []
+        for holiday in self.rules.get('holidays', ()):
+            date = month_day(holiday['date'])
+            holidays.append(date)
+            codes[index_of(date)] = DAY_HOLIDAY
+            names[index_of(date)] = holiday['name']
+        
+        year_rules = self.rules.get('years', {}).get(str(year))
+        if year_rules is not None:
+            for day_off in year_rules.get('days_off', ()):
+                date = datetime.date.fromisoformat(day_off['date'])
+                codes[index_of(date)] = DAY_HOLIDAY
+                names[index_of(date)] = day_off.get('name', "Праздничный день")
+            for text in year_rules.get('working_days', ()):
+                codes[index_of(datetime.date.fromisoformat(text))] = DAY_WORKING
+            short = [index_of(datetime.date.fromisoformat(text)) for text in year_rules.get('short_days', ())]
+        else:
+            # Перенос праздников, совпавших с выходными, на следующий рабочий день
+            no_transfer = {month_day(text) for text in self.rules.get('no_weekend_transfer', ())}
+            for date in holidays:
+                if date in no_transfer or (first_weekday + index_of(date)) % 7 not in self.weekend:
+                    continue
+                index = index_of(date) + 1
+                while index < total_days and (codes[index] != DAY_WORKING or index in names):
+                    index += 1
+                if index < total_days:
+                    codes[index] = DAY_HOLIDAY
+                    names[index] = f"Перенос с {date.day} {MONTH_NAMES_GENITIVE[date.month - 1]}"
+            
+            # Сокращенный день - рабочий день накануне праздника (в том числе 31 декабря)
+            eves = [index_of(date) - 1 for date in holidays] + [total_days - 1]
+            short = [index for index in eves if index >= 0 and codes[index] == DAY_WORKING]
+        
+        return bytes(codes), tuple(sorted(short)), names
+
+
+class ProductionCalendar:
+    """Производственный календарь с индексом по порядковому номеру дня
+    
+    Тип каждого дня хранится одним байтом в массиве кодов (DAY_*),
+    сокращенные дни - в битовой карте. Накопительные суммы по типам дней
+    (строятся при первом подсчете) позволяют считать дни в любом диапазоне за O(1).
+    
+    По умолчанию календарь охватывает год year, start_date/end_date задают
+    произвольный период (финансовый год, скользящее окно на несколько лет).
+    """
+    
+    def __init__(self, year=2026, start_date=None, end_date=None, rules=None):
+        self.start_date = start_date or datetime.date(year, 1, 1)
+        self.end_date = end_date or datetime.date(self.start_date.year, 12, 31)
+        if self.end_date < self.start_date:
+            raise ValueError(f"Конец календаря {self.end_date} раньше начала {self.start_date}")
+        self.year = self.start_date.year
+        self.rules = rules or CalendarRules.load()
+        self._first_ordinal = self.start_date.toordinal()
+        self._codes = bytearray()
+        self._short = bytearray()
+        self._names = {}
+        self._prefix = None
+        self._short_prefix = None
+        self._generate_calendar()
+    
+    def _generate_calendar(self):
+        """Сборка календаря периода из рассчитанных по правилам лет"""
+        total_days = self.end_date.toordinal() - self._first_ordinal + 1
+        codes = self._codes = bytearray(total_days)
+        short = self._short = bytearray((total_days + 7) // 8)
+        
+        for year in range(self.start_date.year, self.end_date.year + 1):
+            year_codes, year_short, year_names = self.rules.year_data(year)
+            year_first = datetime.date(year, 1, 1).toordinal()
+            lo = max(self._first_ordinal, year_first) - year_first
+            hi = min(self.end_date.toordinal(), year_first + len(year_codes) - 1) - year_first + 1
+            offset = year_first - self._first_ordinal
+            codes[lo + offset:hi + offset] = year_codes[lo:hi]
+            
+            for day in year_short:
+                if lo <= day < hi:
+                    index = day + offset
+                    short[index >> 3] |= 1 << (index & 7)
+            for day, name in year_names.items():
+                if lo <= day < hi:
+                    self._names[day + offset] = name
+    
+    @property
+    def unconfirmed_years(self):
+        """Годы периода без явно заданного календаря (переносы рассчитаны по ТК РФ)"""
+        return [year for year in range(self.start_date.year, self.end_date.year + 1)
+                if not self.rules.is_confirmed(year)]
+    
+    def months(self):
+        """Месяцы периода: (год, месяц, номер первого дня, число дней в периоде)"""
+        result = []
+        index = 0
+        while index < len(self._codes):
+            date = self.date_at(index)
+            days = calendar.monthrange(date.year, date.month)[1] - date.day + 1
+            days = min(days, len(self._codes) - index)
+            result.append((date.year, date.month, index, days))
+            index += days
+        return result
+    
+    def holiday_name(self, date):
+        """Название праздника или переноса (для листа ПРАЗДНИКИ)"""
+        index = self.index(date)
+        if index is None or self._codes[index] != DAY_HOLIDAY:
+            return None
+        return self._names.get(index, "Праздничный день")
+    
+    def _sums(self, day_code):
+        """Накопительные суммы дней типа day_code (с 0 в начале) для запросов по диапазону"""
+        if self._prefix is None:
+            self._prefix = tuple(array('l', itertools.accumulate((code == day_type for code in self._codes), initial=0))
+                                 for day_type in range(len(DAY_TYPE_NAMES)))
+        return self._prefix[day_code]
+    
+    def _short_sums(self):
+        """Накопительные суммы сокращенных дней (с 0 в начале)"""
+        if self._short_prefix is None:
+            short = self._short
+            self._short_prefix = array('l', itertools.accumulate(
+                (short[index >> 3] >> (index & 7) & 1 for index in range(len(self._codes))), initial=0))
+        return self._short_prefix
+    
+    def __len__(self):
+        return len(self._codes)
+    
+    def __contains__(self, date):
+        return self.index(date) is not None
+    
+    def __iter__(self):
+        for index in range(len(self._codes)):
+            yield self._make_day(index)
+    
+    @property
+    def days(self):
+        """Список объектов WorkDay (строится по запросу, для совместимости)"""
+        return list(self)
+    
+    def index(self, date):
+        """Порядковый номер дня в календаре или None, если дата вне календаря"""
+        index = date.toordinal() - self._first_ordinal
+        if 0 <= index < len(self._codes):
+            return index
+        return None
+    
+    def date_at(self, index):
+        """Дата по порядковому номеру дня"""
+        return datetime.date.fromordinal(self._first_ordinal + index)
+    
+    def _make_day(self, index):
+        return WorkDay(self.date_at(index), DAY_TYPE_NAMES[self._codes[index]],
+                       bool(self._short[index >> 3] & (1 << (index & 7))))
+    
+    def day_code(self, date):
+        """Код типа дня (DAY_*) или None для даты вне календаря"""
+        index = self.index(date)
+        return None if index is None else self._codes[index]
+    
+    def is_short(self, date):
+        """Является ли день сокращенным (предпраздничным)"""
+        index = self.index(date)
+        if index is None:
+            return False
+        return bool(self._short[index >> 3] & (1 << (index & 7)))
+    
+    def get_day_info(self, date):
+        """Получить информацию о дне"""
+        index = self.index(date)
+        if index is None:
+            return None
+        return self._make_day(index)
+    
+    def codes(self, start=None, end=None):
+        """Коды типов дней за диапазон дат включительно (срез без копирования)"""
+        lo, hi = self._clip(start, end)
+        return memoryview(self._codes)[lo:hi]
+    
+    def _clip(self, start, end):
+        """Границы диапазона [start, end] в индексах массива, обрезанные календарем"""
+        lo = 0 if start is None else start.toordinal() - self._first_ordinal
+        hi = len(self._codes) if end is None else end.toordinal() - self._first_ordinal + 1
+        lo = min(max(lo, 0), len(self._codes))
+        hi = min(max(hi, lo), len(self._codes))
+        return lo, hi
+    
+    def count_days(self, start, end, day_code):
+        """Количество дней заданного типа в диапазоне [start, end]"""
+        lo, hi = self._clip(start, end)
+        sums = self._sums(day_code)
+        return sums[hi] - sums[lo]
+    
+    def cumulative_counts(self, day_code):
+        """Накопленное с начала периода количество дней типа day_code на каждый день"""
+        return self._sums(day_code)[1:]
+    
+    def count_working_days(self, start, end):
+        """Количество рабочих дней в диапазоне [start, end]"""
+        return self.count_days(start, end, DAY_WORKING)
+    
+    def count_holidays(self, start, end):
+        """Количество праздничных дней в диапазоне [start, end]"""
+        return self.count_days(start, end, DAY_HOLIDAY)
+    
+    def count_short_days(self, start, end):
+        """Количество сокращенных (предпраздничных) дней в диапазоне [start, end]"""
+        lo, hi = self._clip(start, end)
+        sums = self._short_sums()
+        return sums[hi] - sums[lo]
+    
+    def holidays_in_range(self, start, end):
+        """Список праздничных дней в диапазоне [start, end]"""
+        lo, hi = self._clip(start, end)
+        result = []
+        index = self._codes.find(DAY_HOLIDAY, lo, hi)
+        while index != -1:
+            result.append(self.date_at(index))
+            index = self._codes.find(DAY_HOLIDAY, index + 1, hi)
+        return result
+    
+    def get_all_holidays(self):
+        """Получить список всех праздничных дней (для листа ПРАЗДНИКИ)"""
+        return self.holidays_in_range(None, None)
+
+
+def period_bounds(year=2026, start_date=None, months=12):
+    """Первый и последний день графика на months месяцев с start_date (или на год year)"""
+    start_date = start_date or datetime.date(year, 1, 1)
+    if start_date.day != 1 or months < 1:
+        raise ValueError("Период графика должен начинаться с первого числа месяца и содержать хотя бы один месяц")
+    last_month = start_date.month - 1 + months - 1
+    end_year, end_month = start_date.year + last_month // 12, last_month % 12 + 1
+    return start_date, datetime.date(end_year, end_month, calendar.monthrange(end_year, end_month)[1])
+
+
+def calendar_main(argv, prog="production_calendar.py"):
+    """python production_calendar.py [ГГГГ] [--start ГГГГ-ММ --months N] [--output календарь.csv|.json]
+    
+    То же - python graf.py calendar. argparse и csv нужны только этой команде.
+    """
+    import argparse
+    import csv
+    
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Производственный календарь: дни и норма часов по месяцам")
+    parser.add_argument("year", type=int, nargs="?", default=2026, help="календарный год (по умолчанию 2026)")
+    parser.add_argument("--start", default=None, help="начало периода ГГГГ-ММ вместо календарного года")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--rules", default=None, help="правила календаря (по умолчанию calendar_rules.json)")
+    parser.add_argument("--output", default=None,
+                        help="все дни периода: CSV (дата, тип, сокращенный, праздник) или JSON с итогами")
+    args = parser.parse_args(argv)
+    
+    start_date = datetime.datetime.strptime(args.start, "%Y-%m").date() if args.start else None
+    try:
+        start_date, end_date = period_bounds(args.year, start_date, args.months)
+        production_calendar = ProductionCalendar(start_date=start_date, end_date=end_date,
+                                                 rules=CalendarRules.load(args.rules))
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}")
+        return 1
+    
+    months = []
+    for year, month, first, days in production_calendar.months():
+        first_date = production_calendar.date_at(first)
+        last_date = production_calendar.date_at(first + days - 1)
+        working = production_calendar.count_working_days(first_date, last_date)
+        short = production_calendar.count_short_days(first_date, last_date)
+        months.append({'month': f"{year}-{month:02d}", 'days': days, 'working': working,
+                       'weekend': production_calendar.count_days(first_date, last_date, DAY_WEEKEND),
+                       'holidays': production_calendar.count_holidays(first_date, last_date),
+                       'short': short, 'hours_40': working * 8 - short})
+    
+    if args.output:
+        days = [(production_calendar.date_at(index), production_calendar.day_code(production_calendar.date_at(index)))
+                for index in range(len(production_calendar))]
+        if args.output.lower().endswith('.json'):
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'start': start_date.isoformat(), 'end': end_date.isoformat(), 'months': months,
+                           'days': [{'date': date.isoformat(), 'type': DAY_TYPE_NAMES[code],
+                                     'short': production_calendar.is_short(date),
+                                     'holiday': production_calendar.holiday_name(date)} for date, code in days]},
+                          f, ensure_ascii=False, indent=2)
+        else:
+            with open(args.output, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(["Дата", "Тип дня", "Сокращенный", "Праздник"])
+                for date, code in days:
+                    writer.writerow([f"{date:%d.%m.%Y}", DAY_TYPE_NAMES[code],
+                                     "да" if production_calendar.is_short(date) else "",
+                                     production_calendar.holiday_name(date) or ""])
+    
+    print(f"Производственный календарь {start_date:%d.%m.%Y} - {end_date:%d.%m.%Y}")
+    for year in production_calendar.unconfirmed_years:
+        print(f"  ⚠ Для {year} года нет постановления в правилах: переносы выходных рассчитаны по ТК РФ")
+    print("Месяц   | дней | рабочих | выходных | праздников | сокращенных | часов (40 ч)")
+    for item in months:
+        print(f"{item['month']} | {item['days']:4} | {item['working']:7} | {item['weekend']:8} | "
+              f"{item['holidays']:10} | {item['short']:11} | {item['hours_40']:12}")
+    totals = {key: sum(item[key] for item in months) for key in ('days', 'working', 'weekend', 'holidays',
+                                                                 'short', 'hours_40')}
+    print(f"Итого   | {totals['days']:4} | {totals['working']:7} | {totals['weekend']:8} | "
+          f"{totals['holidays']:10} | {totals['short']:11} | {totals['hours_40']:12}")
+    if args.output:
+        print(f"  • Дни периода: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(calendar_main(sys.argv[1:]))